@@ -8,7 +8,7 @@ Created Date: Monday 23rd June 2025
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Thursday 10th July 2025
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -22,14 +22,18 @@ E.g. if python bindings are built in $HOME/superdrops-in-action/build/, do:
 export CLEO_PYTHON_BINDINGS=$HOME/superdrops-in-action/build/_deps/cleo-build/cleo_python_bindings/
 """
 
+import gc
 import os
 import sys
+from contextlib import nullcontext
 from mpi4py import MPI
 
 sys.path.append(os.environ["CLEO_PYTHON_BINDINGS"])
 import cleo_python_bindings as cleo
 from cleo_python_bindings import coupldyn_numpy
 
+from .observer_store import staged_store_path, check_flush_destination, flush_store
+
 
 def mpi_info(comm):
     print("\n--- CLEO STATUS: MPI INFORMATION ---")
@@ -40,7 +44,7 @@ def mpi_info(comm):
     print("--------------------------------------")
 
 
-def create_sdm(config, tsteps, is_motion):
+def create_sdm(config, tsteps, is_motion, zarrbasedir=None):
     print("CLEO STATUS: creating GridboxMaps")
     gbxmaps = cleo.create_cartesian_maps(
         config.get_ngbxs(),
@@ -49,7 +53,9 @@ def create_sdm(config, tsteps, is_motion):
     )
 
     print("CLEO STATUS: creating Observer")
-    store = cleo.FSStore(config.get_zarrbasedir())
+    if zarrbasedir is None:
+        zarrbasedir = config.get_zarrbasedir()
+    store = cleo.FSStore(zarrbasedir)
     dataset = cleo.SimpleDataset(store)
     obs = cleo.pycreate_observer(config, tsteps, dataset, store)
 
@@ -109,6 +115,8 @@ class CleoSDM:
         wvel,
         uvel,
         vvel,
+        profiler=None,
+        staging_dir=None,
     ):
         """Initialize the CleoSDM object.
 
@@ -116,7 +124,18 @@ class CleoSDM:
         qvap, qcond, wvel, uvel, and vvel arrays remain unchanged throughout a simulation.
         Undefined behaviour if values are changed by reassigning arrays rather than by copying
         data into the arrays given during class initialisation.
+
+        If a profiler (PhaseProfiler) is given, the wall time spent creating and preparing the
+        SDM is recorded as the phases "cleo.create_sdm" and "cleo.prepare_to_timestep_sdm".
+
+        If a staging_dir is given (e.g. /dev/shm), the observers write their zarr store in it
+        instead of in the config's zarrbasedir and the store is flushed to zarrbasedir in large
+        consolidated chunks by finalize (see observer_store.py).
         """
+
+        def phase(name):
+            return nullcontext() if profiler is None else profiler.phase(name)
+
         self.name = "CLEO SDM microphysics"
 
         tsteps = cleo.pycreate_timesteps(config)
@@ -140,8 +159,34 @@ class CleoSDM:
         )
         self.comms = coupldyn_numpy.NumpyComms()
 
-        self.sdm, self.dataset, self.store = create_sdm(config, tsteps, is_motion)
-        self.sdm, self.gbxs, self.allsupers = prepare_to_timestep_sdm(config, self.sdm)
+        self.zarrbasedir = config.get_zarrbasedir()
+        if staging_dir is None:
+            self.staged_store = None
+        else:
+            self.staged_store = staged_store_path(staging_dir, self.zarrbasedir)
+            check_flush_destination(self.staged_store, self.zarrbasedir)  # (fail early)
+
+        with phase("cleo.create_sdm"):
+            self.sdm, self.dataset, self.store = create_sdm(
+                config, tsteps, is_motion, zarrbasedir=self.staged_store
+            )
+        with phase("cleo.prepare_to_timestep_sdm"):
+            self.sdm, self.gbxs, self.allsupers = prepare_to_timestep_sdm(
+                config, self.sdm
+            )
+
+    def finalize(self):
+        """Destroy the SDM, e.g. at the end of a run, so that its observers write any output
+        they still hold and then flush the staged store (if any) of the observers to zarrbasedir.
+        """
+        for name in ["sdm", "dataset", "store", "gbxs", "allsupers"]:
+            vars(self).pop(
+                name, None
+            )  # (gbxs and allsupers do not exist if not initialised)
+        gc.collect()
+        if self.staged_store is not None and self.staged_store.is_dir():
+            print(f"CLEO STATUS: flushing {self.staged_store} to {self.zarrbasedir}")
+            flush_store(self.staged_store, self.zarrbasedir)
 
     def run(self, timestep):
         timestep = cleo.realtime2step(
@@ -171,4 +216,3 @@ class CleoSDM:
                 self.comms.send_dynamics(self.sdm.gbxmaps, self.gbxs, self.coupldyn)
 
             self.t_sdm = t_sdm_next
-        # print(f"CLEO STATUS: end t_sdm = {self.t_sdm} [model timesteps]")
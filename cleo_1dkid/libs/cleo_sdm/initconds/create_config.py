@@ -67,6 +67,12 @@ parser.add_argument(
     type=float,
     help="number concentration /cm^3 for superdroplet initial conditions",
 )
+parser.add_argument(
+    "--num_threads",
+    type=int,
+    default=None,
+    help="number of threads for Kokkos host parallel backend (unchanged if None)",
+)
 args = parser.parse_args()
 
 from cleopy import editconfigfile
@@ -110,6 +116,8 @@ params = {
     "numconc": int(numconc_perm3),
     "NUMCONC_a": int(numconc_perm3),
 }
+if args.num_threads is not None:
+    params["num_threads"] = int(args.num_threads)
 
 print("--- create_config configuration arguments ---")
 print(args.src_config_filename, args.dest_config_filename)
@@ -36,6 +36,7 @@ def get_initial_pressure_profile(
     z_min,
     z_max,
     z_delta,
+    cache_dir=None,
 ):
     ### (!) dummy settings to get presure profile, must match settings in KiDDynamics (!)
     settings = Settings(
@@ -50,6 +51,7 @@ def get_initial_pressure_profile(
         is_exner_novapour=is_exner_novapour,
         is_exner_novapour_uniformrho=is_exner_novapour_uniformrho,
         is_approx_drhod_dz=False,
+        cache_dir=cache_dir,
     )
     zfull = np.arange(z_min + z_delta / 2, z_max + z_delta / 2, z_delta)
     press_prof = settings.press0(zfull)
@@ -0,0 +1,161 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: initsupers_generator.py
+Project: initconds
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+Generation of the binary file of CLEO's initial superdroplet conditions for the 1-D KiD test
+case using PySDM's alpha sampling. Used by create_initsuperdropsbinary_script.py and, to write
+the binary file in the same process as a run (i.e. without starting a process for the script for
+every ensemble member), by run_cleo_1dkid.py with --write_initsupers_binary. CLEO's python
+bindings can only create superdroplets by reading this file (given by a config), so the file
+(and config) of every member are still needed by the run.
+"""
+
+from pathlib import Path
+import yaml
+
+import alphasampling
+from initial_pressure_profile import get_initial_pressure_profile
+from PySDM.initialisation import spectra
+from cleopy import geninitconds
+from cleopy.initsuperdropsbinary_src import dryrgens, attrsgen, crdgens
+
+
+def create_initattrsgen(cnfg, grid_filename, cache_dir=None):
+    """returns attributes generator for superdroplets with alpha sampling of the radii and
+    multiplicities given by the superdroplet_initialization section of a config (loaded as a
+    dictionary), as well as the number of superdroplets per gridbox, the number concentration
+    and the tolerance on the number concentration for generating the superdroplets (cache_dir is
+    passed to the settings of the initial pressure profile, see test_case_1dkid/settings.py)"""
+    ### --- Choice of Droplet Radius Probability Distribution and Radii Generator --- ###
+    geomean = float(cnfg["superdroplet_initialization"]["geomean"])
+    geosig = float(cnfg["superdroplet_initialization"]["geosig"])
+    numconc = float(cnfg["superdroplet_initialization"]["numconc"])
+    spectrum = spectra.Lognormal(norm_factor=1.0, m_mode=geomean, s_geom=geosig)
+
+    ### --- Choice of Superdroplet  --- ###
+    nsupers = int(
+        cnfg["superdroplet_initialization"]["nsupers_pergbx"]
+    )  # Number of Superdroplets per Gridbox
+    xi_by_pressure = (
+        True  # initialise number concentration dependent on initial pressure, see below
+    )
+    alpha = float(
+        cnfg["superdroplet_initialization"]["alpha"]
+    )  # sampling param: 0 -> const xi, 1 -> xi follows spectrum
+    default_cdf_range = (0.00001, 0.99999)
+    rspan = spectrum.percentiles(
+        default_cdf_range
+    )  # min and max range of radii to sample [m]
+    radiigen, xiprobdist = alphasampling.AlphaSamplingWrapper(spectrum, alpha, rspan)
+    numconc_tolerance = (
+        0.001  # 0.1% tolerance on resultant numconc not being equal to input numconc
+    )
+
+    ### --- Initial Pressure profile (used if xi_by_pressure==True) --- ###
+    if xi_by_pressure:
+        is_exner_novapour = False  # (!) Settings here MUST match kid_dynamics.py (!)
+        is_exner_novapour_uniformrho = (
+            False  # (!) Settings MUST match kid_dynamics.py (!)
+        )
+        p_surf = 1000  # [hPa] PSURF (!) Settings here MUST match kid_dynamics.py (!)
+        z_min = -25  # [m] (!) Settings here MUST match those in run_cleo_1dkid.py (!)
+        z_max = 3200  # [m] (!) Settings here MUST match those in run_cleo_1dkid.py (!)
+        z_delta = 25  # [m] (!) Settings here MUST match those in run_cleo_1dkid.py (!)
+        press, press_ref = get_initial_pressure_profile(
+            grid_filename=grid_filename,
+            is_exner_novapour=is_exner_novapour,
+            is_exner_novapour_uniformrho=is_exner_novapour_uniformrho,
+            p_surf=p_surf,
+            z_min=z_min,
+            z_max=z_max,
+            z_delta=z_delta,
+            cache_dir=cache_dir,
+        )
+    else:
+        press, press_ref = None, 0.0
+
+    ### --- Choice of Superdroplet Dry Radii Generator --- ###
+    dryr_sf = 1.0  # scale factor for dry radii [m]
+    dryradiigen = dryrgens.ScaledRadiiGen(dryr_sf)  # dryradii are 1/sf of radii [m]
+
+    ### --- Choice of Superdroplet Coords Generator --- ###
+    coord3gen = crdgens.SampleCoordGen(True)  # sample coord3 range randomly or not
+    coord1gen = None  # do not generate superdroplet coord1s
+    coord2gen = None  # do not generate superdroplet coord2s
+
+    initattrsgen = attrsgen.AttrsGenerator(
+        radiigen,
+        dryradiigen,
+        xiprobdist,
+        coord3gen,
+        coord1gen,
+        coord2gen,
+        xi_by_pressure=xi_by_pressure,
+        press=press,
+        press_ref=press_ref,
+    )
+    return initattrsgen, nsupers, numconc, numconc_tolerance
+
+
+def write_initsupers_binary(
+    config_filename,
+    isfigures=None,
+    figpath=None,
+    gbxs2plt=None,
+    figlabel="",
+    cache_dir=None,
+):
+    """Generate the initial superdroplet conditions of a config and write them to its
+    initsupers_filename binary file (which CLEO then reads).
+
+    Args:
+        config_filename (Path): CLEO config (gives initsupers_filename to write to).
+        isfigures (list, optional): Whether to [print information, plot figures] of initial
+          conditions. Defaults to None (i.e. [False, False]).
+        figpath (Path, optional): Path to save figures in. Defaults to None.
+        gbxs2plt (list, optional): indexes of gridboxes of superdroplets to plot. Defaults to
+          None.
+        figlabel (str, optional): Label for saving figures with. Defaults to "".
+        cache_dir (Path, optional): Directory to cache the solved dry-air density profile of
+          the initial pressure profile in. Defaults to None (not cached).
+    """
+    if isfigures is None:
+        isfigures = [False, False]
+
+    with open(config_filename, "r") as file:
+        cnfg = yaml.safe_load(file)
+    constants_filename = cnfg["inputfiles"]["constants_filename"]
+    grid_filename = cnfg["inputfiles"]["grid_filename"]
+    initsupers_filename = cnfg["initsupers"]["initsupers_filename"]
+    assert Path(config_filename).exists()
+    assert Path(constants_filename).exists()
+    assert Path(grid_filename).parent.is_dir()
+
+    initattrsgen, nsupers, numconc, numconc_tolerance = create_initattrsgen(
+        cnfg, grid_filename, cache_dir=cache_dir
+    )
+    geninitconds.generate_initial_superdroplet_conditions(
+        initattrsgen,
+        initsupers_filename,
+        config_filename,
+        constants_filename,
+        grid_filename,
+        nsupers,
+        numconc,
+        numconc_tolerance=numconc_tolerance,
+        isprintinfo=isfigures[0],
+        isfigures=isfigures,
+        savefigpath=figpath,
+        gbxs2plt=gbxs2plt,
+        savelabel=figlabel,
+    )
@@ -8,7 +8,7 @@ Created Date: Monday 23rd June 2025
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Tuesday 1st July 2025
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -24,14 +24,20 @@ export CLEO_PYTHON_BINDINGS=$HOME/superdrops-in-action/build/_deps/cleo-build/cl
 
 import os
 import sys
+from contextlib import nullcontext
 
 from .cleo_sdm import CleoSDM
+from .shadow_buffers import DimensionlessBuffers
 from ..thermo.thermodynamics import Thermodynamics
 
 sys.path.append(os.environ["CLEO_PYTHON_BINDINGS"])
 import cleo_python_bindings as cleo
 
 
+def _phase(profiler, name):
+    return nullcontext() if profiler is None else profiler.phase(name)
+
+
 class MicrophysicsSchemeWrapper:
     """A class wrapping around C++ bindings to CLEO's Superdroplet Model (SDM) microphysics scheme
     (wrapper for compatibility purposes).
@@ -55,6 +61,9 @@ class MicrophysicsSchemeWrapper:
         uvel,
         vvel,
         do_init=True,
+        profiler=None,
+        shadow_buffers=False,
+        staging_dir=None,
     ):
         """Initialize the MicrophysicsSchemeWrapper object.
 
@@ -62,10 +71,35 @@ class MicrophysicsSchemeWrapper:
         qvap, qcond, wvel, uvel, and vvel arrays remain unchanged throughout a simulation.
         Undefined behaviour if values are changed by reassigning arrays rather than by copying
         data into the arrays given during wrapper initialisation.
+
+        If a profiler (PhaseProfiler) is given, the wall time spent initialising CLEO is recorded
+        (see CleoSDM).
+
+        If shadow_buffers is True, CLEO is given persistent dimensionless copies of press, temp
+        and the winds (see DimensionlessBuffers) instead of the arrays themselves, which are
+        then not de-dimensionalised in place every time the microphysics is run.
+
+        If a staging_dir is given, CLEO's observers write to a store staged in it which is
+        flushed to the config's zarrbasedir by finalize (see CleoSDM).
         """
+        # constants to de-dimensionalise thermodynamics
+        self.TEMP0 = 273.15  # Temperature [K]
+        self.P0 = 100000.0  # Pressure [Pa]
+        self.W0 = 1.0  # Velocity [m/s]
+
+        if shadow_buffers:
+            self.shadows = DimensionlessBuffers(
+                press, temp, wvel, uvel, vvel, self.P0, self.TEMP0, self.W0
+            )
+            press, temp = self.shadows.press, self.shadows.temp
+            wvel, uvel, vvel = self.shadows.wvel, self.shadows.uvel, self.shadows.vvel
+        else:
+            self.shadows = None
+
         config = cleo.Config(str(config_filename))
         if do_init:
-            cleo.cleo_initialize(config)
+            with _phase(profiler, "cleo.cleo_initialize"):
+                cleo.cleo_initialize(config)
 
         self.microphys = CleoSDM(
             config,
@@ -79,14 +113,11 @@ class MicrophysicsSchemeWrapper:
             wvel,
             uvel,
             vvel,
+            profiler=profiler,
+            staging_dir=staging_dir,
         )
         self.name = "Wrapper around " + self.microphys.name
 
-        # constants to de-dimensionalise thermodynamics
-        self.TEMP0 = 273.15  # Temperature [K]
-        self.P0 = 100000.0  # Pressure [Pa]
-        self.W0 = 1.0  # Velocity [m/s]
-
     def initialize(self) -> int:
         """Initialise the microphysics scheme.
 
@@ -101,11 +132,12 @@ class MicrophysicsSchemeWrapper:
     def finalize(self) -> int:
         """Finalise the microphysics scheme.
 
-        This method calls the microphysics finalisation.
+        This method calls the microphysics finalisation (see CleoSDM.finalize).
 
         Returns:
             int: 0 upon successful finalisation.
         """
+        self.microphys.finalize()
 
         return 0
 
@@ -125,6 +157,12 @@ class MicrophysicsSchemeWrapper:
             Thermodynamics: Updated thermodynamic properties after microphysics computations.
 
         """
+        if self.shadows is not None:
+            self.shadows.scale_from(thermo)
+            self.microphys.run(timestep)
+            self.shadows.unscale_to(thermo)
+            return thermo
+
         # de-dimensionlise variables
         thermo.press /= self.P0
         thermo.temp /= self.TEMP0
@@ -142,3 +180,210 @@ class MicrophysicsSchemeWrapper:
         thermo.vvel *= self.W0
 
         return thermo
+
+    def run_many(
+        self, timestep: float, nsteps: int, thermo: Thermodynamics, forcing_table
+    ) -> Thermodynamics:
+        """Run the microphysics computations for nsteps timesteps in one call, with prescribed
+        press, temp and/or winds at the start of every timestep (e.g. of a precomputed forcing
+        instead of Python dynamics) and the other variables (e.g. qvap and qcond) evolving only
+        by the microphysics.
+
+        Note CLEO's python bindings have no multi-step entry point, so CLEO is still called
+        every timestep, but thermo is only scaled into and out of CLEO's shadow buffers once.
+        Needs shadow_buffers, which the forcing is copied into (de-dimensionalised).
+
+        Args:
+            timestep (float):
+              Time-step for integration of microphysics (s)
+            nsteps (int):
+              Number of timesteps to run.
+            thermo (Thermodynamics):
+              Thermodynamic properties.
+            forcing_table (dict):
+              Dimensional values (i.e. in the units of thermo) with shape
+              (nsteps, *thermo.[name].shape) for (some of) the names "press", "temp", "wvel",
+              "uvel" and "vvel", e.g. forcing_table["press"][n] is the pressure at the start
+              of timestep n.
+
+        Returns:
+            Thermodynamics: Updated thermodynamic properties after microphysics computations,
+            with the values of the last timestep of the forcing of variables CLEO does not change.
+        """
+        assert self.shadows is not None, "run_many needs shadow_buffers"
+        forcing = self.shadows.check_forcing(forcing_table, nsteps)
+
+        self.shadows.scale_from(thermo)
+        for n in range(nsteps):
+            self.shadows.force(forcing, n)
+            self.microphys.run(timestep)
+        self.shadows.unscale_to(thermo, forcing)
+
+        return thermo
+
+
+class EnsembleMicrophysicsSchemeWrapper:
+    """A class wrapping around an ensemble of CLEO's Superdroplet Model (SDM) microphysics
+    schemes, one per ensemble member, for compatibility with batched KiD ensembles.
+
+    Each member has its own CLEO config (e.g. different superdroplet initial conditions and
+    output zarr store) and is coupled to row m of thermodynamic arrays with shape (nmembers, ...).
+    """
+
+    def __init__(
+        self,
+        config_filenames,
+        is_motion,
+        t_start,
+        timestep,
+        press,
+        temp,
+        qvap,
+        qcond,
+        wvel,
+        uvel,
+        vvel,
+        do_init=True,
+        profiler=None,
+        shadow_buffers=False,
+        staging_dir=None,
+    ):
+        """Initialize the EnsembleMicrophysicsSchemeWrapper object.
+
+        Thermodynamic arrays have a leading ensemble axis, i.e. shape (nmembers, ...), where
+        nmembers is the number of config files. CLEO is initialised once using the first config.
+
+        This Wrapper only works correctly if addresses of press, temp,
+        qvap, qcond, wvel, uvel, and vvel arrays remain unchanged throughout a simulation.
+        Undefined behaviour if values are changed by reassigning arrays rather than by copying
+        data into the arrays given during wrapper initialisation.
+
+        If a profiler (PhaseProfiler) is given, the wall time spent initialising CLEO is recorded
+        (see CleoSDM).
+
+        If shadow_buffers is True, CLEO is given persistent dimensionless copies of press, temp
+        and the winds of all the members (see DimensionlessBuffers).
+
+        If a staging_dir is given, CLEO's observers write to stores staged in it which are
+        flushed to the config's zarrbasedir of each member by finalize (see CleoSDM).
+        """
+        # constants to de-dimensionalise thermodynamics
+        self.TEMP0 = 273.15  # Temperature [K]
+        self.P0 = 100000.0  # Pressure [Pa]
+        self.W0 = 1.0  # Velocity [m/s]
+
+        configs = [cleo.Config(str(filename)) for filename in config_filenames]
+        for var in [press, temp, qvap, qcond, wvel, uvel, vvel]:
+            assert var.shape[0] == len(configs), "need one config per ensemble member"
+            assert var.flags["C_CONTIGUOUS"], "members must be contiguous in memory"
+        if shadow_buffers:
+            self.shadows = DimensionlessBuffers(
+                press, temp, wvel, uvel, vvel, self.P0, self.TEMP0, self.W0
+            )
+            press, temp = self.shadows.press, self.shadows.temp
+            wvel, uvel, vvel = self.shadows.wvel, self.shadows.uvel, self.shadows.vvel
+        else:
+            self.shadows = None
+        if do_init:
+            with _phase(profiler, "cleo.cleo_initialize"):
+                cleo.cleo_initialize(configs[0])
+
+        self.microphys = [
+            CleoSDM(
+                config,
+                is_motion,
+                t_start,
+                timestep,
+                press[m],
+                temp[m],
+                qvap[m],
+                qcond[m],
+                wvel[m],
+                uvel[m],
+                vvel[m],
+                profiler=profiler,
+                staging_dir=staging_dir,
+            )
+            for m, config in enumerate(configs)
+        ]
+        self.name = (
+            f"Wrapper around ensemble of {len(configs)} {self.microphys[0].name}"
+        )
+
+    def initialize(self) -> int:
+        """Initialise the microphysics scheme.
+
+        Returns:
+            int: 0 upon successful initialisation
+        """
+        return 0
+
+    def finalize(self) -> int:
+        """Finalise the microphysics scheme of every member (see CleoSDM.finalize).
+
+        Returns:
+            int: 0 upon successful finalisation.
+        """
+        for microphys in self.microphys:
+            microphys.finalize()
+        return 0
+
+    def run(self, timestep: float, thermo: Thermodynamics) -> Thermodynamics:
+        """Run the microphysics computations for every ensemble member.
+
+        Args:
+            timestep (float):
+              Time-step for integration of microphysics (s)
+            thermo (Thermodynamics):
+              Thermodynamic properties with leading ensemble axis.
+
+        Returns:
+            Thermodynamics: Updated thermodynamic properties after microphysics computations.
+        """
+        if self.shadows is not None:
+            self.shadows.scale_from(thermo)  # (of all members at once)
+            for microphys in self.microphys:
+                microphys.run(timestep)
+            self.shadows.unscale_to(thermo)
+            return thermo
+
+        # de-dimensionlise variables (of all members at once)
+        thermo.press /= self.P0
+        thermo.temp /= self.TEMP0
+        thermo.wvel /= self.W0
+        thermo.uvel /= self.W0
+        thermo.vvel /= self.W0
+
+        for microphys in self.microphys:
+            microphys.run(timestep)
+
+        # re-dimensionlise variables (of all members at once)
+        thermo.press *= self.P0
+        thermo.temp *= self.TEMP0
+        thermo.wvel *= self.W0
+        thermo.uvel *= self.W0
+        thermo.vvel *= self.W0
+
+        return thermo
+
+    def run_many(
+        self, timestep: float, nsteps: int, thermo: Thermodynamics, forcing_table
+    ) -> Thermodynamics:
+        """Run the microphysics computations of every ensemble member for nsteps timesteps in
+        one call with prescribed press, temp and/or winds (see MicrophysicsSchemeWrapper.run_many),
+        e.g. forcing_table["press"][n, m] is the pressure of member m at the start of timestep n.
+
+        Returns:
+            Thermodynamics: Updated thermodynamic properties after microphysics computations.
+        """
+        assert self.shadows is not None, "run_many needs shadow_buffers"
+        forcing = self.shadows.check_forcing(forcing_table, nsteps)
+
+        self.shadows.scale_from(thermo)  # (of all members at once)
+        for n in range(nsteps):
+            self.shadows.force(forcing, n)
+            for microphys in self.microphys:
+                microphys.run(timestep)
+        self.shadows.unscale_to(thermo, forcing)
+
+        return thermo
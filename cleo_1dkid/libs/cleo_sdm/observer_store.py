@@ -0,0 +1,108 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: observer_store.py
+Project: cleo_sdm
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+staging of the zarr store of CLEO SDM's observers in a (e.g. memory-backed) directory during a
+run and flushing it to its zarrbasedir in large consolidated chunks at the end of the run.
+
+CLEO's python bindings only provide a store of files on disk (cleo.FSStore), which writes many
+small chunk files every observation step. If the store is instead staged in a directory on a
+memory-backed filesystem (e.g. /dev/shm) or node-local disk, none of these small writes reach
+e.g. a parallel filesystem. At the end of the run, flush_store copies the staged store to its
+zarrbasedir with at most maxchunk elements per chunk, adds consolidated metadata (so that
+datasets can be opened without listing every array) and removes the staged store. Nothing is
+overwritten: zarrbasedir must not be (in) the staging directory nor already contain files.
+"""
+
+import hashlib
+import shutil
+from pathlib import Path
+
+
+def staged_store_path(staging_dir, zarrbasedir):
+    """returns path of the store staged in staging_dir for the store at zarrbasedir, unique for
+    each zarrbasedir (e.g. for each member of an ensemble)"""
+    zarrbasedir = Path(zarrbasedir).resolve()
+    key = hashlib.sha1(str(zarrbasedir).encode()).hexdigest()[:12]
+    return Path(staging_dir) / f"{key}_{zarrbasedir.name}"
+
+
+def check_flush_destination(staged, zarrbasedir):
+    """raises ValueError if zarrbasedir is (in) the staged store or vice versa, or
+    FileExistsError if zarrbasedir is not an empty directory, i.e. if flushing the staged store
+    to zarrbasedir could overwrite anything (e.g. the output of a previous run)"""
+    staged, zarrbasedir = Path(staged).resolve(), Path(zarrbasedir).resolve()
+    if (
+        staged == zarrbasedir
+        or staged in zarrbasedir.parents
+        or zarrbasedir in staged.parents
+    ):
+        raise ValueError(
+            f"cannot flush staged store {staged} to itself ({zarrbasedir})"
+        )
+    if zarrbasedir.exists() and (
+        not zarrbasedir.is_dir() or any(zarrbasedir.iterdir())
+    ):
+        raise FileExistsError(f"cannot flush staged store to non-empty {zarrbasedir}")
+
+
+def _flush_chunks(shape, maxchunk):
+    """returns chunks with at most maxchunk elements which are as large as possible along the
+    first (e.g. time) dimension of an array with the given shape"""
+    if len(shape) == 0:
+        return ()
+    inner = 1
+    for n in shape[1:]:
+        inner *= max(n, 1)
+    first = max(min(shape[0], maxchunk // inner), 1)
+    return (first, *shape[1:])
+
+
+def flush_store(staged, zarrbasedir, maxchunk=2500000, remove_staged=True):
+    """Copy the zarr store staged at 'staged' to zarrbasedir in large consolidated chunks.
+
+    Args:
+        staged (Path): Staged zarr store (see staged_store_path).
+        zarrbasedir (Path): Destination of zarr store (must not exist or be empty, see
+          check_flush_destination).
+        maxchunk (int, optional): Maximum number of elements in each chunk of an array.
+          Defaults to 2500000 (same as 'maxchunk' of the configs in this project).
+        remove_staged (bool, optional): If True, remove the staged store after flushing it.
+          Defaults to True.
+    """
+    import zarr
+
+    check_flush_destination(staged, zarrbasedir)
+    source = zarr.open_group(str(staged), mode="r")
+    dest = zarr.open_group(str(zarrbasedir), mode="w-")
+    dest.attrs.update(source.attrs.asdict())
+
+    for name, array in source.arrays():
+        chunks = _flush_chunks(array.shape, maxchunk)
+        copy = dest.create_dataset(
+            name,
+            shape=array.shape,
+            chunks=chunks,
+            dtype=array.dtype,
+            fill_value=array.fill_value,
+        )
+        copy.attrs.update(array.attrs.asdict())
+        if array.ndim == 0:
+            copy[...] = array[...]
+        else:  # (one chunk of the copy at a time so that the array is never loaded whole)
+            for start in range(0, array.shape[0], chunks[0]):
+                copy[start : start + chunks[0]] = array[start : start + chunks[0]]
+    zarr.consolidate_metadata(str(zarrbasedir))
+
+    if remove_staged:
+        shutil.rmtree(staged)
@@ -0,0 +1,86 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: shadow_buffers.py
+Project: cleo_sdm
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+persistent dimensionless copies ("shadows") of the thermodynamics given to CLEO SDM by the
+microphysics scheme wrappers (see microphysics_scheme_wrapper.py), including the prescribed
+(dimensional) forcing of them for several coupling steps in one call (see run_many of the
+wrappers). Kept apart from the wrappers so that it does not need CLEO's python bindings.
+"""
+
+import numpy as np
+
+
+class DimensionlessBuffers:
+    """Persistent dimensionless copies ("shadows") of the pressure, temperature and winds of
+    thermodynamics to give to CLEO instead of de-dimensionalising the thermodynamics in place.
+
+    Each coupling step, the shadows are filled by one scaled copy of each variable before CLEO
+    runs and only temperature (the only one of these variables CLEO changes) is copied back
+    afterwards. The thermodynamics are then never rescaled in place, so e.g. pressure and winds
+    are not rounded by dividing and multiplying them every step.
+    """
+
+    NAMES = ["press", "temp", "wvel", "uvel", "vvel"]
+
+    def __init__(self, press, temp, wvel, uvel, vvel, P0, TEMP0, W0):
+        self.P0 = P0
+        self.TEMP0 = TEMP0
+        self.W0 = W0
+        self.press = np.divide(press, P0)
+        self.temp = np.divide(temp, TEMP0)
+        self.wvel = np.divide(wvel, W0)
+        self.uvel = np.divide(uvel, W0)
+        self.vvel = np.divide(vvel, W0)
+
+    def scale(self, name):
+        """returns constant which de-dimensionalises the variable called name"""
+        return {"press": self.P0, "temp": self.TEMP0}.get(name, self.W0)
+
+    def scale_from(self, thermo):
+        """copy dimensionless values of thermo into the shadows (before CLEO runs)"""
+        np.divide(thermo.press, self.P0, out=self.press)
+        np.divide(thermo.temp, self.TEMP0, out=self.temp)
+        np.divide(thermo.wvel, self.W0, out=self.wvel)
+        np.divide(thermo.uvel, self.W0, out=self.uvel)
+        np.divide(thermo.vvel, self.W0, out=self.vvel)
+
+    def unscale_to(self, thermo, forcing=()):
+        """copy dimensional values of variables CLEO changes into thermo (after CLEO runs), and
+        of the last coupling step of any other variables in forcing (see check_forcing)"""
+        np.multiply(self.temp, self.TEMP0, out=thermo.temp)
+        for name, table in forcing:
+            if name != "temp":
+                getattr(thermo, name)[...] = table[-1]
+
+    def check_forcing(self, forcing_table, nsteps):
+        """returns list of (name, table) of forcing_table after checking every table has one
+        (dimensional) value of a shadowed variable for each of nsteps coupling steps"""
+        forcing = []
+        for name, table in forcing_table.items():
+            if name not in self.NAMES:
+                raise ValueError(
+                    f"cannot force {name}, only {self.NAMES} are given to CLEO by thermo"
+                )
+            table = np.asarray(table)
+            shape = (nsteps, *getattr(self, name).shape)
+            if table.shape != shape:
+                raise ValueError(f"{name} table has shape {table.shape} not {shape}")
+            forcing.append((name, table))
+        return forcing
+
+    def force(self, forcing, n):
+        """copy dimensionless values of nth coupling step of (name, table) in forcing (see
+        check_forcing) into the shadows (before CLEO runs)"""
+        for name, table in forcing:
+            np.divide(table[n], self.scale(name), out=getattr(self, name))
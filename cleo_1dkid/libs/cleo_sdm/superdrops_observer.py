@@ -0,0 +1,210 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: superdrops_observer.py
+Project: cleo_sdm
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+settings for, and decimation of, the superdroplets observed by CLEO SDM. Settings are given in
+the python_bindings section of a CLEO config, e.g.
+
+python_bindings:
+  superdrops_observer:
+    interval : 8            # only keep superdroplets of every interval'th observation
+    fraction : 0.1          # only keep a reproducible random fraction of superdroplets
+    seed : 0                # seed of random fraction (same superdroplets kept at every time)
+    gbxindices : [0, 64]    # only keep superdroplets in these gridboxes (null for all)
+
+CLEO's superdrops observer (made by its python bindings) writes every superdroplet at every
+observation time and cannot be configured from Python, so the settings are applied to its
+zarr store once the run is finished (see decimate_superdrops_store). The number of
+superdroplets in each gridbox (nsupers) is then rewritten to count only the superdroplets which
+are kept, whereas the other bulk gridbox observers (e.g. massmoms) keep their full cadence.
+"""
+
+import numpy as np
+
+# ragged (one value per superdroplet per observation) variables of CLEO's superdrops observer
+SUPERDROPS_VARIABLES = [
+    "sdId",
+    "sdgbxindex",
+    "coord3",
+    "coord1",
+    "coord2",
+    "msol",
+    "radius",
+    "xi",
+]
+
+
+def superdrops_observer_settings(python_config):
+    """returns settings of the superdrops observer in the python_bindings section of a CLEO
+    config (loaded as a dictionary), or None if the superdroplets are not to be decimated"""
+    settings = python_config.get("python_bindings", {}).get("superdrops_observer")
+    if settings is None:
+        return None
+    settings = {
+        "interval": int(settings.get("interval", 1)),
+        "fraction": float(settings.get("fraction", 1.0)),
+        "seed": int(settings.get("seed", 0)),
+        "gbxindices": settings.get("gbxindices", None),
+    }
+    assert settings["interval"] > 0, "interval must be a positive integer"
+    assert 0.0 <= settings["fraction"] <= 1.0, "fraction must be in [0, 1]"
+    is_decimated = (
+        settings["interval"] > 1
+        or settings["fraction"] < 1.0
+        or settings["gbxindices"] is not None
+    )
+    return settings if is_decimated else None
+
+
+def _uniform_hash(sdId, seed):
+    """returns number in [0, 1) for each sdId which is uniformly distributed over sdIds and
+    only depends on sdId and seed (splitmix64 finaliser)"""
+    with np.errstate(over="ignore"):
+        x = np.asarray(sdId, dtype=np.uint64) + np.uint64(seed) * np.uint64(
+            0x9E3779B97F4A7C15
+        )
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / 2.0**53
+
+
+def select_superdrops(sdId, sdgbxindex, settings):
+    """returns boolean mask of the superdroplets to keep (at an observation which is kept).
+
+    Superdroplets are kept if their gridbox is one of settings["gbxindices"] (if not None) and
+    they are in the random fraction of superdroplets given by settings["fraction"] and
+    settings["seed"]. The random fraction is chosen by sdId, so the same superdroplets are kept
+    at every observation time (e.g. so that their trajectories can be followed).
+    """
+    keep = np.ones(np.shape(sdId), dtype=bool)
+    if settings["fraction"] < 1.0:
+        keep &= _uniform_hash(sdId, settings["seed"]) < settings["fraction"]
+    if settings["gbxindices"] is not None:
+        keep &= np.isin(sdgbxindex, settings["gbxindices"])
+    return keep
+
+
+def decimate_superdrops(raggedcount, superdrops, settings, time0=0):
+    """returns raggedcount and (ragged) superdroplet variables of only the superdroplets to keep.
+
+    Superdroplets are only kept at every settings["interval"]'th observation time (raggedcount is
+    then zero at the other times so that the time dimension of the dataset is unchanged) and of
+    those, only the superdroplets selected by select_superdrops.
+
+    Args:
+        raggedcount (np.ndarray): Number of superdroplets observed at each observation time.
+        superdrops (dict): Ragged variables of superdroplets (must include sdId and sdgbxindex)
+          with one value per superdroplet at each observation time.
+        settings (dict): Settings of superdrops observer (see superdrops_observer_settings).
+        time0 (int, optional): Index of the first observation time of raggedcount, e.g. if it
+          is a chunk of the observations. Defaults to 0.
+
+    Returns:
+        tuple: raggedcount and dictionary of ragged variables after decimation.
+    """
+    raggedcount = np.asarray(raggedcount)
+    times = np.repeat(np.arange(len(raggedcount)), raggedcount)
+    keep = (time0 + times) % settings["interval"] == 0
+    keep &= select_superdrops(superdrops["sdId"], superdrops["sdgbxindex"], settings)
+
+    new_raggedcount = np.bincount(times[keep], minlength=len(raggedcount))
+    new_raggedcount = new_raggedcount.astype(raggedcount.dtype)
+    new_superdrops = {key: np.asarray(var)[keep] for key, var in superdrops.items()}
+    return new_raggedcount, new_superdrops
+
+
+def _observation_chunks(raggedcount, maxsupers):
+    """yields (start, stop) indexes of consecutive observation times with at most maxsupers
+    superdroplets in total (or of a single observation time which alone has more)"""
+    start, nsupers = 0, 0
+    for t, count in enumerate(raggedcount):
+        if t > start and nsupers + count > maxsupers:
+            yield start, t
+            start, nsupers = t, 0
+        nsupers += int(count)
+    if start < len(raggedcount):
+        yield start, len(raggedcount)
+
+
+def decimate_superdrops_store(zarrbasedir, settings, maxsupers=2500000):
+    """decimate the superdroplets in the zarr store of a (finished) CLEO run in place (see
+    decimate_superdrops), keeping the attributes and chunking of each of its arrays (and
+    re-consolidating its metadata).
+
+    The ragged variables are read and decimated in chunks of consecutive observation times
+    with at most maxsupers superdroplets, e.g. so that the memory needed does not grow with the
+    length of the run. nsupers (if in the store) is rewritten to be the number of superdroplets
+    kept in each gridbox at each observation time, so that it stays consistent with raggedcount.
+    """
+    import zarr
+
+    group = zarr.open_group(str(zarrbasedir), mode="r+")
+    names = [name for name in SUPERDROPS_VARIABLES if name in group]
+    if "sdId" not in names or "sdgbxindex" not in names:
+        raise ValueError(
+            f"cannot decimate superdroplets of {zarrbasedir} without sdId and sdgbxindex"
+        )
+    raggedcount = group["raggedcount"][:]
+    offsets = np.concatenate(([0], np.cumsum(raggedcount, dtype=np.int64)))
+    if "nsupers" in group:
+        nsupers = np.zeros(group["nsupers"].shape, dtype=group["nsupers"].dtype)
+        if nsupers.shape[0] != len(raggedcount):
+            raise ValueError(
+                f"cannot rewrite nsupers of {zarrbasedir} which is not observed at the same "
+                "times as the superdroplets"
+            )
+
+    decimated = {}  # (decimated copies of ragged variables until they replace the originals)
+    for name in names:
+        decimated[name] = group.create_dataset(
+            f"{name}_decimated",
+            shape=(0,),
+            chunks=group[name].chunks,
+            dtype=group[name].dtype,
+            fill_value=group[name].fill_value,
+        )
+        decimated[name].attrs.update(group[name].attrs.asdict())
+
+    new_raggedcount = np.zeros_like(raggedcount)
+    for start, stop in _observation_chunks(raggedcount, maxsupers):
+        if not np.any(np.arange(start, stop) % settings["interval"] == 0):
+            continue  # (no superdroplets are kept at these times)
+        superdrops = {
+            name: group[name][offsets[start] : offsets[stop]] for name in names
+        }
+        counts, superdrops = decimate_superdrops(
+            raggedcount[start:stop], superdrops, settings, time0=start
+        )
+        new_raggedcount[start:stop] = counts
+        for name, values in superdrops.items():
+            decimated[name].append(values)
+        if "nsupers" in group:
+            times = np.repeat(np.arange(stop - start), counts)
+            gbxindex = superdrops["sdgbxindex"]
+            indomain = gbxindex < nsupers.shape[1]
+            np.add.at(
+                nsupers[start:stop],
+                (times[indomain], gbxindex[indomain].astype(int)),
+                1,
+            )
+
+    for name in names:
+        del group[name]
+        group.move(f"{name}_decimated", name)
+    group["raggedcount"][:] = new_raggedcount
+    group["raggedcount"].attrs["superdrops_observer"] = settings
+    if "nsupers" in group:
+        group["nsupers"][:] = nsupers
+        group["nsupers"].attrs["superdrops_observer"] = settings
+    zarr.consolidate_metadata(str(zarrbasedir))
@@ -8,7 +8,7 @@ Created Date: Monday 2nd September 2024
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Wednesday 4th September 2024
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -36,6 +36,10 @@ def bulk_scheme_condensation(temp, press, qvap, qcond):
     See https://github.com/open-atmos/PyMPDATA/tree/main/examples/PyMPDATA_examples/Shipway_and_Hill_2012)
     for the original source code.
 
+    qvap and qcond are updated in place (if they are arrays) and returned. The adjustment is
+    computed in double precision, also for variables stored in single precision (the updates of
+    qvap and qcond are then rounded as they are stored).
+
     Parameters:
     temp (float): Temperature in Kelvin.
     press (float): Pressure in Pascals.
@@ -45,10 +49,13 @@ def bulk_scheme_condensation(temp, press, qvap, qcond):
     Returns:
     tuple: Adjusted specific humidities of water vapor and condensed water (qvap, qcond).
     """
+    temp, press = np.asarray(temp, np.float64), np.asarray(press, np.float64)
+    qvap64 = np.asarray(qvap, np.float64)  # (same as qvap if already double precision)
+
     pvs = kid.formulae.pvs_Celsius(temp - kid.const.T0)
-    relh = kid.formulae.pv(press, qvap) / pvs
+    relh = kid.formulae.pv(press, qvap64) / pvs
 
-    dqcond = np.maximum(0, qvap * (1 - 1 / relh))
+    dqcond = np.maximum(0, qvap64 * (1 - 1 / relh))
 
     qvap -= dqcond
     qcond += dqcond
@@ -57,10 +64,17 @@ def bulk_scheme_condensation(temp, press, qvap, qcond):
 
 
 class MicrophysicsSchemeWrapper:
-    def __init__(self):
-        """Initialize the WrappedKiDBulkMicrophysics object."""
+    def __init__(self, in_place=False):
+        """Initialize the WrappedKiDBulkMicrophysics object.
+
+        Args:
+            in_place (bool, optional): If True, run updates qvap and qcond of the given
+              thermodynamics in place (and returns it) without copying it, otherwise run
+              returns an updated copy of the thermodynamics. Defaults to False.
+        """
         self.microphys = "pyMPDATA KiD Bulk Microphysics Scheme for Condensation"
         self.name = "Wrapper around " + self.microphys
+        self.in_place = in_place
 
     def initialize(self) -> int:
         """Initialise the microphysics scheme.
@@ -96,15 +110,12 @@ class MicrophysicsSchemeWrapper:
             Thermodynamics: Updated thermodynamic properties after microphysics computations.
         """
 
-        cp_thermo = deepcopy(thermo)
-        temp = cp_thermo.temp
-        press = cp_thermo.press
-        qvap = cp_thermo.massmix_ratios["qvap"]
-        qcond = cp_thermo.massmix_ratios["qcond"]
-
-        qvap, qcond = bulk_scheme_condensation(temp, press, qvap, qcond)
-
-        cp_thermo.massmix_ratios["qvap"][:] = qvap
-        cp_thermo.massmix_ratios["qcond"][:] = qcond
+        if not self.in_place:
+            thermo = deepcopy(thermo)
+        temp = thermo.temp
+        press = thermo.press
+        qvap = thermo.massmix_ratios["qvap"]
+        qcond = thermo.massmix_ratios["qcond"]
+        bulk_scheme_condensation(temp, press, qvap, qcond)
 
-        return cp_thermo
+        return thermo
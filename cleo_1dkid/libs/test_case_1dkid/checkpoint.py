@@ -0,0 +1,113 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: checkpoint.py
+Project: test_case_1dkid
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+functions for saving and restoring checkpoints of the 1-D KiD rainshaft model so that a run
+can be stopped and later resumed from the time of its last checkpoint
+"""
+
+import os
+from pathlib import Path
+import numpy as np
+
+# objects whose state is saved in a checkpoint (if they have a get_state method)
+_COMPONENTS = ["kid_dynamics", "thermo", "out", "microphys"]
+
+
+def save_checkpoint(
+    checkpoint_filename, time, kid_dynamics, thermo, out, microphys_scheme
+):
+    """Save the state of a 1-D KiD model run at a given time to a .npz file.
+
+    The state consists of the time, the MPDATA advectees of the KiD dynamics, the thermodynamics,
+    the state of the output and, if it has a `get_state` method, the state of the microphysics
+    scheme. Output streamed to disk is not copied into the checkpoint, only the position of its
+    next write and its buffer (see OutputVariable.get_state), so that the size of the checkpoint
+    does not grow with the length of the run; output stored in memory is copied. The file is
+    written to a temporary file first and then moved so that a run interrupted during
+    checkpointing does not corrupt the previous checkpoint.
+
+    Args:
+        checkpoint_filename (Path): Name of the .npz file to save checkpoint in.
+        time (float): Time of the checkpoint (s).
+        kid_dynamics (KiDDynamics): KiD dynamics of the run.
+        thermo (Thermodynamics): Thermodynamic state at time.
+        out (OutputThermodynamics): Output of the run.
+        microphys_scheme: Microphysics scheme of the run.
+
+    Returns:
+        None
+    """
+    checkpoint_filename = Path(checkpoint_filename)
+    assert checkpoint_filename.suffix == ".npz", "checkpoint must be a .npz file"
+
+    state = {"time": np.asarray(time)}
+    for name, component in zip(
+        _COMPONENTS, [kid_dynamics, thermo, out, microphys_scheme]
+    ):
+        if hasattr(component, "get_state"):
+            for key, value in component.get_state().items():
+                state[f"{name}/{key}"] = np.asarray(value)
+
+    tmp_filename = checkpoint_filename.with_suffix(".tmp.npz")
+    np.savez(tmp_filename, **state)
+    os.replace(tmp_filename, checkpoint_filename)
+    print(f"checkpoint at time={time}s saved in: {checkpoint_filename}")
+
+
+def load_checkpoint(checkpoint_filename):
+    """Load a checkpoint of a 1-D KiD model run from a .npz file.
+
+    Args:
+        checkpoint_filename (Path): Name of the .npz file checkpoint is saved in.
+
+    Returns:
+        tuple: (time, dict) The time of the checkpoint and a dictionary of the state of each
+               component of the run, e.g. state["thermo"]["temp"].
+    """
+    state = {name: {} for name in _COMPONENTS}
+    with np.load(checkpoint_filename) as data:
+        time = float(data["time"])
+        for key in data.files:
+            if key != "time":
+                name, var = key.split("/", 1)
+                state[name][var] = data[key]
+    return time, state
+
+
+def restore_checkpoint(
+    checkpoint_filename, kid_dynamics, thermo, out, microphys_scheme
+):
+    """Restore the state of a 1-D KiD model run from a checkpoint.
+
+    Values are copied into the existing arrays of thermo so that their addresses are unchanged
+    (as required by e.g. CleoSDM).
+
+    Args:
+        checkpoint_filename (Path): Name of the .npz file checkpoint is saved in.
+        kid_dynamics (KiDDynamics): KiD dynamics of the run.
+        thermo (Thermodynamics): Thermodynamic state to restore.
+        out (OutputThermodynamics): Output of the run to restore.
+        microphys_scheme: Microphysics scheme of the run.
+
+    Returns:
+        float: Time of the checkpoint (s).
+    """
+    time, state = load_checkpoint(checkpoint_filename)
+    for name, component in zip(
+        _COMPONENTS, [kid_dynamics, thermo, out, microphys_scheme]
+    ):
+        if hasattr(component, "set_state"):
+            component.set_state(state[name])
+    print(f"restored checkpoint at time={time}s from: {checkpoint_filename}")
+    return time
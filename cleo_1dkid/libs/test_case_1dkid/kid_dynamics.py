@@ -8,7 +8,7 @@ Created Date: Monday 2nd September 2024
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Wednesday 4th June 2025
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -20,10 +20,11 @@ class for driving KiD rainshaft test case
 
 import numpy as np
 from PyMPDATA import Options
-from PyMPDATA_examples.Shipway_and_Hill_2012 import si
+from PyMPDATA_examples.Shipway_and_Hill_2012 import formulae, si
 
 from .mpdata import MPDATA
 from .settings import Settings
+from libs.thermo.thermodynamics import PackedThermodynamics
 
 
 class KiDDynamics:
@@ -37,7 +38,18 @@ class KiDDynamics:
     """
 
     def __init__(
-        self, z_min, z_max, z_delta, timestep, t_end, advect_hydrometeors=True
+        self,
+        z_min,
+        z_max,
+        z_delta,
+        timestep,
+        t_end,
+        advect_hydrometeors=True,
+        nmembers=None,
+        rhod_w_table=None,
+        lazy_hydrometeors=True,
+        max_courant=None,
+        cache_dir=None,
     ):
         """Initialize the KiDDynamics object.
 
@@ -47,6 +59,25 @@ class KiDDynamics:
             z_delta (float): Vertical grid spacing [m].
             timestep (float): Size of time steps of simulation [s].
             t_end (float): End time of the simulation [s].
+            advect_hydrometeors (bool, optional): If False, only qvap is advected.
+            nmembers (int, optional): Number of ensemble members to advance together, in which
+              case thermodynamic variables have shape (nmembers, nz). Defaults to None
+              (no ensemble axis).
+            rhod_w_table (np.ndarray, optional): Prescribed momentum flux (density * vertical
+              velocity) [kg m^-2 s^-1] at the middle of each timestep, i.e. at times
+              (n + 1/2) * timestep for n = 0, 1, ..., t_end / timestep - 1, e.g. read from file.
+              Defaults to None (the sinusoid of Shipway and Hill (2012) given by settings).
+            lazy_hydrometeors (bool, optional): If True, hydrometeors (which start as zero) are
+              not advected nor copied to and from thermo until a non-zero value is first set
+              by set_advectees or set_state, e.g. qice, qsnow and qgrau stay zero for the whole
+              of a warm-rain run. Defaults to True.
+            max_courant (float, optional): If given, the advection of each timestep is split
+              into as many equal substeps as needed for the Courant number of the vertical wind
+              to be at most max_courant, e.g. so that the timestep (of the coupling with the
+              microphysics) can be larger than is stable for the advection. Defaults to None
+              (one step of advection per timestep).
+            cache_dir (str, optional): Directory to cache the solved dry-air density profile of
+              the settings in (see Settings). Defaults to None (not cached).
         """
         options = Options(n_iters=3, nonoscillatory=True)
 
@@ -67,6 +98,7 @@ class KiDDynamics:
             is_exner_novapour=is_exner_novapour,
             is_exner_novapour_uniformrho=is_exner_novapour_uniformrho,
             is_approx_drhod_dz=False,
+            cache_dir=cache_dir,
         )
 
         self.mpdata = MPDATA(
@@ -79,9 +111,14 @@ class KiDDynamics:
                 zZ * self.settings.dz + self.settings.z_min
             ),
             options=options,
+            nmembers=1 if nmembers is None else nmembers,
+            advected_fields=None if advect_hydrometeors else ("qvap",),
+            active_fields=("qvap",) if lazy_hydrometeors else None,
         )
 
         self.advect_hydrometeors = advect_hydrometeors
+        self.nmembers = nmembers
+        self._bound_massmix_ratios = {}  # views onto advectees, see bind_thermo
 
         assert self.settings.nz == int((z_max - z_min) / z_delta)
         assert self.settings.z_min == z_min
@@ -91,41 +128,138 @@ class KiDDynamics:
         self.zhalf = np.arange(z_min, z_max + z_delta, z_delta)
         assert np.all((self.zhalf[1:] + self.zhalf[:-1]) / 2 == self.zfull)
 
-        key = f"nr={self.mpdata.nr}, dz={self.settings.dz}, dt={self.settings.dt}, options={options}"
+        # prescribed forcing tabulated once for every timestep (instead of evaluated each step)
+        tmid = (np.arange(self.settings.nt) + 0.5) * self.settings.dt
+        if rhod_w_table is None:
+            rhod_w_table = np.asarray([self.settings.rhod_w(t) for t in tmid])
+        assert np.shape(rhod_w_table) == tmid.shape, "need rhod_w for every timestep"
+        self.rhod_w_table = np.asarray(rhod_w_table, dtype=float)
+        self.GC_table = self.rhod_w_table * self.settings.dt / self.settings.dz
+
+        # substeps of advection per timestep (wind, and so Courant number, is largest where
+        # the density is smallest)
+        self.max_courant = max_courant
+        courant_table = np.abs(self.GC_table) / np.min(self.settings.rhod(self.zhalf))
+        if max_courant is None:
+            self.nsubsteps_table = np.ones(self.GC_table.shape, dtype=int)
+        else:
+            assert max_courant > 0, "maximum Courant number must be positive"
+            nsubsteps = np.ceil(courant_table / max_courant)
+            self.nsubsteps_table = np.maximum(nsubsteps, 1).astype(int)
+
+        # time-invariant profiles evaluated once (settings' functions interpolate every call)
+        self.rhod_zfull = self.settings.rhod(self.zfull)
+        self.temp_zfull = self.settings.temp(self.zfull)
+        z_half_reps = np.repeat(self.zhalf, 2)[1:-1]
+        self.rhod_zhalf_reps = self.settings.rhod(z_half_reps)
+
+        key = f"nr={self.mpdata.nr}, nmembers={self.mpdata.nmembers}, dz={self.settings.dz}, dt={self.settings.dt}, options={options}"
         print(f"Simulating {self.settings.nt} timesteps using {key}")
 
+    def _members(self, var):
+        """returns view of variable with shape (nmembers, ...) (nmembers=1 if no ensemble axis)"""
+        assert np.ndim(var) == (1 if self.nmembers is None else 2), "bad ensemble axis"
+        return var.reshape(self.mpdata.nmembers, -1)
+
+    def _step(self, time):
+        """returns index of timestep starting at time in tables of prescribed forcing"""
+        n = round(time / self.settings.dt)
+        assert 0 <= n < len(self.rhod_w_table), "time outside of prescribed forcing"
+        return n
+
+    def _is_bound(self, thermo, field):
+        """returns True if mass mixing ratio of thermo for field is a view onto its advectee"""
+        return thermo.massmix_ratios[field] is self._bound_massmix_ratios.get(field)
+
+    def _activate_nonzero(self, field, value):
+        """activates field in the dynamics solver if value is non-zero anywhere and returns
+        True if the field is active"""
+        if field not in self.mpdata.active_fields and np.any(value):
+            self.mpdata.activate(field)
+        return field in self.mpdata.active_fields
+
+    def bind_thermo(self, thermo):
+        """Make the mass mixing ratios of thermo views onto the advectees of the dynamics solver.
+
+        After binding, the mass mixing ratios are not copied to and from the advectees by
+        set_thermo and set_advectees, instead thermo and the solver share the same memory.
+        The arrays of the mass mixing ratios are replaced, so this method must be called before
+        their addresses are given to anything else (e.g. to initialise CleoSDM), after which
+        their addresses do not change.
+
+        Args:
+            thermo (Thermodynamics): Object representing the thermodynamic state.
+
+        Returns:
+            Thermodynamics: Thermodynamic state with mass mixing ratios bound to advectees.
+        """
+        assert self.nmembers is None, "cannot bind thermo with an ensemble axis"
+        assert not isinstance(
+            thermo, PackedThermodynamics
+        ), "cannot bind packed thermo, its mass mixing ratios are views onto its buffer"
+        assert thermo.dtype == np.float64, "advectees of the dynamics are np.float64"
+        for field in self.mpdata.fields:
+            (advectee,) = self.mpdata[field]
+            assert np.shape(thermo.massmix_ratios[field]) == advectee.get().shape
+            thermo.massmix_ratios[field] = advectee.get()
+            self._bound_massmix_ratios[field] = thermo.massmix_ratios[field]
+        return thermo
+
+    def warmup(self):
+        """Compile the numba kernels of the dynamics solver without changing its state, e.g. so
+        that compilation is not part of the first timestep, including the kernels for any
+        lazily activated hydrometeors (see MPDATA.warmup)."""
+        self.mpdata.warmup()
+
+    def reset(self, thermo_init):
+        """Reset the dynamics to their initial conditions at time=0, e.g. to reuse them (and
+        their compiled solvers and solved profiles) for another run. Note the dynamics (e.g. their
+        solvers and any thermo bound to them) are mutable, so they can only be reused by runs one
+        after another, not by runs at the same time.
+
+        Args:
+            thermo_init (Thermodynamics): Object representing the thermodynamic state to
+              initialise from the dynamics.
+
+        Returns:
+            Thermodynamics: Thermodynamic state at time=0.
+        """
+        self.mpdata.reset()
+        for field in self.mpdata.fields:
+            if field not in self.mpdata.active_fields:
+                thermo_init.massmix_ratios[field][:] = 0.0  # (not copied by set_thermo)
+        return self.set_thermo(0.0, thermo_init)
+
     def set_thermo(self, time, thermo):
         """Set thermodynamics from the dynamics solver.
 
+        Fields which are not active (see lazy_hydrometeors) are zero and are not copied, i.e.
+        they must already be zero in thermo (as they are after set_advectees).
+
         Args:
             thermo (Thermodynamics): Object representing the thermodynamic state.
 
         Returns:
             Thermodynamics: Updated thermodynamic state.
         """
-        thermo.massmix_ratios["qvap"][:] = self.mpdata["qvap"].advectee.get()
-        thermo.massmix_ratios["qcond"][:] = self.mpdata["qcond"].advectee.get()
-        thermo.massmix_ratios["qice"][:] = self.mpdata["qice"].advectee.get()
-        thermo.massmix_ratios["qrain"][:] = self.mpdata["qrain"].advectee.get()
-        thermo.massmix_ratios["qsnow"][:] = self.mpdata["qsnow"].advectee.get()
-        thermo.massmix_ratios["qgrau"][:] = self.mpdata["qgrau"].advectee.get()
-        thermo.rhod[:] = self.settings.rhod(self.zfull)
-        thermo.temp[:] = self.settings.temp(self.zfull)
-        thermo.press[:] = self.settings.press(self.zfull, thermo.massmix_ratios["qvap"])
+        for field in self.mpdata.fields:
+            if field not in self.mpdata.active_fields:
+                continue
+            if self._is_bound(thermo, field):
+                continue
+            qmembers = self._members(thermo.massmix_ratios[field])
+            for qmember, advectee in zip(qmembers, self.mpdata[field]):
+                qmember[:] = advectee.get()
+        thermo.rhod[:] = self.rhod_zfull
+        thermo.temp[:] = self.temp_zfull
+        # same as self.settings.press(self.zfull, qvap) (for is_exner_novapour=False)
+        thermo.press[:] = formulae.pressure(
+            self.rhod_zfull, self.temp_zfull, thermo.massmix_ratios["qvap"]
+        )
 
         if thermo.wvel.size != 0:
-            z_half_reps = np.repeat(
-                np.arange(
-                    self.settings.z_min,
-                    self.settings.z_max + self.settings.dz,
-                    self.settings.dz,
-                ),
-                2,
-            )[1:-1]
-            wmagnitude = self.settings.rhod_w(
-                time + self.settings.dt / 2
-            ) / self.settings.rhod(z_half_reps)
-            assert np.ones_like(thermo.wvel).shape == wmagnitude.shape
+            wmagnitude = self.rhod_w_table[self._step(time)] / self.rhod_zhalf_reps
+            assert self._members(thermo.wvel).shape[1:] == wmagnitude.shape
             thermo.wvel[:] = wmagnitude
 
         return thermo
@@ -135,7 +269,7 @@ class KiDDynamics:
         Run the 1-D KiD motion computations.
 
         This method integrates the equations from time to time+timestep
-        for the dynamics of a 1-D KiD rainshaft.
+        for the dynamics of a 1-D KiD rainshaft, in substeps if required by max_courant.
 
         Args:
             time (float): Current time [s].
@@ -148,21 +282,14 @@ class KiDDynamics:
         assert timestep == self.settings.dt, "Timestep must match initialised value."
         assert time % timestep == 0, "Time not a multiple of the timestep."
 
-        GC = (
-            self.settings.rhod_w(time + self.settings.dt / 2)
-            * self.settings.dt
-            / self.settings.dz
-        )  # courant_number * velocity * density (i.e. momentum * dt/dz)
-        advector_0 = np.ones_like(self.settings.nz_vec) * GC
-
-        if self.advect_hydrometeors:
-            for field in self.mpdata.fields:
-                self.mpdata[field].advector.get_component(0)[:] = advector_0
-                self.mpdata[field].advance(1)
-        else:
-            field = "qvap"
-            self.mpdata[field].advector.get_component(0)[:] = advector_0
-            self.mpdata[field].advance(1)
+        # courant_number * velocity * density (i.e. momentum * dt/dz) of each substep
+        step = self._step(time)
+        nsubsteps = self.nsubsteps_table[step]
+        GC = self.GC_table[step] / nsubsteps
+
+        # advected fields (only qvap if not advect_hydrometeors) all share the same advector
+        self.mpdata.advector.get_component(0)[:] = GC
+        self.mpdata.advance(nsubsteps)
 
         thermo = self.set_thermo(time, thermo)
         return thermo
@@ -175,14 +302,41 @@ class KiDDynamics:
         to match the values given by the thermo data structure.
 
         It is neccessary to call this function after changes to thermo if the data in thermo
-        was created from a copy not a reference to the advectees.
+        was created from a copy not a reference to the advectees. Variables bound to the
+        advectees (see bind_thermo) are not copied. Fields which are not active (see
+        lazy_hydrometeors) are activated if they are non-zero, otherwise they are not copied.
 
         Args:
             thermo (Thermodynamics): Object representing the thermodynamic state.
         """
-        self.mpdata["qvap"].advectee.get()[:] = thermo.massmix_ratios["qvap"]
-        self.mpdata["qcond"].advectee.get()[:] = thermo.massmix_ratios["qcond"]
-        self.mpdata["qice"].advectee.get()[:] = thermo.massmix_ratios["qice"]
-        self.mpdata["qrain"].advectee.get()[:] = thermo.massmix_ratios["qrain"]
-        self.mpdata["qsnow"].advectee.get()[:] = thermo.massmix_ratios["qsnow"]
-        self.mpdata["qgrau"].advectee.get()[:] = thermo.massmix_ratios["qgrau"]
+        for field in self.mpdata.fields:
+            if not self._activate_nonzero(field, thermo.massmix_ratios[field]):
+                continue
+            if self._is_bound(thermo, field):
+                continue
+            qmembers = self._members(thermo.massmix_ratios[field])
+            for qmember, advectee in zip(qmembers, self.mpdata[field]):
+                advectee.get()[:] = qmember
+
+    def get_state(self):
+        """Get copies of the values of the advected variables, e.g. for checkpointing.
+
+        Returns:
+            dict: Values of each advectee with shape (nmembers, nz) (nmembers=1 if no ensemble).
+        """
+        return {
+            field: np.stack([a.get() for a in self.mpdata[field]])
+            for field in self.mpdata.fields
+        }
+
+    def set_state(self, state):
+        """Set the values of the advected variables, e.g. from a checkpoint.
+
+        Args:
+            state (dict): Values of each advectee with shape (nmembers, nz).
+        """
+        for field in self.mpdata.fields:
+            if not self._activate_nonzero(field, state[field]):
+                continue
+            for value, advectee in zip(state[field], self.mpdata[field]):
+                advectee.get()[:] = value
@@ -8,7 +8,7 @@ Created Date: Wednesday 2nd July 2025
 Author: PyMPATA Authors (PyMPDATA)
 Additional Contributors: Clara Bayley (CB)
 -----
-Last Modified: Wednesday 2nd July 2025
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -24,7 +24,7 @@ import numpy as np
 
 from PyMPDATA import ScalarField, Solver, Stepper, VectorField
 from PyMPDATA.boundary_conditions import Constant, Extrapolated
-from PyMPDATA.impl.enumerations import INNER, OUTER
+from PyMPDATA.impl.enumerations import INNER
 
 from .arakawa_c import arakawa_c
 
@@ -38,54 +38,148 @@ class MPDATA:
         qv_of_zZ_at_t0,
         g_factor_of_zZ,
         options,
+        nmembers=1,
+        advected_fields=None,
+        active_fields=None,
     ):
         nr = 1  # nr==1 is like a bulk scheme
         self.nr = nr
+        self.nmembers = nmembers
         self.t = 0
         self.dt = dt
         self.fields = ("qvap", "qcond", "qice", "qrain", "qsnow", "qgrau")
+        if advected_fields is None:
+            advected_fields = self.fields
+        assert set(advected_fields) <= set(self.fields), "unknown advected field"
+        self.advected_fields = tuple(advected_fields)
+        # fields which are not active are zero and are not advanced until activated
+        if active_fields is None:
+            active_fields = self.fields
+        self._active_fields_at_t0 = set(active_fields) | {"qvap"}
+        self.active_fields = set(self._active_fields_at_t0)
 
         self.options = options
 
-        self._solvers = {}
-        for k in self.fields:
-            grid = (nz, nr) if nr > 1 and k == "qcond" else (nz,)
+        grid = (nz,)  # (nr==1 so all fields share the same grid)
+        bcs_extrapol = (Extrapolated(dim=INNER),)
+        bcs_zero = (Extrapolated(dim=INNER),)
 
-            bcs_extrapol = tuple(
-                Extrapolated(dim=d)
-                for d in ((OUTER, INNER) if k == "qcond" and nr > 1 else (INNER,))
-            )
+        self._stepper = Stepper(
+            options=self.options, n_dims=len(grid), non_unit_g_factor=True
+        )
 
-            bcs_zero = tuple(
-                Extrapolated(dim=d)
-                for d in ((OUTER, INNER) if k == "qcond" and nr > 1 else (INNER,))
-            )
+        data = g_factor_of_zZ(arakawa_c.z_scalar_coord(grid))
+        self._g_factor = ScalarField(
+            data=data, halo=self.options.n_halo, boundary_conditions=bcs_extrapol
+        )
 
-            stepper = Stepper(
-                options=self.options, n_dims=len(grid), non_unit_g_factor=True
-            )
+        data = (np.zeros(nz + 1),)
+        self.advector = VectorField(
+            data=data, halo=self.options.n_halo, boundary_conditions=bcs_zero
+        )
 
-            data = g_factor_of_zZ(arakawa_c.z_scalar_coord(grid))
-            g_factor = ScalarField(
-                data=data, halo=self.options.n_halo, boundary_conditions=bcs_extrapol
-            )
-
-            data = (np.zeros(nz + 1),)
-            advector = VectorField(
-                data=data, halo=self.options.n_halo, boundary_conditions=bcs_zero
-            )
+        self._advectees = {}
+        self._values_at_t0 = {}
+        # one instance of the hydrometeors' boundary conditions so advectees are the same type
+        bcs_hydrometeors = (Constant(value=0),)
+        self._bcs_hydrometeors = bcs_hydrometeors
+        for k in self.fields:
             if k == "qvap":
                 data = qv_of_zZ_at_t0(arakawa_c.z_scalar_coord(grid))
                 bcs = (Constant(value=data[0]),)
             else:
                 data = np.zeros(grid)
-                bcs = (Constant(value=0),)
-            advectee = ScalarField(
-                data=data, halo=self.options.n_halo, boundary_conditions=bcs
+                bcs = bcs_hydrometeors
+            self._values_at_t0[k] = data
+            # one advectee per ensemble member
+            self._advectees[k] = tuple(
+                ScalarField(
+                    data=data, halo=self.options.n_halo, boundary_conditions=bcs
+                )
+                for _ in range(nmembers)
+            )
+
+        self._make_solvers()
+
+    def _make_solvers(self):
+        # every member of every active advected hydrometeor is advanced by one call to a single
+        # solver (i.e. one numba kernel). qvap needs its own solver because advectees of one
+        # solver must have the same boundary conditions. All solvers share the same g_factor
+        # and advector.
+        groups = (
+            ("qvap",),
+            tuple(
+                k
+                for k in self.advected_fields
+                if k != "qvap" and k in self.active_fields
+            ),
+        )
+        self.solvers = tuple(
+            Solver(
+                stepper=self._stepper,
+                advectee=tuple(a for k in group for a in self._advectees[k]),
+                advector=self.advector,
+                g_factor=self._g_factor,
             )
-            self._solvers[k] = Solver(
-                stepper=stepper, advectee=advectee, advector=advector, g_factor=g_factor
+            for group in groups
+            if set(group) & set(self.advected_fields)
+        )
+
+    def reset(self):
+        """Reset advectees to their initial values and only the fields which were active
+        initially to be active (solvers' numba kernels are not compiled again)."""
+        for k in self.fields:
+            for advectee in self._advectees[k]:
+                advectee.get()[:] = self._values_at_t0[k]
+        if self.active_fields != self._active_fields_at_t0:
+            self.active_fields = set(self._active_fields_at_t0)
+            self._make_solvers()
+
+    def activate(self, k):
+        """Activate field k so that (if it is advected) it is advanced from now on. Note the
+        solver's numba kernel is compiled for each new number of advected fields unless it was
+        compiled by warmup."""
+        if k not in self.active_fields:
+            self.active_fields.add(k)
+            if k in self.advected_fields:
+                self._make_solvers()
+
+    def warmup(self):
+        """Compile the solvers' numba kernels (without advancing the advectees), e.g. so that
+        compilation is not part of the first timestep. Note the kernels are closures which numba
+        cannot cache on disk, so they are compiled once per process.
+
+        The kernel is specialised for the number of advectees of a solver, so it is also
+        compiled for every number of advected hydrometeors which can become active (see
+        activate) using solvers of zero advectees, so that activating hydrometeors part way
+        through a run does not compile the kernel again."""
+        for solver in self.solvers:
+            solver.advance(0)
+
+        hydrometeors = [k for k in self.advected_fields if k != "qvap"]
+        nactive = len([k for k in hydrometeors if k in self.active_fields])
+        nz = len(self._values_at_t0["qvap"])
+        for n in range(1, len(hydrometeors) + 1):
+            if n == nactive:
+                continue  # (already compiled above)
+            advectee = tuple(
+                ScalarField(
+                    data=np.zeros(nz),
+                    halo=self.options.n_halo,
+                    boundary_conditions=self._bcs_hydrometeors,
+                )
+                for _ in range(n * self.nmembers)
             )
+            Solver(
+                stepper=self._stepper,
+                advectee=advectee,
+                advector=self.advector,
+                g_factor=self._g_factor,
+            ).advance(0)
+
+    def advance(self, n_steps):
+        for solver in self.solvers:
+            solver.advance(n_steps)
 
     def __getitem__(self, k):
-        return self._solvers[k]
+        return self._advectees[k]
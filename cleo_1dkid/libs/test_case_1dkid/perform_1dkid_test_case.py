@@ -8,7 +8,7 @@ Created Date: Monday 2nd September 2024
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Wednesday 4th June 2025
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -23,6 +23,7 @@ from pathlib import Path
 import matplotlib.pyplot as plt
 import numpy as np
 
+from .profiler import PhaseProfiler
 from .run_1dkid import run_1dkid
 from libs.utility_functions import plot_utilities
 from libs.thermo import formulae
@@ -39,6 +40,14 @@ def perform_1dkid_test_case(
     advect_hydrometeors,
     figpath,
     run_name,
+    checkpoint_filename=None,
+    checkpoint_interval=None,
+    restart_filename=None,
+    outdir=None,
+    output_queue_size=0,
+    profile=False,
+    kid_dynamics=None,
+    output_dtype=np.float64,
 ):
     """
     Run test case for a 1-D KiD rainshaft model.
@@ -56,7 +65,22 @@ def perform_1dkid_test_case(
         thermo_init (Thermodynamics): Initial thermodynamics.
         microphys_scheme: Microphysics scheme to use in test run.
         figpath (str): Path to the directory where data/plots will be saved.
-        run_name (str): Name of the test run (used for labeling output).
+        run_name (str or list[str]): Name of the test run (used for labeling output). For an
+          ensemble, either one name per member or a single name to which the member index is
+          appended.
+        checkpoint_filename (Path, optional): .npz file to save checkpoints of the run in
+          (not for CLEO SDM, see run_1dkid).
+        checkpoint_interval (float, optional): Time between checkpoints (s).
+        restart_filename (Path, optional): .npz checkpoint file to resume the run from.
+        outdir (Path, optional): Directory to stream output to as .npy files instead of
+          storing it in memory. Output is then read back lazily for plotting.
+        output_queue_size (int, optional): If > 0, output is written by a background thread
+          from a queue of this many timesteps.
+        profile (bool, optional): If True, the wall time spent in each phase of the timesteps
+          is recorded and saved as "[run_name]_profile.json" in the figpath directory.
+        kid_dynamics (KiDDynamics, optional): KiD dynamics to use instead of creating new ones.
+        output_dtype (np.dtype, optional): dtype to store the output thermodynamic variables
+          with, e.g. np.float32 to halve the memory (or disk) used by the output.
 
     Raises:
         AssertionError: If the specified figpath does not exist or if run_name is empty.
@@ -67,6 +91,7 @@ def perform_1dkid_test_case(
     """
 
     print("\n--- Running 1-D KiD Rainshaft Model ---")
+    profiler = PhaseProfiler() if profile else None
     out = run_1dkid(
         z_min,
         z_max,
@@ -76,18 +101,56 @@ def perform_1dkid_test_case(
         thermo_init,
         microphys_scheme,
         advect_hydrometeors,
+        checkpoint_filename=checkpoint_filename,
+        checkpoint_interval=checkpoint_interval,
+        restart_filename=restart_filename,
+        outdir=outdir,
+        output_queue_size=output_queue_size,
+        profiler=profiler,
+        kid_dynamics=kid_dynamics,
+        output_dtype=output_dtype,
     )
     print("--------------------------------")
 
+    if profiler is not None:
+        print("--- Profile of Timesteps ---")
+        assert Path(figpath).exists(), "The specified figpath does not exist."
+        profile_name = run_name if isinstance(run_name, str) else run_name[0]
+        profiler.print_totals()
+        profiler.write_json(Path(figpath) / f"{profile_name}_profile.json")
+        print("----------------------------")
+
     print("--- Plotting Results ---")
     assert Path(figpath).exists(), "The specified figpath does not exist."
     assert run_name, "The run_name cannot be empty."
-    plot_1dkid_moisture(out, z_min, z_max, z_delta, figpath, run_name)
+    if thermo_init.nmembers is None:
+        plot_1dkid_moisture(out, z_min, z_max, z_delta, figpath, run_name)
+    else:
+        if isinstance(run_name, str):
+            run_name = [f"{run_name}_member{m}" for m in range(thermo_init.nmembers)]
+        assert len(run_name) == thermo_init.nmembers, "need one run_name per member"
+        for m, member_run_name in enumerate(run_name):
+            plot_1dkid_moisture(
+                out.member(m), z_min, z_max, z_delta, figpath, member_run_name
+            )
     print("------------------------")
 
     return out
 
 
+class _LazyExpression:
+    """Array-like result of applying a function elementwise to some arrays (e.g. memory-mapped
+    output variables) which is only evaluated for the slices that are indexed."""
+
+    def __init__(self, func, *arrays):
+        self.func = func
+        self.arrays = arrays
+        self.shape = arrays[0].shape
+
+    def __getitem__(self, key):
+        return self.func(*[a[key] for a in self.arrays])
+
+
 def plot_1dkid_moisture(out, z_min, z_max, z_delta, figpath, run_name):
     """
     Plots the 1D Kinematic Driver (KID) results and saves the plots.
@@ -147,7 +210,7 @@ def plot_1dkid_moisture(out, z_min, z_max, z_delta, figpath, run_name):
         axs[2, 0],
         axs[3, 0],
         axs[2, 1],
-        out.qcond.values + out.qrain.values,
+        _LazyExpression(np.add, out.qcond.values, out.qrain.values),
         out.time.values,
         z_min,
         z_max,
@@ -158,8 +221,8 @@ def plot_1dkid_moisture(out, z_min, z_max, z_delta, figpath, run_name):
         cmap="gray",
     )
 
-    supersat = formulae.supersaturation(
-        out.temp.values, out.press.values, out.qvap.values
+    supersat = _LazyExpression(
+        formulae.supersaturation, out.temp.values, out.press.values, out.qvap.values
     )
     label = "supersaturation / %"
     plot_kid_result(
@@ -220,7 +283,8 @@ def plot_kid_result(
     ax1 : matplotlib.axes.Axes
         The second axes object for cross-section plot.
     var : numpy.ndarray
-        The variable to be plotted, dimensions [time, height]
+        The variable to be plotted, dimensions [time, height]. Only slices of time are
+        indexed, so var may be e.g. a memory-mapped array which is then read lazily.
     time : float
         The time data to plot (will be coarsened by 'fctr', see code)
     z_min : float
@@ -262,17 +326,17 @@ def plot_kid_result(
     zgrid = np.linspace(z_min, z_max, nz + 1, endpoint=True)
     zgrid = zgrid / 1000  # [km]
 
-    var = var * mult
     time_steps = var.shape[0] - 1
     assert (
         time_steps % fctr == 0
     ), "number of timesteps must be divisible by coarsening factor"
 
-    # coarsen temporal part by 'fctr' transpose var for plotting
-    tmp = var[1:, :]
-    tmp = tmp.reshape(-1, fctr, tmp.shape[1])
-    tmp = tmp.mean(axis=1)
-    tmp = np.concatenate(((var[0, :],), tmp)).T
+    # coarsen temporal part by 'fctr' (reading one block of 'fctr' timesteps at a time)
+    # and transpose var for plotting
+    tmp = [var[0, :]]
+    for i in range(1, time_steps + 1, fctr):
+        tmp.append(var[i : i + fctr, :].mean(axis=0, dtype=np.float64))
+    tmp = np.asarray(tmp).T * mult
 
     if threshold is not None:
         tmp = np.where(tmp < threshold, np.nan, tmp)
@@ -302,7 +366,7 @@ def plot_kid_result(
     last_t = -1
     for i, t in enumerate(time):
         t = t / 60  # [minutes]
-        d = var[i, :]
+        d = var[i, :] * mult
         z = (zgrid[1:] + zgrid[:-1]) / 2
         params = {"color": "black"}
         for line_t, line_s in lines.items():
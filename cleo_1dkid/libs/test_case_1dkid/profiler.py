@@ -0,0 +1,108 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: profiler.py
+Project: test_case_1dkid
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+class for recording the wall time spent in each phase of the timesteps of the 1-D KiD
+rainshaft model, e.g. to tell if a run is bound by the dynamics or by the microphysics
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+
+
+class PhaseProfiler:
+    """Class to record the wall time spent in named phases of each timestep of a model run.
+
+    Attributes:
+        timings (dict):
+          List of the wall times (s) of every call of each phase, keyed by name of phase.
+    """
+
+    def __init__(self):
+        """Initialise PhaseProfiler instance with no timings."""
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager which records the wall time spent inside it for phase 'name'.
+
+        Parameters:
+          name (str): Name of the phase, e.g. "kid_dynamics.run".
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, wall_time):
+        """Record the wall time of one call of phase 'name' measured elsewhere.
+
+        Parameters:
+          name (str): Name of the phase, e.g. "imports".
+          wall_time (float): Wall time of the call (s).
+        """
+        self.timings.setdefault(name, []).append(wall_time)
+
+    def summary(self, nbins=20):
+        """Get the total, mean, minimum, maximum and a histogram of the wall time of each phase.
+
+        Parameters:
+          nbins (int, optional): Number of bins of histograms. Defaults to 20.
+
+        Returns:
+          dict: Summary of wall times (s) of each phase and their total across all phases.
+        """
+        summary = {"total": 0.0, "phases": {}}
+        for name, timings in self.timings.items():
+            timings = np.asarray(timings)
+            counts, bin_edges = np.histogram(timings, bins=nbins)
+            summary["phases"][name] = {
+                "ncalls": len(timings),
+                "total": timings.sum(),
+                "mean": timings.mean(),
+                "min": timings.min(),
+                "max": timings.max(),
+                "histogram": {
+                    "counts": counts.tolist(),
+                    "bin_edges": bin_edges.tolist(),
+                },
+            }
+            summary["total"] += timings.sum()
+        for phase in summary["phases"].values():
+            phase["fraction"] = phase["total"] / summary["total"]
+        return summary
+
+    def write_json(self, filename, nbins=20):
+        """Write the summary of the wall times to a .json file.
+
+        Parameters:
+          filename (Path): Name of the .json file to write.
+          nbins (int, optional): Number of bins of histograms. Defaults to 20.
+        """
+        summary = self.summary(nbins=nbins)
+        with open(filename, "w") as file:
+            json.dump(summary, file, indent=2, default=float)
+        print("Profile .json saved as: " + str(Path(filename)))
+
+    def print_totals(self):
+        """Print the total wall time spent in each phase."""
+        summary = self.summary()
+        for name, phase in summary["phases"].items():
+            print(
+                f"{name}: {phase['total']:.3f}s ({100 * phase['fraction']:.1f}%) over "
+                f"{phase['ncalls']} calls"
+            )
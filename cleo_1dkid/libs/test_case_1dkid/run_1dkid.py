@@ -8,7 +8,7 @@ Created Date: Monday 2nd September 2024
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Wednesday 4th June 2025
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -18,6 +18,10 @@ File Description:
 run 1-D KiD rainshaft model by timestepping and outputting data
 """
 
+import numpy as np
+from contextlib import nullcontext
+
+from .checkpoint import save_checkpoint, restore_checkpoint
 from .kid_dynamics import KiDDynamics
 from libs.thermo.output_thermodynamics import OutputThermodynamics
 
@@ -31,6 +35,15 @@ def run_1dkid(
     thermo,
     microphys_scheme,
     advect_hydrometeors,
+    checkpoint_filename=None,
+    checkpoint_interval=None,
+    restart_filename=None,
+    outdir=None,
+    output_queue_size=0,
+    profiler=None,
+    kid_dynamics=None,
+    max_courant=None,
+    output_dtype=np.float64,
 ):
     """Run 1-D KiD rainshaft model with a specified microphysics scheme and KiD dynamics.
 
@@ -38,6 +51,10 @@ def run_1dkid(
     thermodynamic conditions, and microphysics scheme from time to time_end with
     a constant timestep based on the Shipway and Hill (2012) setup.
 
+    If the variables of thermo have a leading ensemble axis, i.e. shape (nmembers, nz), all
+    the ensemble members are advanced together by the same KiD dynamics and the output
+    has shape (ntime, nmembers, nz).
+
     Parameters:
         z_min (float):
           Lower limit of 1-D column (m).
@@ -53,20 +70,58 @@ def run_1dkid(
           Initial thermodynamic conditions.
         microphys_scheme:
           Microphysics scheme to use.
+        advect_hydrometeors (bool):
+          If False, only qvap is advected by the KiD dynamics.
+        checkpoint_filename (Path, optional):
+          .npz file to save checkpoints of the run in (overwritten at every checkpoint). Only
+          for microphysics schemes whose state is saved by a get_state method or which have no
+          state, e.g. the bulk scheme but not CLEO SDM (whose superdroplets cannot be saved).
+        checkpoint_interval (float, optional):
+          Time between checkpoints (s), must be a multiple of timestep.
+        restart_filename (Path, optional):
+          .npz checkpoint file to resume the run from instead of starting at time=0. If output
+          is streamed to outdir, outdir must be that of the run which saved the checkpoint.
+        outdir (Path, optional):
+          Directory to stream output to as .npy files instead of storing it in memory (output
+          in memory is copied into every checkpoint, output in outdir is not).
+        output_queue_size (int, optional):
+          If > 0, output is written by a background thread from a queue of this many timesteps.
+        profiler (PhaseProfiler, optional):
+          Profiler to record the wall time spent in each phase of every timestep.
+        kid_dynamics (KiDDynamics, optional):
+          KiD dynamics owned by the caller to use instead of creating new ones, e.g. if thermo
+          has been bound to its advectees (see KiDDynamics.bind_thermo) before the microphysics
+          was created, or to reuse their solved profiles and compiled solvers for several runs
+          one after another. They are reset to their initial conditions before the run.
+          Defaults to None (new KiD dynamics are created for the run).
+        max_courant (float, optional):
+          If given, the KiD dynamics substep the advection of each timestep so that the Courant
+          number is at most max_courant (see KiDDynamics), e.g. for a large timestep.
+        output_dtype (np.dtype, optional):
+          dtype to store the output thermodynamic variables with, e.g. np.float32 to halve the
+          memory (or disk) used by the output (see OutputThermodynamics).
 
     Returns:
           OutputThermodynamics: Output containing thermodynamic data from the model run.
     """
 
     ### type of dynamics rainshaft will undergo
-    kid_dynamics = KiDDynamics(
-        z_min,
-        z_max,
-        z_delta,
-        timestep,
-        time_end,
-        advect_hydrometeors=advect_hydrometeors,
-    )
+    if kid_dynamics is None:
+        kid_dynamics = KiDDynamics(
+            z_min,
+            z_max,
+            z_delta,
+            timestep,
+            time_end,
+            advect_hydrometeors=advect_hydrometeors,
+            nmembers=thermo.nmembers,
+            max_courant=max_courant,
+        )
+    assert kid_dynamics.settings.dt == timestep, "KiD dynamics timestep mismatch"
+    assert kid_dynamics.zhalf[0] == z_min and kid_dynamics.zhalf[-1] == z_max
+    assert kid_dynamics.advect_hydrometeors == advect_hydrometeors
+    assert kid_dynamics.nmembers == thermo.nmembers
+    assert kid_dynamics.max_courant == max_courant or max_courant is None
 
     ### run dynamics + microphysics from time to time_end
     microphys_scheme.initialize()
@@ -74,20 +129,71 @@ def run_1dkid(
     ### data to output during model run
     ntime = int(time_end / timestep) + 1
     nz = len(kid_dynamics.zhalf) - 1
-    shape = (ntime, nz)
-    out = OutputThermodynamics(shape, zhalf=kid_dynamics.zhalf)
-
-    time = 0.0
-    thermo = kid_dynamics.set_thermo(time, thermo)
-    out.output_thermodynamics(time, thermo)
-    while time < time_end:
-        thermo = kid_dynamics.run(time, timestep, thermo)
-        thermo = microphys_scheme.run(timestep, thermo)
-        kid_dynamics.set_advectees(thermo)
+    if thermo.nmembers is None:
+        shape = (ntime, nz)
+    else:
+        shape = (ntime, thermo.nmembers, nz)
+    out = OutputThermodynamics(
+        shape,
+        zhalf=kid_dynamics.zhalf,
+        outdir=outdir,
+        queue_size=output_queue_size,
+        sparse_keys=(
+            "qcond",
+            "qice",
+            "qrain",
+            "qsnow",
+            "qgrau",
+        ),  # often zero for whole run
+        dtype=output_dtype,
+        restart=restart_filename is not None,
+    )
 
-        time += timestep
+    if checkpoint_filename is not None:
+        nsteps_checkpoint = checkpoint_interval / timestep
+        assert (
+            nsteps_checkpoint == int(nsteps_checkpoint) and nsteps_checkpoint > 0
+        ), "checkpoint interval must be a multiple of the timestep"
+        nsteps_checkpoint = int(nsteps_checkpoint)
 
+    thermo = kid_dynamics.reset(thermo)
+    if restart_filename is None:
+        time = 0.0
         out.output_thermodynamics(time, thermo)
+    else:
+        time = restore_checkpoint(
+            restart_filename, kid_dynamics, thermo, out, microphys_scheme
+        )
+
+    def phase(name):
+        return nullcontext() if profiler is None else profiler.phase(name)
+
+    try:
+        while time < time_end:
+            with phase("kid_dynamics.run"):
+                thermo = kid_dynamics.run(time, timestep, thermo)
+            with phase("microphys_scheme.run"):
+                thermo = microphys_scheme.run(timestep, thermo)
+            with phase("kid_dynamics.set_advectees"):
+                kid_dynamics.set_advectees(thermo)
+
+            time += timestep
+
+            with phase("out.output_thermodynamics"):
+                out.output_thermodynamics(time, thermo)
+
+            if checkpoint_filename is not None:
+                if round(time / timestep) % nsteps_checkpoint == 0:
+                    save_checkpoint(
+                        checkpoint_filename,
+                        time,
+                        kid_dynamics,
+                        thermo,
+                        out,
+                        microphys_scheme,
+                    )
+    finally:
+        out.close()  # (e.g. if the run is stopped by an error, output so far is not lost)
 
     microphys_scheme.finalize()
 
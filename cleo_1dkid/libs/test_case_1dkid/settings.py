@@ -8,7 +8,7 @@ Created Date: Wednesday 2nd July 2025
 Author: PyMPATA Authors (PyMPDATA)
 Additional Contributors: Clara Bayley (CB)
 -----
-Last Modified: Wednesday 2nd July 2025
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -20,10 +20,13 @@ https://github.com/open-atmos/PyMPDATA/blob/main/examples/PyMPDATA_examples/Ship
 between v1.6.1 and v1.6.2
 """
 
+import hashlib
+import os
+from importlib.metadata import version
+from pathlib import Path
 from typing import Optional
 
 import numpy as np
-from numdifftools import Derivative
 from pystrict import strict
 from scipy.integrate import solve_ivp
 from scipy.interpolate import interp1d
@@ -33,6 +36,28 @@ from PyMPDATA_examples.Shipway_and_Hill_2012 import formulae
 from PyMPDATA_examples.Shipway_and_Hill_2012.formulae import const, si
 
 
+# version of the solution of the dry-air density profile (part of the key of the profile in the
+# cache together with the versions of the formulae and solver libraries), (!) increment this
+# whenever the equation or its solution here changes (!)
+RHOD_PROFILE_VERSION = 1
+
+
+def exner_novapour(z, theta, p_surf, p_ref=100000.0):
+    """returns Exner function at (ascending) heights z for potential temperature theta at z,
+    integrating hydrostatic balance without vapour down from the top of the column such that
+    the Exner function at the top is that at p_surf minus the total increment of the column,
+    i.e. vectorised version of KiD's loops over k (see link in Settings)."""
+    r_on_cp = const.Rd / const.c_pd
+    dexner = np.empty(len(z))
+    dexner[0] = const.g * z[0] / (const.c_pd * theta[0])
+    dexner[1:] = const.g * np.diff(z) / (const.c_pd * 0.5 * (theta[1:] + theta[:-1]))
+
+    exner = np.empty(len(z))
+    exner[-1] = (p_surf / p_ref) ** r_on_cp - np.sum(dexner)
+    exner[:-1] = exner[-1] + np.cumsum(dexner[-2::-1])[::-1]
+    return exner
+
+
 @strict
 class Settings:
     def __init__(
@@ -48,7 +73,11 @@ class Settings:
         is_exner_novapour: Optional[bool] = False,
         is_exner_novapour_uniformrho: Optional[bool] = False,
         is_approx_drhod_dz: Optional[bool] = False,
+        cache_dir: Optional[str] = None,
     ):
+        """cache_dir is a directory to store the solved profile of the dry-air density in
+        (and read it from on subsequent calls with the same settings), if None the profile is
+        not cached."""
         self.dt = dt
         self.dz = dz
 
@@ -56,12 +85,20 @@ class Settings:
         self.z_max = z_max
         self.t_max = t_max
 
-        self.qv0 = interp1d(
-            (0, 740, 3260), (0.015, 0.0138, 0.0024), fill_value="extrapolate"
-        )
-        self._th = interp1d(
-            (0, 740, 3260), (297.9, 297.9, 312.66), fill_value="extrapolate"
-        )
+        qv0_z, qv0_qv = (0, 740, 3260), (0.015, 0.0138, 0.0024)
+        self.qv0 = interp1d(qv0_z, qv0_qv, fill_value="extrapolate")
+
+        # qv0 is piecewise linear so its derivative is the gradient of each piece (extrapolated
+        # beyond the first and last pieces)
+        qv0_gradients = np.diff(qv0_qv) / np.diff(qv0_z)
+
+        def dqv0_dz(z):
+            piece = np.searchsorted(qv0_z, z, side="right") - 1
+            return qv0_gradients[np.clip(piece, 0, len(qv0_gradients) - 1)]
+
+        self.dqv0_dz = dqv0_dz
+        th_z, th_th = (0, 740, 3260), (297.9, 297.9, 312.66)
+        self._th = interp1d(th_z, th_th, fill_value="extrapolate")
 
         self.thd = lambda z, qv: formulae.th_dry(self._th(z), qv)
 
@@ -73,25 +110,17 @@ class Settings:
         if is_exner_novapour or is_exner_novapour_uniformrho:
             # note: not in the paper,
             # https://github.com/BShipway/KiD/blob/bad81aa6efa4b7e4743b6a1867382fc74c10a884/src/test_cases.f90#L784
+            p_ref = 100000.0
+            r_on_cp = const.Rd / const.c_pd
+            z2exner_cache = {}  # for heights of most recent call
+
             def z2exner(z, return_rho=False, return_press=False, return_temp=False):
-                nz = len(z)
-                p_ref = 100000.0
-                r_on_cp = const.Rd / const.c_pd
-                theta = self._th(z)
-
-                dexner = np.zeros(nz)
-                dexner[0] = const.g * z[0] / (const.c_pd * theta[0])
-                for k in range(1, nz):
-                    dexner[k] = (
-                        const.g
-                        * (z[k] - z[k - 1])
-                        / (const.c_pd * 0.5 * (theta[k] + theta[k - 1]))
-                    )
-
-                exner = np.zeros(nz)
-                exner[-1] = (p_surf / p_ref) ** r_on_cp - np.sum(dexner)
-                for k in range(nz - 2, -1, -1):
-                    exner[k] = exner[k + 1] + dexner[k]
+                key = (np.shape(z), np.asarray(z).tobytes())
+                if key not in z2exner_cache:
+                    z2exner_cache.clear()
+                    theta = self._th(z)
+                    z2exner_cache[key] = theta, exner_novapour(z, theta, p_surf, p_ref)
+                theta, exner = z2exner_cache[key]
 
                 if return_rho:
                     rho = (p_ref * exner ** (1.0 / r_on_cp - 1.0)) / (const.Rd * theta)
@@ -101,7 +130,7 @@ class Settings:
                 if return_temp:
                     return theta * exner
                 else:
-                    return exner
+                    return exner.copy()
 
             self.temp = lambda z: z2exner(zpos(z), return_temp=True)
             self.press = lambda z, qv: z2exner(zpos(z), return_press=True)
@@ -119,21 +148,48 @@ class Settings:
                 drhod_dz = formulae.drho_dz(const.g, p, T, self.qv0(z), const.lv)
                 if not is_approx_drhod_dz:  # to resolve issue #335
                     qv = self.qv0(z)
-                    dqv_dz = Derivative(self.qv0)(z)
+                    dqv_dz = self.dqv0_dz(z)
                     drhod_dz = drhod_dz / (1 + qv) - rhod * dqv_dz / (1 + qv) ** 2
                 return drhod_dz
 
-            rhod0 = formulae.rho_d(p_surf, self.qv0(0), self._th(0))
-            rhod_solution = solve_ivp(
-                fun=drhod_dz,
-                t_span=(0, self.z_max),
-                y0=np.asarray((rhod0,)),
-                t_eval=z_points,
-                max_step=self.dz / 2,
-            )
-            assert rhod_solution.success
-
-            self.rhod = lambda z: interp1d(z_points, rhod_solution.y[0])(zpos(z))
+            def solve_rhod():
+                rhod0 = formulae.rho_d(p_surf, self.qv0(0), self._th(0))
+                rhod_solution = solve_ivp(
+                    fun=drhod_dz,
+                    t_span=(0, self.z_max),
+                    y0=np.asarray((rhod0,)),
+                    t_eval=z_points,
+                    max_step=self.dz / 2,
+                )
+                assert rhod_solution.success
+                return rhod_solution.y[0]
+
+            if cache_dir is None:
+                rhod_points = solve_rhod()
+            else:
+                key = (
+                    self.z_max,
+                    self.dz,
+                    p_surf,
+                    is_approx_drhod_dz,
+                    qv0_z,
+                    qv0_qv,
+                    th_z,
+                    th_th,
+                    const.g,
+                    const.Rd,
+                    const.Rv,
+                    const.c_pd,
+                    const.lv,
+                    version("PyMPDATA-examples"),
+                    version("scipy"),
+                )
+                rhod_points = _cached_profile(
+                    cache_dir, "rhod", RHOD_PROFILE_VERSION, key, solve_rhod
+                )
+            assert rhod_points.shape == z_points.shape
+
+            self.rhod = lambda z: interp1d(z_points, rhod_points)(zpos(z))
             self.temp = lambda z: formulae.temperature(
                 self.rhod(zpos(z)), self.thd(zpos(z), self.qv0(zpos(z)))
             )
@@ -161,3 +217,18 @@ class Settings:
         nt = self.t_max / self.dt
         assert nt == int(nt)
         return int(nt)
+
+
+def _cached_profile(cache_dir, name, version, key, solve):
+    """returns profile from .npy file in cache_dir for version and key (e.g. of settings), or if
+    there is no such file, returns profile from solve() after saving it in the file"""
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    filename = Path(cache_dir) / f"{name}_v{version}_{digest}.npy"
+    if filename.is_file():
+        return np.load(filename)
+    profile = solve()
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    tmp_filename = filename.with_suffix(f".{os.getpid()}.tmp.npy")
+    np.save(tmp_filename, profile)
+    os.replace(tmp_filename, filename)  # (atomic, e.g. if processes share cache_dir)
+    return profile
@@ -8,7 +8,7 @@ Created Date: Friday 1st March 2024
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Monday 2nd September 2024
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -122,7 +122,8 @@ def supersaturation(temp: np.ndarray, press: np.ndarray, qvap: np.ndarray):
     Calculate supersaturation based on the method described in PyMPDATA-examples
 
     This function uses the calculations in the Shipway and Hill (2012) example from
-    PyMPDATA-examples library to compute the supersaturation.
+    PyMPDATA-examples library to compute the supersaturation. Values are computed in double
+    precision, whatever the dtype of the inputs (e.g. np.float32 output).
 
     Parameters:
     temp (float): Temperature in Kelvin.
@@ -134,6 +135,10 @@ def supersaturation(temp: np.ndarray, press: np.ndarray, qvap: np.ndarray):
     """
     from PyMPDATA_examples import Shipway_and_Hill_2012 as kid
 
+    temp = np.asarray(temp, dtype=np.float64)
+    press = np.asarray(press, dtype=np.float64)
+    qvap = np.asarray(qvap, dtype=np.float64)
+
     pvs = kid.formulae.pvs_Celsius(temp - kid.const.T0)
     relh = kid.formulae.pv(press, qvap) / pvs
 
@@ -8,7 +8,7 @@ Created Date: Thursday 29th February 2024
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Monday 2nd September 2024
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -18,7 +18,11 @@ File Description:
 class for storing thermodynamics output during model run
 """
 
+import queue
+import threading
 import numpy as np
+from copy import copy
+from pathlib import Path
 
 from .thermodynamics import Thermodynamics
 
@@ -26,6 +30,25 @@ from .thermodynamics import Thermodynamics
 class OutputVariable:
     """Class to output a variable with some of its metadata.
 
+    By default the values are stored in memory. If a filename is given, the values are instead
+    streamed to a .npy file on disk: slices written to the variable are held in a buffer of
+    `buffer_size` slices which is appended to the file whenever it is full, so that the memory
+    used does not depend on the length of the first dimension (e.g. the number of timesteps).
+    The values are then read back lazily as a read-only memory-mapped array.
+
+    If sparse, no memory (or file) is allocated for the values until the first slice with a
+    non-zero value is written, e.g. for a variable which stays zero for the whole model run.
+    Until then the values are a read-only array of zeros which uses no memory.
+
+    Values are stored with the given dtype, e.g. np.float32 to halve the memory (or disk) used,
+    so that slices written to the variable are converted to dtype as they are written.
+
+    The state of the variable (e.g. for checkpointing, see get_state) is the position of the next
+    write and the slices which are not yet in a file, i.e. only the buffer of values streamed to
+    disk but all the values written so far of values stored in memory. If restart, the existing
+    file of values streamed to disk is reopened by set_state (instead of being created), so that
+    the values written before a checkpoint are kept.
+
     Attributes:
         name (string):
           Name of variable.
@@ -33,9 +56,21 @@ class OutputVariable:
           Units of variable.
         values (np.ndarray):
           Values of variable; must be able to be appended to.
+        filename (Path):
+          .npy file the values are written to (None if values are stored in memory).
     """
 
-    def __init__(self, name, units, shape):
+    def __init__(
+        self,
+        name,
+        units,
+        shape,
+        filename=None,
+        buffer_size=1,
+        sparse=False,
+        dtype=np.float64,
+        restart=False,
+    ):
         """Initialise OutputVariable instance
 
         Parameters:
@@ -46,12 +81,77 @@ class OutputVariable:
           shape (array of integers)
             Shape of final array. Note that values are added by write function
             as slices along first dimension (e.g. first dimension is time)
+          filename (Path, optional):
+            .npy file to stream values to. Defaults to None (values stored in memory).
+          buffer_size (int, optional):
+            Number of slices to buffer in memory before appending them to filename.
+          sparse (bool, optional):
+            If True, values are not allocated until a non-zero value is first written.
+          dtype (np.dtype, optional):
+            dtype to store values with. Defaults to np.float64.
+          restart (bool, optional):
+            If True, values are not allocated until set_state is called (e.g. to restore the
+            variable from a checkpoint), which then reopens the existing file of values.
         """
 
         self.name = name
         self.units = units
-        self.values = np.zeros(shape)
+        self.filename = None if filename is None else Path(filename)
         self._i = 0
+        self._shape = tuple(shape)
+        self._buffer_size = buffer_size
+        self._allocated = False
+        self.dtype = np.dtype(dtype)
+        if filename is not None:
+            assert buffer_size > 0, "buffer must have space for at least one slice"
+
+        if not (sparse or restart):
+            self._allocate()
+
+    def _allocate(self, reopen=False):
+        """allocate the (zero) values in memory or on disk, or if reopen, reopen the existing
+        file of values (without truncating it)"""
+        self._allocated = True
+        if self.filename is None:
+            self.values = np.zeros(self._shape, dtype=self.dtype)
+        else:
+            if reopen:
+                file_values = np.lib.format.open_memmap(self.filename, mode="r+")
+                assert file_values.shape == self._shape, f"shape of {self.filename}"
+                assert file_values.dtype == self.dtype, f"dtype of {self.filename}"
+            else:
+                file_values = np.lib.format.open_memmap(
+                    self.filename, mode="w+", dtype=self.dtype, shape=self._shape
+                )
+            self._offset = file_values.offset  # size of .npy header [bytes]
+            del file_values  # file is written without a memory map, see flush()
+            self._buffer = np.zeros(
+                (self._buffer_size, *self._shape[1:]), dtype=self.dtype
+            )
+            self._nbuffer = 0
+
+    @property
+    def values(self):
+        """Values of variable (read-only memory-mapped array if written to disk)."""
+        if not self._allocated:
+            return np.broadcast_to(self.dtype.type(0.0), self._shape)
+        if self.filename is None:
+            return self._values
+        self.flush()
+        return np.load(self.filename, mmap_mode="r")
+
+    @values.setter
+    def values(self, val):
+        assert self.filename is None, "cannot replace values written to disk"
+        self._allocated = True
+        self._values = val
+
+    @property
+    def shape(self):
+        """Shape of final array of values."""
+        if self.filename is None and self._allocated:
+            return np.shape(self._values)
+        return self._shape
 
     def write(self, val):
         """Copy values 'val' to the array in slice along its first dimension.
@@ -59,12 +159,34 @@ class OutputVariable:
         Parameters:
           val (any): Value(s) to append.
         """
-        assert np.shape(self.values)[0] > self._i, "no space left in array"
+        assert self.shape[0] > self._i, "no space left in array"
         assert (
-            np.shape(val) == np.shape(self.values)[1:]
+            np.shape(val) == self.shape[1:]
         ), "values to add must be complete slice along 0th dimension"
-        self.values[self._i] = val
-        self._i += 1
+        if not self._allocated:
+            if not np.any(val):
+                self._i += 1  # values are still all zero
+                return
+            self._allocate()
+        if self.filename is None:
+            self._values[self._i] = val
+            self._i += 1
+        else:
+            self._buffer[self._nbuffer] = val
+            self._nbuffer += 1
+            self._i += 1
+            if self._nbuffer == len(self._buffer):
+                self.flush()
+
+    def flush(self):
+        """Append any slices in the buffer to the file on disk (no-op if values are in memory)."""
+        if self.filename is None or not self._allocated or self._nbuffer == 0:
+            return
+        i0 = self._i - self._nbuffer
+        with open(self.filename, "r+b") as file:
+            file.seek(self._offset + i0 * self._buffer[0].nbytes)
+            file.write(self._buffer[: self._nbuffer].data)
+        self._nbuffer = 0
 
     def set(self, val):
         """Copy values 'val' to the entire array.
@@ -75,9 +197,102 @@ class OutputVariable:
         self.values = val
         self._i = np.nan  # destroy ability of write() function
 
+    def get_state(self):
+        """returns the position of the next write and copies of the slices which are not yet in a
+        file (e.g. for checkpointing), i.e. of the buffer if values are streamed to disk or of all
+        the values written so far if values are stored in memory"""
+        if not self._allocated:
+            written = np.zeros((0, *self._shape[1:]), dtype=self.dtype)
+        elif self.filename is None:
+            written = self._values[: self._i].copy()
+        else:
+            written = self._buffer[: self._nbuffer].copy()
+        return {"i": self._i, "written": written, "allocated": self._allocated}
+
+    def set_state(self, state):
+        """restores the position of the next write and the slices which were not yet in a file
+        (e.g. from a checkpoint, see get_state). Values streamed to disk before the checkpoint
+        are kept by reopening the existing file, which requires the variable to be initialised
+        with restart=True (or to be sparse and not yet allocated)."""
+        i, written = int(state["i"]), np.asarray(state["written"])
+        assert self.shape[0] >= i, "no space left in array"
+        if not state["allocated"]:
+            self._i = i  # values written so far are all zero
+            return
+        if self.filename is None:
+            if not self._allocated:
+                self._allocate()
+        else:
+            assert (
+                not self._allocated
+            ), "file would have been truncated, use restart=True"
+            self._allocate(reopen=True)
+            self._nbuffer = 0
+        self._i = i - len(written)
+        for val in written:
+            self.write(val)
+
     def finalize(self):
-        """Convert values to a NumPy array."""
-        print(self.name + " shape: " + str(self.values.shape))
+        """Convert values to a NumPy array (or flush values to disk)."""
+        if self.filename is not None and not self._allocated:
+            self._allocate()  # file of zeros so that every variable has a file
+        if self.filename is None:
+            print(self.name + " shape: " + str(self.values.shape))
+        else:
+            self.flush()
+            print(
+                self.name + " shape: " + str(self.shape) + " in " + str(self.filename)
+            )
+
+
+class _BackgroundWriter:
+    """Thread which drains a bounded queue of slices and writes them to output variables.
+
+    Writing (e.g. to disk) then overlaps with the rest of the model timestep. If the queue is
+    full, put() blocks until the thread has written a slice. Errors raised by the thread are
+    re-raised in the main thread on the next call to put(), wait() or close().
+    """
+
+    def __init__(self, variables, maxsize):
+        self.variables = variables
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.error = None
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+
+    def _drain(self):
+        while True:
+            vals = self.queue.get()
+            try:
+                if vals is None:
+                    return
+                if self.error is None:
+                    for var, val in zip(self.variables, vals):
+                        var.write(val)
+            except Exception as error:
+                self.error = error
+            finally:
+                self.queue.task_done()
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise RuntimeError("background output writer failed") from self.error
+
+    def put(self, vals):
+        """queue (copies of) one slice of each variable to be written"""
+        self._raise_error()
+        self.queue.put(vals)
+
+    def wait(self):
+        """block until every slice in the queue has been written"""
+        self.queue.join()
+        self._raise_error()
+
+    def close(self):
+        """write every slice in the queue and then stop the thread"""
+        self.queue.put(None)
+        self.thread.join()
+        self._raise_error()
 
 
 class OutputThermodynamics:
@@ -109,7 +324,31 @@ class OutputThermodynamics:
           Specific graupel content (kg/kg).
     """
 
-    def __init__(self, shape, zhalf=None, xhalf=None, yhalf=None):
+    thermo_keys = [
+        "temp",
+        "rhod",
+        "press",
+        "qvap",
+        "qcond",
+        "qice",
+        "qrain",
+        "qsnow",
+        "qgrau",
+    ]
+
+    def __init__(
+        self,
+        shape,
+        zhalf=None,
+        xhalf=None,
+        yhalf=None,
+        outdir=None,
+        buffer_size=16,
+        queue_size=0,
+        sparse_keys=(),
+        dtype=np.float64,
+        restart=False,
+    ):
         """Initialize an OutputThermodynamics object.
 
         Args:
@@ -117,18 +356,52 @@ class OutputThermodynamics:
             zhalf (np.ndarray, optional): Half-level z-coordinates (m). Defaults to None.
             xhalf (np.ndarray, optional): Half-level x-coordinates (m). Defaults to None.
             yhalf (np.ndarray, optional): Half-level y-coordinates (m). Defaults to None.
+            outdir (Path, optional): Directory to stream the time and thermodynamic variables
+              to as "[name].npy" files. Defaults to None (output is stored in memory).
+            buffer_size (int, optional): Number of timesteps of output to buffer in memory
+              between writes to outdir. Defaults to 16.
+            queue_size (int, optional): If > 0, output is copied into a queue of at most
+              queue_size timesteps which a background thread writes to the output variables,
+              so that e.g. writing to outdir overlaps with the model. Values of the variables
+              are then only complete after get_state, member or finalize has been called.
+              Defaults to 0 (output is written directly).
+            sparse_keys (tuple, optional): Names of variables (e.g. "qice") which are not stored
+              until a non-zero value is first output, see OutputVariable. Defaults to ().
+            dtype (np.dtype, optional): dtype to store the thermodynamic variables with, e.g.
+              np.float32 to halve the memory (or disk) used by the output, see OutputVariable.
+              Time is always stored as np.float64. Defaults to np.float64.
+            restart (bool, optional): If True, the output is to be restored from a checkpoint
+              (see set_state), so files in outdir are reopened instead of created. Defaults to
+              False.
         """
 
-        self.time = OutputVariable("time", "s", [shape[0]])
-        self.temp = OutputVariable("temp", "K", shape)
-        self.rhod = OutputVariable("rhod", "kg m-3", shape)
-        self.press = OutputVariable("press", "Pa", shape)
-        self.qvap = OutputVariable("qvap", "kg/kg", shape)
-        self.qcond = OutputVariable("qcond", "kg/kg", shape)
-        self.qice = OutputVariable("qice", "kg/kg", shape)
-        self.qrain = OutputVariable("qrain", "kg/kg", shape)
-        self.qsnow = OutputVariable("qsnow", "kg/kg", shape)
-        self.qgrau = OutputVariable("qgrau", "kg/kg", shape)
+        def output_variable(name, units, shape, dtype=dtype):
+            sparse = name in sparse_keys
+            if outdir is None:
+                return OutputVariable(
+                    name, units, shape, sparse=sparse, dtype=dtype, restart=restart
+                )
+            filename = Path(outdir) / f"{name}.npy"
+            return OutputVariable(
+                name, units, shape, filename, buffer_size, sparse, dtype, restart
+            )
+
+        self.time = output_variable("time", "s", [shape[0]], dtype=np.float64)
+        self.temp = output_variable("temp", "K", shape)
+        self.rhod = output_variable("rhod", "kg m-3", shape)
+        self.press = output_variable("press", "Pa", shape)
+        self.qvap = output_variable("qvap", "kg/kg", shape)
+        self.qcond = output_variable("qcond", "kg/kg", shape)
+        self.qice = output_variable("qice", "kg/kg", shape)
+        self.qrain = output_variable("qrain", "kg/kg", shape)
+        self.qsnow = output_variable("qsnow", "kg/kg", shape)
+        self.qgrau = output_variable("qgrau", "kg/kg", shape)
+
+        if queue_size > 0:
+            variables = [self[key] for key in ["time"] + self.thermo_keys]
+            self._writer = _BackgroundWriter(variables, queue_size)
+        else:
+            self._writer = None
 
         if zhalf is not None:
             self.zhalf = OutputVariable("zhalf", "m", [len(zhalf)])
@@ -163,6 +436,13 @@ class OutputThermodynamics:
         Returns:
             None
         """
+        if self._writer is not None:
+            # copy values so that thermo may change before the writer thread writes them
+            # (a single copy of the buffer for PackedThermodynamics)
+            assert tuple(self.thermo_keys) == thermo.packed_keys
+            self._writer.put([time, *thermo.pack()])
+            return
+
         self.time.write(time)
         self.temp.write(thermo.temp)
         self.rhod.write(thermo.rhod)
@@ -200,6 +480,73 @@ class OutputThermodynamics:
         """
         return getattr(self, key, None)
 
+    def get_state(self):
+        """Get the state of the output, e.g. for checkpointing.
+
+        Note the output streamed to outdir is not part of the state (only the position of
+        the next write and the buffer of each variable), whereas output stored in memory is.
+
+        Returns:
+            dict: State of time and thermodynamic variables (see OutputVariable.get_state),
+              e.g. state["temp/i"].
+        """
+        self.wait()
+        state = {}
+        for key in ["time"] + self.thermo_keys:
+            for name, value in self[key].get_state().items():
+                state[f"{key}/{name}"] = value
+        return state
+
+    def set_state(self, state):
+        """Set the state of the output, e.g. from a checkpoint, so that subsequent output
+        is written after the output written before the checkpoint (see get_state).
+
+        Parameters:
+            state (dict): State of time and thermodynamic variables (see get_state).
+        """
+        self.wait()
+        for key in ["time"] + self.thermo_keys:
+            names = ["i", "written", "allocated"]
+            self[key].set_state({name: state[f"{key}/{name}"] for name in names})
+
+    def member(self, m: int):
+        """Get the output of a single member of an ensemble.
+
+        For output with shape (ntime, nmembers, nz), this method returns an OutputThermodynamics
+        whose variables are views of shape (ntime, nz) onto the output of ensemble member m.
+
+        Parameters:
+            m (int): Index of the ensemble member.
+
+        Returns:
+            OutputThermodynamics: Output of ensemble member m.
+        """
+        self.wait()
+        member = copy(self)
+        member._writer = None
+        for key in self.thermo_keys:
+            var = self[key]
+            assert var.values.ndim == 3, "output has no ensemble axis"
+            member_var = OutputVariable(var.name, var.units, [0], dtype=var.dtype)
+            member_var.set(var.values[:, m])
+            setattr(member, key, member_var)
+        return member
+
+    def wait(self):
+        """Block until all the output queued for the background writer (if any) is written."""
+        if self._writer is not None:
+            self._writer.wait()
+
+    def close(self):
+        """Stop the background writer (if any) once it has written every slice in its queue and
+        flush the variables streamed to disk, e.g. so that no output is lost if a run is stopped
+        by an error. Called by finalize (and safe to call more than once)."""
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close()
+        for key in ["time"] + self.thermo_keys:
+            self[key].flush()
+
     def finalize(self):
         """Finalize the thermodynamics output.
 
@@ -210,6 +557,7 @@ class OutputThermodynamics:
         Returns:
             None
         """
+        self.close()
         self.time.finalize()
         self.temp.finalize()
         self.rhod.finalize()
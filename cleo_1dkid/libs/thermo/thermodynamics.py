@@ -8,19 +8,29 @@ Created Date: Wednesday 28th February 2024
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Monday 11th November 2024
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
 https://opensource.org/licenses/BSD-3-Clause
 -----
 File Description:
+classes storing the thermodynamic variables of the microphysics schemes in this project, either
+as separate arrays or packed into one contiguous buffer
 """
 
 import numpy as np
 from copy import deepcopy
 
 
+def _store(var, copy, dtype):
+    """returns variable to store in thermodynamics, i.e. a (deep) copy of var if copy is True
+    and a converted copy of var if its dtype differs from dtype (if dtype is not None)"""
+    if dtype is not None and np.asarray(var).dtype != dtype:
+        return np.array(var, dtype=dtype)
+    return deepcopy(var) if copy else var
+
+
 class Thermodynamics:
     """
     Class stores the thermodynamic variables required to run microphysics schemes in this project.
@@ -28,6 +38,13 @@ class Thermodynamics:
     Thermodynamic variables include pressure, temperature, moist air density and the specific
     content (mass mixing ratio) of vapour and condensates.
 
+    For a batched ensemble of columns, each variable may carry a leading ensemble axis, i.e.
+    have shape (nmembers, nz) instead of (nz,), for the same grid in every ensemble member.
+
+    The variables may be stored in single precision (dtype=np.float32) to halve their memory,
+    in which case values computed (in double precision) by e.g. the dynamics and microphysics
+    are rounded when they are copied into the variables. Note CleoSDM requires np.float64.
+
     Parameters:
       temp (np.ndarray):
         Temperature (K).
@@ -68,6 +85,21 @@ class Thermodynamics:
 
     """
 
+    __slots__ = ("temp", "rhod", "press", "massmix_ratios", "wvel", "uvel", "vvel")
+
+    # variables defined at the centres of gridboxes (in order of the arguments of __init__)
+    packed_keys = (
+        "temp",
+        "rhod",
+        "press",
+        "qvap",
+        "qcond",
+        "qice",
+        "qrain",
+        "qsnow",
+        "qgrau",
+    )
+
     def __init__(
         self,
         temp: np.ndarray,
@@ -82,8 +114,10 @@ class Thermodynamics:
         wvel: np.ndarray,
         uvel: np.ndarray,
         vvel: np.ndarray,
+        copy: bool = True,
+        dtype=None,
     ):
-        """Initialize a thermodynamics object with the given variables
+        """Initialize a thermodynamics object with (copies of) the given variables
 
         Parameters:
             press (np.ndarray): Pressure (Pa).
@@ -98,21 +132,79 @@ class Thermodynamics:
             wvel (np.ndarray): vertical wind velocity, 'z', (m/s)
             uvel (np.ndarray): zonal wind velocity, 'x', (m/s)
             vvel (np.ndarray): meridional wind velocity, 'y', (m/s)
+            copy (bool, optional): If False, the thermodynamics refer to the given arrays
+              instead of copies of them (e.g. to wrap existing arrays without allocating
+              memory) unless they must be converted to dtype. Defaults to True.
+            dtype (np.dtype, optional): dtype to store the variables with, e.g. np.float32.
+              Defaults to None (dtype of the given arrays).
         """
-        self.temp = deepcopy(temp)
-        self.rhod = deepcopy(rhod)
-        self.press = deepcopy(press)
+        self.temp = _store(temp, copy, dtype)
+        self.rhod = _store(rhod, copy, dtype)
+        self.press = _store(press, copy, dtype)
         self.massmix_ratios = {
-            "qvap": deepcopy(qvap),
-            "qcond": deepcopy(qcond),
-            "qice": deepcopy(qice),
-            "qrain": deepcopy(qrain),
-            "qsnow": deepcopy(qsnow),
-            "qgrau": deepcopy(qgrau),
+            "qvap": _store(qvap, copy, dtype),
+            "qcond": _store(qcond, copy, dtype),
+            "qice": _store(qice, copy, dtype),
+            "qrain": _store(qrain, copy, dtype),
+            "qsnow": _store(qsnow, copy, dtype),
+            "qgrau": _store(qgrau, copy, dtype),
         }
-        self.wvel = deepcopy(wvel)
-        self.uvel = deepcopy(uvel)
-        self.vvel = deepcopy(vvel)
+        self.wvel = _store(wvel, copy, dtype)
+        self.uvel = _store(uvel, copy, dtype)
+        self.vvel = _store(vvel, copy, dtype)
+
+    @property
+    def nmembers(self):
+        """Number of ensemble members, or None if variables have no ensemble axis."""
+        if np.ndim(self.temp) == 2:
+            return np.shape(self.temp)[0]
+        return None
+
+    @property
+    def dtype(self):
+        """dtype the variables are stored with."""
+        return self.temp.dtype
+
+    def get_state(self):
+        """returns dictionary of copies of all the thermodynamic variables (e.g. for checkpointing)"""
+        state = {
+            "temp": self.temp.copy(),
+            "rhod": self.rhod.copy(),
+            "press": self.press.copy(),
+            "wvel": self.wvel.copy(),
+            "uvel": self.uvel.copy(),
+            "vvel": self.vvel.copy(),
+        }
+        for key, value in self.massmix_ratios.items():
+            state[key] = value.copy()
+        return state
+
+    def set_state(self, state):
+        """copies values from dictionary of thermodynamic variables (e.g. from a checkpoint) into
+        the existing arrays so that addresses of arrays remain unchanged"""
+        self.temp[...] = state["temp"]
+        self.rhod[...] = state["rhod"]
+        self.press[...] = state["press"]
+        self.wvel[...] = state["wvel"]
+        self.uvel[...] = state["uvel"]
+        self.vvel[...] = state["vvel"]
+        for key, value in self.massmix_ratios.items():
+            value[...] = state[key]
+
+    def pack(self):
+        """returns copy of variables defined at the centres of gridboxes as one array with
+        shape (len(packed_keys), ...) in the order of packed_keys"""
+        return np.stack(
+            [self.temp, self.rhod, self.press] + self.unpack_massmix_ratios()
+        )
+
+    def unpack(self, packed):
+        """copies values from array with shape (len(packed_keys), ...) (see pack) into the
+        existing arrays of the variables defined at the centres of gridboxes"""
+        self.temp[...] = packed[0]
+        self.rhod[...] = packed[1]
+        self.press[...] = packed[2]
+        self.copy_massmix_ratios(*packed[3:])
 
     def print_state(self):
         print(self.temp)
@@ -134,3 +226,101 @@ class Thermodynamics:
         self.massmix_ratios["qrain"][:] = qrain
         self.massmix_ratios["qsnow"][:] = qsnow
         self.massmix_ratios["qgrau"][:] = qgrau
+
+
+class PackedThermodynamics(Thermodynamics):
+    """
+    Class stores the thermodynamic variables like Thermodynamics but with the variables defined
+    at the centres of gridboxes (temperature, density, pressure and mass mixing ratios) packed
+    into one contiguous buffer with shape (len(packed_keys), ...), i.e. (9, nz) or
+    (9, nmembers, nz) for an ensemble.
+
+    The attributes temp, rhod, press and massmix_ratios are named views onto rows of the buffer
+    whose addresses never change (as required e.g. by CleoSDM) and so the variables can be
+    copied (e.g. checkpointed, output or transferred to shared memory) by a single copy of the
+    buffer. Winds (which are not defined at the centres of gridboxes) are stored separately.
+
+    Parameters:
+      See Thermodynamics.
+      buffer (np.ndarray, optional):
+        Contiguous array with shape (len(packed_keys), ...) to store the variables in, e.g. in
+        shared memory. Defaults to None (buffer is allocated).
+    """
+
+    __slots__ = ("buffer",)
+
+    def __init__(
+        self,
+        temp: np.ndarray,
+        rhod: np.ndarray,
+        press: np.ndarray,
+        qvap: np.ndarray,
+        qcond: np.ndarray,
+        qice: np.ndarray,
+        qrain: np.ndarray,
+        qsnow: np.ndarray,
+        qgrau: np.ndarray,
+        wvel: np.ndarray,
+        uvel: np.ndarray,
+        vvel: np.ndarray,
+        buffer: np.ndarray = None,
+        copy: bool = True,
+        dtype=None,
+    ):
+        """Initialize a packed thermodynamics object with (copies of) the given variables.
+
+        Parameters:
+            See Thermodynamics.
+            buffer (np.ndarray, optional): Array to store the variables in. Defaults to None.
+            copy (bool, optional): If False, the winds are not copied (the other variables are
+              always copied into the buffer). Defaults to True.
+            dtype (np.dtype, optional): dtype of the buffer (and winds). Defaults to None
+              (dtype of the given buffer or else np.float64).
+        """
+        packed = (temp, rhod, press, qvap, qcond, qice, qrain, qsnow, qgrau)
+        shape = (len(self.packed_keys), *np.shape(temp))
+        if buffer is None:
+            buffer = np.empty(shape, dtype=np.float64 if dtype is None else dtype)
+        elif dtype is None:
+            dtype = buffer.dtype
+        assert buffer.shape == shape, "buffer must have one row per packed variable"
+        assert buffer.dtype == dtype and buffer.flags["C_CONTIGUOUS"]
+        for row, var in zip(buffer, packed):
+            row[...] = var
+        wvel = _store(wvel, copy, dtype)
+        uvel = _store(uvel, copy, dtype)
+        vvel = _store(vvel, copy, dtype)
+        self._set_views(buffer, wvel, uvel, vvel)
+
+    def _set_views(self, buffer, wvel, uvel, vvel):
+        self.buffer = buffer
+        self.temp, self.rhod, self.press = buffer[:3]
+        self.massmix_ratios = dict(zip(self.packed_keys[3:], buffer[3:]))
+        self.wvel = wvel
+        self.uvel = uvel
+        self.vvel = vvel
+
+    def __deepcopy__(self, memo):
+        """returns copy with its own buffer (so that its variables are views onto it)"""
+        copy = PackedThermodynamics.__new__(PackedThermodynamics)
+        copy._set_views(
+            self.buffer.copy(), self.wvel.copy(), self.uvel.copy(), self.vvel.copy()
+        )
+        return copy
+
+    def get_state(self):
+        """returns dictionary of copies of all the thermodynamic variables (e.g. for
+        checkpointing), variables defined at the centres of gridboxes are copied at once"""
+        state = dict(zip(self.packed_keys, self.pack()))
+        state["wvel"] = self.wvel.copy()
+        state["uvel"] = self.uvel.copy()
+        state["vvel"] = self.vvel.copy()
+        return state
+
+    def pack(self):
+        """returns copy of the buffer (see Thermodynamics.pack)"""
+        return self.buffer.copy()
+
+    def unpack(self, packed):
+        """copies values from array with shape (len(packed_keys), ...) into the buffer"""
+        self.buffer[...] = packed
@@ -21,6 +21,7 @@ path2cleo1dkid=$1
 path2build=$2
 start_id=$3 # inclusive start of run_ids
 end_id=$4 # inclusive end of run_ids
+batch_runs=${5:-FALSE} # (optional) "TRUE" runs all run_ids as one batched ensemble in one process
 path2cleopythonbindings="${path2build}/_deps/cleo-build/cleo_python_bindings"
 python="/work/bm1183/m300950/bin/envs/superdrops-in-action/bin/python"
 pythonlibs="/work/bm1183/m300950/bin/envs/superdrops-in-action/lib/python3.13/site-packages"
@@ -83,31 +84,62 @@ do
   do
     for l in "${!alphas[@]}"
     do
-      for m in "${run_ids[@]}"
-      do
-        alpha_string="${alphas[l]//./p}" # replace . with p for filename
-        label="n${nsupers_pergbxs[k]}_a${alpha_string}_r${m}"
-        config_filename="${configs_directory[i]}/config_${label}.yaml"
-        run_name="${run_labels[i]}_${label}"
+      if [[ "${batch_runs}" == "TRUE" ]]
+      then
+        ### all run_ids are run together as one batched ensemble in a single process
+        config_filenames=()
+        run_names=()
+        for m in "${run_ids[@]}"
+        do
+          alpha_string="${alphas[l]//./p}" # replace . with p for filename
+          label="n${nsupers_pergbxs[k]}_a${alpha_string}_r${m}"
+          config_filenames+=("${configs_directory[i]}/config_${label}.yaml")
+          run_names+=("${run_labels[i]}_${label}")
+        done
         binpath="${bin_directory[i]}"
         figpath="${fig_directory[i]}"
-        echo "---- src ${i}, run number: ${m}, numconc: ${numconc}cm^-3 ----"
+        echo "---- src ${i}, run numbers: ${run_ids[@]}, numconc: ${numconc}cm^-3 ----"
         echo "---- nsupers ${nsupers_pergbxs[k]}, alpha ${alphas[l]} ----"
-        echo "--run_name=${run_name}"
-        echo "--config_filename=${config_filename}"
+        echo "--run_name=${run_names[@]}"
+        echo "--config_filename=${config_filenames[@]}"
         echo "--figpath=${figpath}"
         echo "--path2cleopythonbindings=${path2cleopythonbindings}"
 
-        echo "${python} ${path2cleo1dkid}/scripts/run_cleo_1dkid.py --config_filename=${config_filename} [...]"
+        echo "${python} ${path2cleo1dkid}/scripts/run_cleo_1dkid.py --config_filename ${config_filenames[@]} [...]"
         ${python} ${path2cleo1dkid}/scripts/run_cleo_1dkid.py \
-          --run_name="${run_name}" \
-          --config_filename="${config_filename}" \
+          --run_name "${run_names[@]}" \
+          --config_filename "${config_filenames[@]}" \
           --binpath="${binpath}" \
           --figpath="${figpath}" \
           --path2cleopythonbindings="${path2cleopythonbindings}"
+      else
+        ### each run_id is run in its own process
+        for m in "${run_ids[@]}"
+        do
+          alpha_string="${alphas[l]//./p}" # replace . with p for filename
+          label="n${nsupers_pergbxs[k]}_a${alpha_string}_r${m}"
+          config_filename="${configs_directory[i]}/config_${label}.yaml"
+          run_name="${run_labels[i]}_${label}"
+          binpath="${bin_directory[i]}"
+          figpath="${fig_directory[i]}"
+          echo "---- src ${i}, run number: ${m}, numconc: ${numconc}cm^-3 ----"
+          echo "---- nsupers ${nsupers_pergbxs[k]}, alpha ${alphas[l]} ----"
+          echo "--run_name=${run_name}"
+          echo "--config_filename=${config_filename}"
+          echo "--figpath=${figpath}"
+          echo "--path2cleopythonbindings=${path2cleopythonbindings}"
+
+          echo "${python} ${path2cleo1dkid}/scripts/run_cleo_1dkid.py --config_filename=${config_filename} [...]"
+          ${python} ${path2cleo1dkid}/scripts/run_cleo_1dkid.py \
+            --run_name="${run_name}" \
+            --config_filename="${config_filename}" \
+            --binpath="${binpath}" \
+            --figpath="${figpath}" \
+            --path2cleopythonbindings="${path2cleopythonbindings}"
         done
-      done
+      fi
     done
+  done
   echo "---------------------------------------------------"
 done
 ### ---------------------------------------------------- ###
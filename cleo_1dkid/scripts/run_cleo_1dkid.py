@@ -13,32 +13,49 @@ https://opensource.org/licenses/BSD-3-Clause
 -----
 File Description:
 Run 1-D kid test case for CLEO SDM with only condensation/evaporation enabled
-or with precipitation enabled.
+or with precipitation enabled. If more than one config file is given, the runs are
+advanced together as one batched ensemble (one member per config) in a single process.
+
+Runs with CLEO cannot be checkpointed and restarted (unlike runs with the bulk scheme, see
+run_1dkid) because CLEO's python bindings cannot save or restore the state of its gridboxes and
+superdroplets.
 
 NOTE: script assumes CLEO's initial condition binary files already exist
 (i.e. 'dimlessGBxboundaries.dat' and 'dimlessSDsinit.dat' files, whose
-locations are given in CLEO's config file ('config_filename')
+locations are given in CLEO's config file ('config_filename'), unless --write_initsupers_binary
+is given, in which case the 'dimlessSDsinit.dat' files are written by this process before CLEO
+reads them.
 """
 
+import time
+
+start_imports = time.perf_counter()  # (for --startup_report)
 import argparse
+import gc
 import numpy as np
 import os
 import sys
+from contextlib import nullcontext
 from pathlib import Path
 from PyMPDATA_examples.Shipway_and_Hill_2012 import si
+import yaml
 
 parser = argparse.ArgumentParser()
 parser.add_argument(
     "--run_name",
     type=str,
-    default="cleo_fullscheme",
-    help="label for test run",
+    nargs="+",
+    default=["cleo_fullscheme"],
+    help="label for test run (one per config_filename for an ensemble)",
 )
 parser.add_argument(
     "--config_filename",
     type=Path,
-    default="/home/m/m300950/superdrops-in-action/cleo_1dkid/share/cleo_initial_conditions/1dkid/fullscheme/config.yaml",
-    help="path to configuration yaml for test run",
+    nargs="+",
+    default=[
+        "/home/m/m300950/superdrops-in-action/cleo_1dkid/share/cleo_initial_conditions/1dkid/fullscheme/config.yaml"
+    ],
+    help="path to configuration yaml for test run (one per member for an ensemble)",
 )
 parser.add_argument(
     "--binpath",
@@ -58,38 +75,148 @@ parser.add_argument(
     default="/work/bm1183/m300950/superdrops-in-action/cleo_1dkid/build/_deps/cleo-build/cleo_python_bindings",
     help="path to cleo_python_bindings python module",
 )
+parser.add_argument(
+    "--outdir",
+    type=Path,
+    default=None,
+    help="path to directory to stream thermodynamics output to (instead of keeping it in memory)",
+)
+parser.add_argument(
+    "--output_queue_size",
+    type=int,
+    default=0,
+    help="if > 0, number of timesteps of output queued for writing by a background thread",
+)
+parser.add_argument(
+    "--output_dtype",
+    type=str,
+    choices=["float64", "float32"],
+    default="float64",
+    help="dtype to store the thermodynamics output with (float32 halves its memory and disk)",
+)
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="save wall time spent in each phase of the timesteps as .json file in figpath",
+)
+parser.add_argument(
+    "--zero_copy",
+    action="store_true",
+    help="share memory between KiD dynamics and thermodynamics instead of copying each step",
+)
+parser.add_argument(
+    "--shadow_buffers",
+    action="store_true",
+    help="give CLEO persistent dimensionless copies of press, temp and winds (no in-place rescaling)",
+)
+parser.add_argument(
+    "--write_initsupers_binary",
+    action="store_true",
+    help="write initial superdroplets binary file of each config in this process (CLEO reads it)",
+)
+parser.add_argument(
+    "--observer_staging_dir",
+    type=Path,
+    default=None,
+    help="if given (e.g. /dev/shm), stage CLEO's zarr store here and flush it to zarrbasedir at the end",
+)
+parser.add_argument(
+    "--packed_thermo",
+    action="store_true",
+    help="store thermodynamics in one contiguous buffer (cannot be used with --zero_copy)",
+)
+parser.add_argument(
+    "--timestep",
+    type=float,
+    default=1.25,
+    help="timestep of coupling between KiD dynamics and CLEO [s], must equal CLEO's couplstep",
+)
+parser.add_argument(
+    "--max_courant",
+    type=float,
+    default=None,
+    help="if given, substep advection so Courant number is at most this (e.g. for a large timestep)",
+)
+parser.add_argument(
+    "--cache_dir",
+    type=Path,
+    default=None,
+    help="if given, cache the solved dry-air density profile of the KiD dynamics' settings here",
+)
+parser.add_argument(
+    "--startup_report",
+    action="store_true",
+    help="save wall time spent on imports, KiD dynamics, JIT and CLEO initialisation as .json file in figpath",
+)
 args = parser.parse_args()
 
 assert args.path2cleopythonbindings.is_dir()
 os.environ["CLEO_PYTHON_BINDINGS"] = str(args.path2cleopythonbindings)
 sys.path.append(str(Path(__file__).parent.parent))  # superdrops-in-action/cleo_1dkid/
 from libs.test_case_1dkid.perform_1dkid_test_case import perform_1dkid_test_case
-from libs.thermo.thermodynamics import Thermodynamics
-from libs.cleo_sdm.microphysics_scheme_wrapper import MicrophysicsSchemeWrapper
+from libs.test_case_1dkid.kid_dynamics import KiDDynamics
+from libs.test_case_1dkid.profiler import PhaseProfiler
+from libs.thermo.thermodynamics import Thermodynamics, PackedThermodynamics
+from libs.cleo_sdm.microphysics_scheme_wrapper import (
+    MicrophysicsSchemeWrapper,
+    EnsembleMicrophysicsSchemeWrapper,
+)
+from libs.cleo_sdm.superdrops_observer import (
+    superdrops_observer_settings,
+    decimate_superdrops_store,
+)
+
+### wall time of startup (before the first timestep) if required
+if args.startup_report:
+    startup = PhaseProfiler()
+    startup.record("imports", time.perf_counter() - start_imports)
+else:
+    startup = None
+
+
+def phase(name):
+    return nullcontext() if startup is None else startup.phase(name)
+
 
 ### label for test case to name data/plots with
 run_name = args.run_name
-config_filename = args.config_filename
+config_filename = [Path(c) for c in args.config_filename]
 binpath = args.binpath
 figpath = args.figpath
-assert config_filename.exists()
+assert len(run_name) == len(config_filename), "need one run_name per config_filename"
+assert all(c.exists() for c in config_filename)
 assert binpath.is_dir()
 assert figpath.is_dir()
+if args.observer_staging_dir is not None:
+    assert args.observer_staging_dir.is_dir()
+if args.write_initsupers_binary:
+    sys.path.append(
+        str(Path(__file__).parent.parent / "libs" / "cleo_sdm" / "initconds")
+    )
+    from initsupers_generator import write_initsupers_binary
+if args.zero_copy:
+    assert len(config_filename) == 1, "zero-copy coupling not possible for an ensemble"
+    assert not args.packed_thermo, "zero-copy coupling not possible for packed thermo"
 
 ### time and grid parameters
 # NOTE: these must be consistent with CLEO initial condition binary files(!)
 z_min = -25 * si.m  # (!) must be consistent with CLEO
 z_max = 3200 * si.m  # (!) must be consistent with CLEO
 z_delta = 25 * si.m  # (!) must be consistent with CLEO
-timestep = 1.25 * si.s
+timestep = args.timestep * si.s
 time_end = 60 * si.minutes
 
 ### initial thermodynamic conditions
 assert (z_max - z_min) % z_delta == 0, "z limit is not a multiple of the grid spacing."
 ngbxs = int((z_max - z_min) / z_delta)
-zeros = np.zeros(ngbxs)
+is_ensemble = len(config_filename) > 1
+if is_ensemble:
+    zeros = np.zeros((len(config_filename), ngbxs))
+else:
+    zeros = np.zeros(ngbxs)
 zeros2 = np.tile(zeros, 2)
-thermo_init = Thermodynamics(
+ThermodynamicsType = PackedThermodynamics if args.packed_thermo else Thermodynamics
+thermo_init = ThermodynamicsType(
     zeros,
     zeros,
     zeros,
@@ -104,12 +231,44 @@ thermo_init = Thermodynamics(
     zeros2,
 )
 
+### dynamics (created before microphysics in case thermo must be bound to its advectees)
+advect_hydrometeors = False
+with phase("KiDDynamics.__init__"):  # (mostly Settings)
+    kid_dynamics = KiDDynamics(
+        z_min,
+        z_max,
+        z_delta,
+        timestep,
+        time_end,
+        advect_hydrometeors=advect_hydrometeors,
+        nmembers=thermo_init.nmembers,
+        max_courant=args.max_courant,
+        cache_dir=args.cache_dir,
+    )
+    if args.zero_copy:
+        thermo_init = kid_dynamics.bind_thermo(thermo_init)
+with phase("KiDDynamics.warmup"):  # JIT of dynamics solver
+    kid_dynamics.warmup()
+
+### initial superdroplets (if not already created, e.g. by create_initsuperdropsbinary_script.py)
+if args.write_initsupers_binary:
+    with phase("write_initsupers_binary"):
+        for c in config_filename:
+            write_initsupers_binary(c, cache_dir=args.cache_dir)
+
 ### microphysics scheme to use (within a wrapper)
 is_motion = True
-microphys_scheme = MicrophysicsSchemeWrapper(
+t_start = 0.0
+if is_ensemble:
+    Wrapper = EnsembleMicrophysicsSchemeWrapper
+else:
+    Wrapper = MicrophysicsSchemeWrapper
+    config_filename = config_filename[0]
+    run_name = run_name[0]
+microphys_scheme = Wrapper(
     config_filename,
     is_motion,
-    0.0,
+    t_start,
     timestep,
     thermo_init.press,
     thermo_init.temp,
@@ -118,10 +277,17 @@ microphys_scheme = MicrophysicsSchemeWrapper(
     thermo_init.wvel,
     thermo_init.uvel,
     thermo_init.vvel,
+    profiler=startup,
+    shadow_buffers=args.shadow_buffers,
+    staging_dir=args.observer_staging_dir,
 )
 
+if startup is not None:
+    startup_name = run_name if isinstance(run_name, str) else run_name[0]
+    startup.print_totals()
+    startup.write_json(figpath / f"{startup_name}_startup.json")
+
 ### Perform test of 1-D KiD rainshaft model using chosen setup
-advect_hydrometeors = False
 out = perform_1dkid_test_case(
     z_min,
     z_max,
@@ -133,4 +299,23 @@ out = perform_1dkid_test_case(
     advect_hydrometeors,
     figpath,
     run_name,
+    outdir=args.outdir,
+    output_queue_size=args.output_queue_size,
+    profile=args.profile,
+    kid_dynamics=kid_dynamics,
+    output_dtype=np.dtype(args.output_dtype),
 )
+
+### decimate superdroplets observed by CLEO if required (see superdrops_observer_settings)
+del (
+    microphys_scheme
+)  # (CLEO's observers are destroyed, and stores flushed, by its finalize)
+gc.collect()
+for filename in args.config_filename:
+    with open(filename, "r") as file:
+        python_config = yaml.safe_load(file)
+    settings = superdrops_observer_settings(python_config)
+    if settings is not None:
+        zarrbasedir = python_config["outputdata"]["zarrbasedir"]
+        print(f"decimating superdroplets in {zarrbasedir} with settings: {settings}")
+        decimate_superdrops_store(zarrbasedir, settings)
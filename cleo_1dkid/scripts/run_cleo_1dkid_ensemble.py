@@ -0,0 +1,361 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: run_cleo_1dkid_ensemble.py
+Project: scripts
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+Create the input files for and then run a sweep of 1-D kid test cases for CLEO SDM over
+every combination of (src_config, nsupers, alpha, run_id) given in a YAML specification
+(e.g. "share/cleo_1dkid_ensemble.yaml"). Replaces the serial loops of
+"bash/inputfiles_cleo_1dkid.sh" and "bash/run_cleo_1dkid.sh".
+
+Members are run concurrently in a pool of processes: each process runs "run_cleo_1dkid.py"
+(CLEO's Kokkos can only be initialised once per process) for 'members_per_process' members
+with Kokkos 'num_threads' threads, and 'ncores // num_threads' processes run at once, each
+(optionally) pinned to its own cores. A manifest of the outputs of every member is written
+as JSON in the bin directory of the sweep. If 'write_initsupers_binary_in_run' is true, the
+binary file of the initial superdroplets of each member is written by the process which runs it
+instead of by a process of its own before the runs (its config and binary file are still needed).
+
+e.g. python run_cleo_1dkid_ensemble.py ../share/cleo_1dkid_ensemble.yaml --stage all
+"""
+
+import argparse
+import json
+import os
+import queue
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import yaml
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "spec_filename",
+    type=Path,
+    help="path to YAML specification of the sweep",
+)
+parser.add_argument(
+    "--stage",
+    type=str,
+    choices=["inputfiles", "run", "all"],
+    default="all",
+    help="create input files for sweep, run sweep, or both",
+)
+parser.add_argument(
+    "--isfigures",
+    type=str,
+    choices=["TRUE", "FALSE"],
+    default="FALSE",
+    help="make figures of initial conditions",
+)
+
+
+def create_sweep(spec):
+    """returns list of dictionaries of the parameters and filenames of every member of sweep"""
+    path2cleo1dkid = Path(spec["paths"]["path2cleo1dkid"])
+    path2build = Path(spec["paths"]["path2build"])
+    sweep = spec["sweep"]
+    numconc = sweep["numconc"]
+    start_id, end_id = sweep["run_ids"]  # inclusive start and end of run_ids
+
+    members = []
+    for runtype, src_config in sweep["src_configs"].items():
+        configs_directory = path2build / f"tmp_{numconc}cm3" / runtype
+        bin_directory = path2build / f"bin_{numconc}cm3" / runtype
+        for nsupers_pergbx in sweep["nsupers_pergbxs"]:
+            for alpha in sweep["alphas"]:
+                for run_id in range(start_id, end_id + 1):
+                    alpha_string = str(alpha).replace(".", "p")
+                    label = f"n{nsupers_pergbx}_a{alpha_string}_r{run_id}"
+                    members.append(
+                        {
+                            "runtype": runtype,
+                            "label": label,
+                            "run_name": f"{runtype}_{label}",
+                            "nsupers_pergbx": nsupers_pergbx,
+                            "alpha": alpha,
+                            "run_id": run_id,
+                            "src_config": str(path2cleo1dkid / src_config),
+                            "config_filename": str(
+                                configs_directory / f"config_{label}.yaml"
+                            ),
+                            "initsupers_filename": str(
+                                path2build
+                                / "share"
+                                / f"share_{numconc}cm3"
+                                / f"dimlessSDsinit_{label}.dat"
+                            ),
+                            "setup_filename": str(bin_directory / f"setup_{label}.txt"),
+                            "zarrbasedir": str(bin_directory / f"sol_{label}.zarr"),
+                            "binpath": str(bin_directory),
+                            "figpath": str(bin_directory),
+                        }
+                    )
+    return members
+
+
+def create_environment(spec, num_threads):
+    """returns copy of environment variables for running scripts in sweep"""
+    path2build = Path(spec["paths"]["path2build"])
+    path2cleo1dkid = Path(spec["paths"]["path2cleo1dkid"])
+    path2cleopythonbindings = (
+        path2build / "_deps" / "cleo-build" / "cleo_python_bindings"
+    )
+
+    env = dict(os.environ)
+    env["LD_LIBRARY_PATH"] = os.pathsep.join(
+        spec["paths"].get("ld_library_path", []) + [env.get("LD_LIBRARY_PATH", "")]
+    )
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(path2cleopythonbindings), str(path2cleo1dkid), env.get("PYTHONPATH", "")]
+    )
+    env["OMP_NUM_THREADS"] = str(num_threads)
+    return env
+
+
+def run_pool(commands, nprocesses, num_threads, pin_cores, env):
+    """Run commands in a pool of at most nprocesses concurrent processes.
+
+    Each command is run as its own process with its output written to its log file. If
+    pin_cores is True, each process is pinned to a set of num_threads cores that no other
+    process of the pool is using at the same time (by running it with taskset, rather than by
+    setting its affinity between fork and exec, which is not safe in the pool's threads).
+
+    Args:
+        commands (list): List of (command, logfile) tuples.
+        nprocesses (int): Maximum number of processes to run concurrently.
+        num_threads (int): Number of threads (and cores) of each process.
+        pin_cores (bool): If True pin each process to its own cores.
+        env (dict): Environment variables of processes.
+
+    Returns:
+        list: Dictionary of returncode and walltime of each command.
+    """
+    available_cores = sorted(os.sched_getaffinity(0))
+    if pin_cores:
+        assert nprocesses * num_threads <= len(available_cores), "not enough cores"
+    slots = queue.Queue()
+    for i in range(nprocesses):
+        slots.put(available_cores[i * num_threads : (i + 1) * num_threads])
+
+    def run_command(command, logfile):
+        cores = slots.get()
+        if pin_cores:
+            command = ["taskset", "-c", ",".join(str(c) for c in cores), *command]
+        try:
+            start = time.perf_counter()
+            with open(logfile, "w") as log:
+                result = subprocess.run(
+                    command,
+                    env=env,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                )
+            walltime = time.perf_counter() - start
+        finally:
+            slots.put(cores)
+        status = "done" if result.returncode == 0 else "FAILED"
+        print(f"{status} in {walltime:.1f}s: {logfile}")
+        return {"returncode": result.returncode, "walltime": walltime}
+
+    # threads only wait for their process to finish, the work is done in the processes
+    with ThreadPoolExecutor(max_workers=nprocesses) as executor:
+        results = executor.map(lambda c: run_command(*c), commands)
+        return list(results)
+
+
+def create_inputfiles(spec, members, isfigures):
+    """create config files for every member of sweep, the gridbox boundaries binary file and
+    the initial superdroplets binary file of every member (unless generated by its run)"""
+    path2cleo1dkid = Path(spec["paths"]["path2cleo1dkid"])
+    path2build = Path(spec["paths"]["path2build"])
+    path2initcondsscripts = path2cleo1dkid / "libs" / "cleo_sdm" / "initconds"
+    python = spec["paths"]["python"]
+    resources = spec["resources"]
+    ncores = resources["ncores"]
+    env = create_environment(spec, 1)
+
+    cleoconstants_filepath = path2build / "_deps" / "cleo-src" / "libs"
+    grid_filename = path2build / "share" / "dimlessGBxboundaries.dat"
+    grid_filename.parent.mkdir(parents=True, exist_ok=True)
+    for member in members:
+        for key in ["config_filename", "initsupers_filename", "setup_filename"]:
+            Path(member[key]).parent.mkdir(parents=True, exist_ok=True)
+    logpath = Path(members[0]["binpath"]).parent / "logs"
+    logpath.mkdir(parents=True, exist_ok=True)
+
+    print("--- create configuration files ---")
+    commands = []
+    for member in members:
+        command = [
+            python,
+            str(path2initcondsscripts / "create_config.py"),
+            member["src_config"],
+            member["config_filename"],
+            f"--cleoconstants_filepath={cleoconstants_filepath}",
+            f"--grid_filename={grid_filename}",
+            f"--initsupers_filename={member['initsupers_filename']}",
+            f"--setup_filename={member['setup_filename']}",
+            f"--zarrbasedir={member['zarrbasedir']}",
+            f"--nsupers_pergbx={member['nsupers_pergbx']}",
+            f"--alpha={member['alpha']}",
+            f"--numconc={spec['sweep']['numconc']}",
+            f"--num_threads={resources['num_threads']}",
+        ]
+        logfile = logpath / f"config_{member['run_name']}.log"
+        commands.append((command, logfile))
+    results = run_pool(commands, ncores, 1, False, env)
+    assert all(r["returncode"] == 0 for r in results), "creating config files failed"
+
+    print("--- create gridbox boundaries file ---")
+    # same gbxboundaries file for all members
+    command = [
+        python,
+        str(path2initcondsscripts / "create_gbxboundariesbinary_script.py"),
+        f"--config_filename={members[0]['config_filename']}",
+        f"--isfigures={isfigures}",
+        f"--figpath={grid_filename.parent}",
+        f"--figlabel=_{members[0]['label']}",
+    ]
+    logfile = logpath / "gbxboundaries.log"
+    results = run_pool([(command, logfile)], 1, 1, False, env)
+    assert results[0]["returncode"] == 0, "creating gridbox boundaries file failed"
+
+    if resources.get("write_initsupers_binary_in_run", False):
+        print("--- superdroplet initial conditions files are written by each run ---")
+        return
+
+    print("--- create superdroplet initial conditions files ---")
+    commands = []
+    is_plotted = set()  # never plot more than one realisation of SD initial conditions
+    for member in members:
+        key = (member["nsupers_pergbx"], member["alpha"])
+        sds_isfigures = isfigures if key not in is_plotted else "FALSE"
+        is_plotted.add(key)
+        command = [
+            python,
+            str(path2initcondsscripts / "create_initsuperdropsbinary_script.py"),
+            f"--config_filename={member['config_filename']}",
+            f"--isfigures={sds_isfigures}",
+            f"--figpath={Path(member['initsupers_filename']).parent}",
+            f"--figlabel=_{member['label']}",
+            f"--cache_dir={path2build / 'cache'}",
+        ]
+        logfile = logpath / f"initsupers_{member['run_name']}.log"
+        commands.append((command, logfile))
+    results = run_pool(commands, ncores, 1, False, env)
+    assert all(r["returncode"] == 0 for r in results), "creating SD files failed"
+
+
+def run_sweep(spec, members, manifest_filename):
+    """run every member of sweep in a pool of processes and write manifest of their outputs"""
+    path2cleo1dkid = Path(spec["paths"]["path2cleo1dkid"])
+    path2build = Path(spec["paths"]["path2build"])
+    path2cleopythonbindings = (
+        path2build / "_deps" / "cleo-build" / "cleo_python_bindings"
+    )
+    python = spec["paths"]["python"]
+    resources = spec["resources"]
+    num_threads = resources["num_threads"]
+    nprocesses = resources["ncores"] // num_threads
+    assert nprocesses > 0, "need num_threads <= ncores"
+    env = create_environment(spec, num_threads)
+    logpath = Path(members[0]["binpath"]).parent / "logs"
+    logpath.mkdir(parents=True, exist_ok=True)
+
+    # members with same runtype, nsupers and alpha can be batched together in a process
+    batches = []
+    for member in members:
+        previous = batches[-1][-1] if batches else None
+        is_same = previous is not None and all(
+            previous[key] == member[key]
+            for key in ["runtype", "nsupers_pergbx", "alpha"]
+        )
+        if is_same and len(batches[-1]) < resources["members_per_process"]:
+            batches[-1].append(member)
+        else:
+            batches.append([member])
+
+    commands = []
+    for batch in batches:
+        command = [
+            python,
+            str(path2cleo1dkid / "scripts" / "run_cleo_1dkid.py"),
+            "--run_name",
+            *[m["run_name"] for m in batch],
+            "--config_filename",
+            *[m["config_filename"] for m in batch],
+            f"--binpath={batch[0]['binpath']}",
+            f"--figpath={batch[0]['figpath']}",
+            f"--path2cleopythonbindings={path2cleopythonbindings}",
+            # every member shares the solved base-state profiles (see test_case_1dkid/settings.py)
+            f"--cache_dir={path2build / 'cache'}",
+        ]
+        if resources.get("write_initsupers_binary_in_run", False):
+            command.append("--write_initsupers_binary")
+        if resources.get("observer_staging_dir") is not None:
+            command.append(
+                f"--observer_staging_dir={resources['observer_staging_dir']}"
+            )
+        logfile = logpath / f"run_{batch[0]['run_name']}.log"
+        commands.append((command, logfile))
+
+    print(
+        f"--- running {len(members)} members in {len(batches)} processes, "
+        f"{nprocesses} at a time with {num_threads} threads each ---"
+    )
+    results = run_pool(commands, nprocesses, num_threads, resources["pin_cores"], env)
+
+    manifest = {"resources": resources, "processes": []}
+    for batch, (command, logfile), result in zip(batches, commands, results):
+        for m in batch:
+            m["figure"] = str(Path(m["figpath"]) / f"{m['run_name']}_moisture.png")
+        manifest["processes"].append(
+            {
+                "command": command,
+                "logfile": str(logfile),
+                "returncode": result["returncode"],
+                "walltime": result["walltime"],
+                "members": batch,
+            }
+        )
+    with open(manifest_filename, "w") as file:
+        json.dump(manifest, file, indent=2)
+    print("Manifest .json saved as: " + str(manifest_filename))
+
+    return all(r["returncode"] == 0 for r in results)
+
+
+def main():
+    args = parser.parse_args()
+    with open(args.spec_filename, "r") as file:
+        spec = yaml.safe_load(file)
+    members = create_sweep(spec)
+
+    if args.stage in ["inputfiles", "all"]:
+        create_inputfiles(spec, members, args.isfigures)
+
+    if args.stage in ["run", "all"]:
+        manifest_filename = (
+            Path(members[0]["binpath"]).parent
+            / f"manifest_{args.spec_filename.stem}.json"
+        )
+        is_success = run_sweep(spec, members, manifest_filename)
+        if not is_success:
+            print("some members failed, see their logfiles in the manifest")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: test_benchmark_1dkid.py
+Project: benchmarks
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+benchmarks of the Python hot paths of the 1-D KiD rainshaft model using the bulk scheme for
+condensation (i.e. without CLEO) for several numbers of gridboxes, nz. Results can be saved as
+JSON and compared between commits with pytest-benchmark, e.g.
+pytest cleo_1dkid/tests/benchmarks --benchmark-autosave --benchmark-storage=./build/benchmarks
+pytest cleo_1dkid/tests/benchmarks --benchmark-storage=./build/benchmarks --benchmark-compare
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import numpy as np
+from PyMPDATA_examples.Shipway_and_Hill_2012 import si
+
+from libs.test_case_1dkid.kid_dynamics import KiDDynamics
+from libs.test_case_1dkid.run_1dkid import run_1dkid
+from libs.test_case_1dkid.settings import Settings, exner_novapour
+from libs.thermo.thermodynamics import Thermodynamics
+from libs.thermo.output_thermodynamics import OutputThermodynamics
+from libs.pympdata_bulk.bulk_scheme_condensation import (
+    MicrophysicsSchemeWrapper,
+    bulk_scheme_condensation,
+)
+
+Z_MIN = 0 * si.m
+Z_MAX = 3200 * si.m
+NZS = [32, 128, 512]  # numbers of gridboxes to benchmark
+NZS_HIGHRES = [10**4, 10**5]  # numbers of gridboxes of high resolution columns
+
+
+def grid(nz):
+    """returns grid spacing and timestep for nz gridboxes (constant Courant number)"""
+    z_delta = (Z_MAX - Z_MIN) / nz
+    timestep = 1.25 * si.s * z_delta / (25 * si.m)
+    return z_delta, timestep
+
+
+def zero_thermo(nz):
+    """returns thermodynamics with zeros for nz gridboxes (and vertical wind)"""
+    zeros = np.zeros(nz)
+    null = np.array([])
+    return Thermodynamics(*([zeros] * 9), np.zeros(2 * nz), null, null)
+
+
+@pytest.fixture(scope="module")
+def kid_dynamics():
+    """returns function which returns KiD dynamics for nz gridboxes, created once per nz for
+    the benchmarks of this module (so their solvers are compiled once). The dynamics are
+    mutable, so every benchmark resets them in its setup (see KiDDynamics.reset)."""
+    dynamics = {}
+
+    def get(nz):
+        if nz not in dynamics:
+            z_delta, timestep = grid(nz)
+            dynamics[nz] = KiDDynamics(Z_MIN, Z_MAX, z_delta, timestep, 100 * timestep)
+        return dynamics[nz]
+
+    return get
+
+
+@pytest.mark.benchmark(group="Settings.__init__")
+@pytest.mark.parametrize("nz", NZS)
+def test_benchmark_settings(benchmark, nz):
+    z_delta, timestep = grid(nz)
+    benchmark.extra_info["nz"] = nz
+    settings = benchmark.pedantic(
+        Settings,
+        kwargs={
+            "dt": timestep,
+            "dz": z_delta,
+            "wmax_const": 3,
+            "tscale_const": 600,
+            "t_max": 100 * timestep,
+            "z_min": Z_MIN,
+            "z_max": Z_MAX,
+            "p_surf": 1000 * si.hPa,
+            "is_exner_novapour": False,
+            "is_exner_novapour_uniformrho": False,
+            "is_approx_drhod_dz": False,
+        },
+        rounds=1,
+        iterations=1,
+    )
+    assert settings.nz == nz
+
+
+@pytest.mark.benchmark(group="Settings.z2exner")
+@pytest.mark.parametrize("nz", NZS + NZS_HIGHRES)
+def test_benchmark_exner_novapour(benchmark, nz):
+    zfull = np.linspace(Z_MIN, Z_MAX, nz, endpoint=False) + (Z_MAX - Z_MIN) / nz / 2
+    theta = np.linspace(297.9, 312.66, nz)
+    benchmark.extra_info["nz"] = nz
+    exner = benchmark(exner_novapour, zfull, theta, 1000 * si.hPa)
+    assert np.all(np.diff(exner) < 0)
+
+
+@pytest.mark.benchmark(group="KiDDynamics.run")
+@pytest.mark.parametrize("nz", NZS)
+def test_benchmark_kid_dynamics_run(benchmark, kid_dynamics, nz):
+    dynamics = kid_dynamics(nz)
+    timestep = dynamics.settings.dt
+
+    def setup():
+        return (10 * timestep, timestep, dynamics.reset(zero_thermo(nz))), {}
+
+    benchmark.extra_info["nz"] = nz
+    thermo = benchmark.pedantic(dynamics.run, setup=setup, rounds=200)
+    assert np.all(np.isfinite(thermo.massmix_ratios["qvap"]))
+
+
+@pytest.mark.benchmark(group="KiDDynamics.set_thermo")
+@pytest.mark.parametrize("nz", NZS)
+def test_benchmark_kid_dynamics_set_thermo(benchmark, kid_dynamics, nz):
+    dynamics = kid_dynamics(nz)
+
+    def setup():
+        return (10 * dynamics.settings.dt, dynamics.reset(zero_thermo(nz))), {}
+
+    benchmark.extra_info["nz"] = nz
+    thermo = benchmark.pedantic(dynamics.set_thermo, setup=setup, rounds=200)
+    assert np.all(thermo.temp > 0)
+
+
+@pytest.mark.benchmark(group="bulk_scheme_condensation")
+@pytest.mark.parametrize("nz", NZS)
+def test_benchmark_bulk_scheme_condensation(benchmark, kid_dynamics, nz):
+    thermo = kid_dynamics(nz).reset(zero_thermo(nz))
+    qvap = thermo.massmix_ratios["qvap"] * 1.1  # supersaturated somewhere
+    qcond = thermo.massmix_ratios["qcond"]
+
+    def setup():
+        return (thermo.temp, thermo.press, qvap.copy(), qcond.copy()), {}
+
+    benchmark.extra_info["nz"] = nz
+    benchmark.pedantic(bulk_scheme_condensation, setup=setup, rounds=200)
+
+
+@pytest.mark.benchmark(group="OutputThermodynamics.output_thermodynamics")
+@pytest.mark.parametrize("nz", NZS)
+def test_benchmark_output_thermodynamics(benchmark, nz):
+    thermo = zero_thermo(nz)
+
+    def setup():
+        return (OutputThermodynamics((1, nz)), 0.0, thermo), {}
+
+    benchmark.extra_info["nz"] = nz
+    benchmark.pedantic(
+        OutputThermodynamics.output_thermodynamics, setup=setup, rounds=200
+    )
+
+
+@pytest.mark.benchmark(group="run_1dkid")
+@pytest.mark.parametrize("nz", NZS)
+def test_benchmark_run_1dkid(benchmark, kid_dynamics, nz):
+    z_delta, timestep = grid(nz)
+    nsteps = 50
+
+    def run():
+        return run_1dkid(
+            Z_MIN,
+            Z_MAX,
+            z_delta,
+            nsteps * timestep,
+            timestep,
+            zero_thermo(nz),
+            MicrophysicsSchemeWrapper(),
+            True,
+            kid_dynamics=kid_dynamics(nz),  # (reset by run_1dkid)
+        )
+
+    benchmark.extra_info["nz"] = nz
+    benchmark.extra_info["nsteps"] = nsteps
+    out = benchmark.pedantic(run, rounds=2, warmup_rounds=1)
+    assert out.qvap.values.shape == (nsteps + 1, nz)
@@ -0,0 +1,97 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: test_checkpoint.py
+Project: test_case_1dkid
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+test of checkpointing and restarting 1-D KiD rainshaft model using bulk scheme for condensation
+"""
+
+import numpy as np
+import pytest
+from PyMPDATA_examples.Shipway_and_Hill_2012 import si
+
+from libs.test_case_1dkid.kid_dynamics import KiDDynamics
+from libs.test_case_1dkid.run_1dkid import run_1dkid
+from libs.thermo.thermodynamics import Thermodynamics
+from libs.pympdata_bulk.bulk_scheme_condensation import (
+    MicrophysicsSchemeWrapper,
+)
+
+
+@pytest.mark.parametrize("is_outdir", [False, True])
+def test_restart_from_checkpoint(tmp_path, is_outdir):
+    """runs 1-D KiD rainshaft model with checkpoints and then resumes the run from its last
+    checkpoint and checks the output is the same as the output of the uninterrupted run (and, if
+    output is streamed to disk, that the checkpoint does not hold the output written so far).
+    """
+    ### time and grid parameters
+    z_min = 0 * si.m
+    z_max = 3200 * si.m
+    z_delta = 25 * si.m
+    timestep = 1.25 * si.s
+    time_end = 20 * timestep
+    checkpoint_interval = 8 * timestep
+    checkpoint_filename = tmp_path / "checkpoint.npz"
+    outdir = tmp_path if is_outdir else None
+
+    ### initial thermodynamic conditions
+    zeros = np.zeros(int((z_max - z_min) / z_delta))
+    null = np.array([])  # this microphysics test doesn't need winds
+
+    advect_hydrometeors = True
+    kid_dynamics = KiDDynamics(  # (reused by both runs)
+        z_min,
+        z_max,
+        z_delta,
+        timestep,
+        time_end,
+        advect_hydrometeors=advect_hydrometeors,
+    )
+    thermo_init = Thermodynamics(*([zeros] * 9), null, null, null)
+    out = run_1dkid(
+        z_min,
+        z_max,
+        z_delta,
+        time_end,
+        timestep,
+        thermo_init,
+        MicrophysicsSchemeWrapper(),
+        advect_hydrometeors,
+        checkpoint_filename=checkpoint_filename,
+        checkpoint_interval=checkpoint_interval,
+        outdir=outdir,
+        kid_dynamics=kid_dynamics,
+    )
+    assert checkpoint_filename.exists()
+    expected = {var: np.array(out[var].values) for var in ["time"] + out.thermo_keys}
+    if is_outdir:
+        with np.load(checkpoint_filename) as checkpoint:
+            assert checkpoint["out/temp/i"] == 17
+            assert len(checkpoint["out/temp/written"]) == 1  # (16 timesteps in outdir)
+
+    thermo_init = Thermodynamics(*([zeros] * 9), null, null, null)
+    out_restart = run_1dkid(
+        z_min,
+        z_max,
+        z_delta,
+        time_end,
+        timestep,
+        thermo_init,
+        MicrophysicsSchemeWrapper(),
+        advect_hydrometeors,
+        restart_filename=checkpoint_filename,
+        outdir=outdir,
+        kid_dynamics=kid_dynamics,
+    )
+
+    for var in ["time"] + out.thermo_keys:
+        assert np.all(out_restart[var].values == expected[var])
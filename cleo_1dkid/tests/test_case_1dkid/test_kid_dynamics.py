@@ -0,0 +1,183 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: test_kid_dynamics.py
+Project: test_case_1dkid
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+tests of the KiD dynamics of the 1-D KiD rainshaft model
+"""
+
+import numpy as np
+from PyMPDATA_examples.Shipway_and_Hill_2012 import si
+
+from libs.test_case_1dkid.kid_dynamics import KiDDynamics
+from libs.thermo.thermodynamics import Thermodynamics
+
+
+def test_kid_dynamics_rhod_w_table():
+    """checks the default table of the prescribed momentum flux matches the sinusoid of the
+    settings and that the dynamics with a table of zero momentum flux leave qvap unchanged.
+    """
+    ### time and grid parameters
+    z_min = 0 * si.m
+    z_max = 3200 * si.m
+    z_delta = 25 * si.m
+    timestep = 1.25 * si.s
+    nsteps = 10
+    time_end = nsteps * timestep
+
+    nz = int((z_max - z_min) / z_delta)
+    zeros = np.zeros(nz)
+    null = np.array([])
+    thermo = Thermodynamics(*([zeros] * 9), np.zeros(2 * nz), null, null)
+
+    kid_dynamics = KiDDynamics(z_min, z_max, z_delta, timestep, time_end)
+    for n in range(nsteps):
+        rhod_w = kid_dynamics.settings.rhod_w((n + 0.5) * timestep)
+        assert kid_dynamics.rhod_w_table[n] == rhod_w
+
+    kid_dynamics = KiDDynamics(
+        z_min, z_max, z_delta, timestep, time_end, rhod_w_table=np.zeros(nsteps)
+    )
+    thermo = kid_dynamics.set_thermo(0.0, thermo)
+    qvap0 = thermo.massmix_ratios["qvap"].copy()
+    for n in range(nsteps):
+        thermo = kid_dynamics.run(n * timestep, timestep, thermo)
+    assert np.all(thermo.massmix_ratios["qvap"] == qvap0)
+    assert np.all(thermo.wvel == 0.0)
+
+
+def test_kid_dynamics_lazy_hydrometeors():
+    """checks hydrometeors of lazy KiD dynamics are only advected after they become non-zero
+    and that the dynamics are then the same as without lazy hydrometeors.
+    """
+    ### time and grid parameters
+    z_min = 0 * si.m
+    z_max = 3200 * si.m
+    z_delta = 25 * si.m
+    timestep = 1.25 * si.s
+    nsteps = 10
+    time_end = nsteps * timestep
+
+    nz = int((z_max - z_min) / z_delta)
+    null = np.array([])
+    thermos, dynamics = [], []
+    for lazy_hydrometeors in [True, False]:
+        thermos.append(Thermodynamics(*np.zeros((9, nz)), np.zeros(2 * nz), null, null))
+        dynamics.append(
+            KiDDynamics(
+                z_min,
+                z_max,
+                z_delta,
+                timestep,
+                time_end,
+                lazy_hydrometeors=lazy_hydrometeors,
+            )
+        )
+        thermos[-1] = dynamics[-1].set_thermo(0.0, thermos[-1])
+
+    for n in range(nsteps):
+        for d, kid_dynamics in enumerate(dynamics):
+            thermo = kid_dynamics.run(n * timestep, timestep, thermos[d])
+            if n == nsteps // 2:
+                thermo.massmix_ratios["qrain"][nz // 2] = 1e-3  # e.g. from microphysics
+            kid_dynamics.set_advectees(thermo)
+
+        lazy = dynamics[0].mpdata
+        if n < nsteps // 2:
+            assert lazy.active_fields == {"qvap"}
+            assert len(lazy.solvers) == 1
+        else:
+            assert lazy.active_fields == {"qvap", "qrain"}
+            assert len(lazy.solvers) == 2
+        for field in lazy.fields:
+            assert np.all(
+                thermos[0].massmix_ratios[field] == thermos[1].massmix_ratios[field]
+            )
+    assert np.any(thermos[0].massmix_ratios["qrain"] != 0.0)
+
+
+def test_kid_dynamics_reset():
+    """checks KiD dynamics can be reused for several runs, that warming them up does
+    not change their state nor is their solver's kernel compiled again when hydrometeors are
+    activated part way through a run, and that after reset they repeat the same run exactly.
+    """
+    ### time and grid parameters
+    z_min = 0 * si.m
+    z_max = 3200 * si.m
+    z_delta = 25 * si.m
+    timestep = 1.25 * si.s
+    nsteps = 10
+    time_end = nsteps * timestep
+
+    nz = int((z_max - z_min) / z_delta)
+    null = np.array([])
+    kid_dynamics = KiDDynamics(z_min, z_max, z_delta, timestep, time_end)
+
+    results = []
+    for run in range(2):
+        thermo = Thermodynamics(*np.ones((9, nz)), np.zeros(2 * nz), null, null)
+        thermo = kid_dynamics.reset(thermo)
+        state = kid_dynamics.get_state()
+        kid_dynamics.warmup()  # (compiles solvers without advancing them)
+        for field in kid_dynamics.mpdata.fields:
+            assert np.all(kid_dynamics.get_state()[field] == state[field])
+        assert kid_dynamics.mpdata.active_fields == {"qvap"}
+        assert np.all(thermo.massmix_ratios["qrain"] == 0.0)
+        # (PyMPDATA's numba dispatcher of the kernel has one signature per compilation)
+        kernel = kid_dynamics.mpdata._stepper._Stepper__call
+        nsignatures = len(kernel.signatures)
+        for n in range(nsteps):
+            thermo = kid_dynamics.run(n * timestep, timestep, thermo)
+            if n == nsteps // 2:
+                thermo.massmix_ratios["qrain"][nz // 2] = 1e-3  # e.g. from microphysics
+            kid_dynamics.set_advectees(thermo)
+        assert "qrain" in kid_dynamics.mpdata.active_fields
+        assert len(kernel.signatures) == nsignatures
+        results.append(kid_dynamics.get_state())
+
+    for field in kid_dynamics.mpdata.fields:
+        assert np.all(results[0][field] == results[1][field])
+    assert np.any(results[0]["qrain"] != 0.0)
+
+
+def test_kid_dynamics_max_courant():
+    """checks KiD dynamics with a timestep too large for stable advection substep the advection
+    so that qvap stays within its initial bounds and is close to qvap of dynamics with a small
+    timestep.
+    """
+    ### time and grid parameters
+    z_min = 0 * si.m
+    z_max = 3200 * si.m
+    z_delta = 25 * si.m
+    time_end = 600 * si.s
+
+    nz = int((z_max - z_min) / z_delta)
+    null = np.array([])
+    qvaps = []
+    for timestep, max_courant in [(1.25 * si.s, None), (10 * si.s, 0.5)]:
+        kid_dynamics = KiDDynamics(
+            z_min, z_max, z_delta, timestep, time_end, max_courant=max_courant
+        )
+        thermo = Thermodynamics(*np.zeros((9, nz)), null, null, null)
+        thermo = kid_dynamics.reset(thermo)
+        qvap0 = thermo.massmix_ratios["qvap"].copy()
+        for n in range(kid_dynamics.settings.nt):
+            thermo = kid_dynamics.run(n * timestep, timestep, thermo)
+        qvaps.append(thermo.massmix_ratios["qvap"])
+
+    rhod_min = np.min(kid_dynamics.settings.rhod(kid_dynamics.zhalf))
+    courant = np.abs(kid_dynamics.GC_table) / rhod_min
+    assert np.max(courant) > 1.0
+    assert np.all(courant / kid_dynamics.nsubsteps_table <= 0.5)
+    assert np.max(kid_dynamics.nsubsteps_table) > 1
+    assert np.all(qvaps[1] <= np.max(qvap0)) and np.all(qvaps[1] >= np.min(qvap0))
+    assert np.allclose(qvaps[1], qvaps[0], rtol=0.0, atol=1e-2 * np.max(qvap0))
@@ -0,0 +1,93 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: test_profiler.py
+Project: test_case_1dkid
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+test of profiling the timesteps of 1-D KiD rainshaft model using bulk scheme for condensation
+"""
+
+import json
+import numpy as np
+from PyMPDATA_examples.Shipway_and_Hill_2012 import si
+
+from libs.test_case_1dkid.profiler import PhaseProfiler
+from libs.test_case_1dkid.run_1dkid import run_1dkid
+from libs.thermo.thermodynamics import Thermodynamics
+from libs.pympdata_bulk.bulk_scheme_condensation import (
+    MicrophysicsSchemeWrapper,
+)
+
+
+def test_profile_1dkid(tmp_path):
+    """runs 1-D KiD rainshaft model with a profiler and checks every phase of every timestep
+    is recorded in the .json file of the profile.
+    """
+    ### time and grid parameters
+    z_min = 0 * si.m
+    z_max = 3200 * si.m
+    z_delta = 25 * si.m
+    timestep = 1.25 * si.s
+    nsteps = 10
+    time_end = nsteps * timestep
+
+    ### initial thermodynamic conditions
+    zeros = np.zeros(int((z_max - z_min) / z_delta))
+    null = np.array([])  # this microphysics test doesn't need winds
+
+    advect_hydrometeors = True
+    thermo_init = Thermodynamics(*([zeros] * 9), null, null, null)
+    profiler = PhaseProfiler()
+    run_1dkid(
+        z_min,
+        z_max,
+        z_delta,
+        time_end,
+        timestep,
+        thermo_init,
+        MicrophysicsSchemeWrapper(),
+        advect_hydrometeors,
+        profiler=profiler,
+    )
+
+    filename = tmp_path / "profile.json"
+    profiler.write_json(filename, nbins=5)
+    with open(filename, "r") as file:
+        summary = json.load(file)
+
+    phases = [
+        "kid_dynamics.run",
+        "microphys_scheme.run",
+        "kid_dynamics.set_advectees",
+        "out.output_thermodynamics",
+    ]
+    assert sorted(summary["phases"].keys()) == sorted(phases)
+    for phase in summary["phases"].values():
+        assert phase["ncalls"] == nsteps
+        assert sum(phase["histogram"]["counts"]) == nsteps
+        assert len(phase["histogram"]["bin_edges"]) == 5 + 1
+    total = sum(phase["total"] for phase in summary["phases"].values())
+    assert np.isclose(summary["total"], total)
+
+
+def test_profiler_record():
+    """checks wall times measured outside of the profiler (e.g. of imports) are recorded
+    alongside phases timed by the profiler."""
+    profiler = PhaseProfiler()
+    profiler.record("imports", 2.0)
+    with profiler.phase("KiDDynamics.warmup"):
+        pass
+
+    summary = profiler.summary(nbins=1)
+    assert summary["phases"]["imports"]["ncalls"] == 1
+    assert summary["phases"]["imports"]["total"] == 2.0
+    assert summary["phases"]["KiDDynamics.warmup"]["ncalls"] == 1
+    assert np.isclose(summary["phases"]["imports"]["fraction"] * summary["total"], 2.0)
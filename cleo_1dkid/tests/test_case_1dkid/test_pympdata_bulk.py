@@ -8,7 +8,7 @@ Created Date: Monday 2nd September 2024
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Wednesday 4th June 2025
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -22,11 +22,14 @@ import numpy as np
 from pathlib import Path
 from PyMPDATA_examples.Shipway_and_Hill_2012 import si
 
-from libs.test_case_1dkid.perform_1dkid_test_case import perform_1dkid_test_case
-from libs.thermo.thermodynamics import Thermodynamics
-from libs.pympdata_bulk.bulk_scheme_condensation import (
-    MicrophysicsSchemeWrapper,
+from libs.test_case_1dkid.perform_1dkid_test_case import (
+    perform_1dkid_test_case,
+    plot_1dkid_moisture,
 )
+from libs.test_case_1dkid.kid_dynamics import KiDDynamics
+from libs.test_case_1dkid.run_1dkid import run_1dkid
+from libs.thermo.thermodynamics import Thermodynamics
+from libs.pympdata_bulk.bulk_scheme_condensation import MicrophysicsSchemeWrapper
 
 
 @pytest.fixture(scope="module")
@@ -93,3 +96,158 @@ def test_pympdata_bulk_scheme_1dkid(figpath):
         figpath,
         run_name,
     )
+
+
+def test_pympdata_bulk_scheme_1dkid_ensemble():
+    """runs a batched ensemble of the 1-D KiD rainshaft model using bulk scheme for
+    condensation and checks each ensemble member matches a run without an ensemble axis.
+    """
+    ### time and grid parameters
+    z_min = 0 * si.m
+    z_max = 3200 * si.m
+    z_delta = 25 * si.m
+    timestep = 1.25 * si.s
+    time_end = 10 * timestep
+
+    ### initial thermodynamic conditions
+    nz = int((z_max - z_min) / z_delta)
+    nmembers = 3
+    null = np.array([])  # this microphysics test doesn't need winds
+    zeros = np.zeros(nz)
+    thermo_single = Thermodynamics(*([zeros] * 9), null, null, null)
+    zeros = np.zeros((nmembers, nz))
+    null = np.zeros((nmembers, 0))
+    thermo_ensemble = Thermodynamics(*([zeros] * 9), null, null, null)
+    assert thermo_single.nmembers is None
+    assert thermo_ensemble.nmembers == nmembers
+
+    advect_hydrometeors = True
+    out_single = run_1dkid(
+        z_min,
+        z_max,
+        z_delta,
+        time_end,
+        timestep,
+        thermo_single,
+        MicrophysicsSchemeWrapper(),
+        advect_hydrometeors,
+    )
+    out_ensemble = run_1dkid(
+        z_min,
+        z_max,
+        z_delta,
+        time_end,
+        timestep,
+        thermo_ensemble,
+        MicrophysicsSchemeWrapper(),
+        advect_hydrometeors,
+    )
+
+    assert out_ensemble.qvap.values.shape == (11, nmembers, nz)
+    for m in range(nmembers):
+        member = out_ensemble.member(m)
+        for var in ["temp", "rhod", "press", "qvap", "qcond"]:
+            assert np.allclose(
+                member[var].values, out_single[var].values, rtol=1e-12, atol=0.0
+            )
+
+
+def test_pympdata_bulk_scheme_1dkid_zero_copy():
+    """runs the 1-D KiD rainshaft model using bulk scheme for condensation with thermo bound to
+    the advectees of the KiD dynamics and checks it matches a run which copies thermo.
+    """
+    ### time and grid parameters
+    z_min = 0 * si.m
+    z_max = 3200 * si.m
+    z_delta = 25 * si.m
+    timestep = 1.25 * si.s
+    time_end = 10 * timestep
+
+    ### initial thermodynamic conditions
+    zeros = np.zeros(int((z_max - z_min) / z_delta))
+    null = np.array([])  # this microphysics test doesn't need winds
+
+    advect_hydrometeors = True
+    thermo_copy = Thermodynamics(*([zeros] * 9), null, null, null)
+    out_copy = run_1dkid(
+        z_min,
+        z_max,
+        z_delta,
+        time_end,
+        timestep,
+        thermo_copy,
+        MicrophysicsSchemeWrapper(),
+        advect_hydrometeors,
+    )
+
+    thermo_bound = Thermodynamics(*([zeros] * 9), null, null, null)
+    kid_dynamics = KiDDynamics(
+        z_min,
+        z_max,
+        z_delta,
+        timestep,
+        time_end,
+        advect_hydrometeors=advect_hydrometeors,
+    )
+    thermo_bound = kid_dynamics.bind_thermo(thermo_bound)
+    qvap = thermo_bound.massmix_ratios["qvap"]
+    out_bound = run_1dkid(
+        z_min,
+        z_max,
+        z_delta,
+        time_end,
+        timestep,
+        thermo_bound,
+        MicrophysicsSchemeWrapper(in_place=True),
+        advect_hydrometeors,
+        kid_dynamics=kid_dynamics,
+    )
+
+    assert thermo_bound.massmix_ratios["qvap"] is qvap
+    assert np.shares_memory(qvap, kid_dynamics.mpdata["qvap"][0].data)
+    for var in ["time"] + out_copy.thermo_keys:
+        assert np.all(out_bound[var].values == out_copy[var].values)
+
+
+def test_pympdata_bulk_scheme_1dkid_float32(tmp_path):
+    """runs the 1-D KiD rainshaft model using bulk scheme for condensation with thermodynamics
+    and output stored in single precision and checks it is close to a run in double precision
+    and that its output can be plotted.
+    """
+    ### time and grid parameters
+    z_min = 0 * si.m
+    z_max = 3200 * si.m
+    z_delta = 25 * si.m
+    timestep = 1.25 * si.s
+    time_end = 10 * timestep
+
+    ### initial thermodynamic conditions
+    zeros = np.zeros(int((z_max - z_min) / z_delta))
+    null = np.array([])  # this microphysics test doesn't need winds
+
+    advect_hydrometeors = True
+    outs = []
+    for dtype in [np.float64, np.float32]:
+        thermo = Thermodynamics(*([zeros] * 9), null, null, null, dtype=dtype)
+        outs.append(
+            run_1dkid(
+                z_min,
+                z_max,
+                z_delta,
+                time_end,
+                timestep,
+                thermo,
+                MicrophysicsSchemeWrapper(in_place=True),
+                advect_hydrometeors,
+                output_dtype=dtype,
+            )
+        )
+
+    assert outs[1].time.values.dtype == np.float64
+    for var in outs[0].thermo_keys:
+        assert outs[1][var].values.dtype == np.float32
+        assert np.allclose(
+            outs[1][var].values, outs[0][var].values, rtol=1e-5, atol=1e-12
+        )
+    plot_1dkid_moisture(outs[1], z_min, z_max, z_delta, tmp_path, "float32")
+    assert (tmp_path / "float32_moisture.png").exists()
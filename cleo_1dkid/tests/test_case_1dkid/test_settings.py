@@ -0,0 +1,113 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: test_settings.py
+Project: test_case_1dkid
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+tests of the settings (base-state profiles) of the 1-D KiD rainshaft model
+"""
+
+import numpy as np
+from PyMPDATA_examples.Shipway_and_Hill_2012 import si
+from PyMPDATA_examples.Shipway_and_Hill_2012.formulae import const
+
+import libs.test_case_1dkid.settings as settings_module
+from libs.test_case_1dkid.settings import Settings, exner_novapour
+
+
+def settings(cache_dir=None, is_exner_novapour=False):
+    return Settings(
+        dt=1.25 * si.s,
+        dz=25 * si.m,
+        wmax_const=3,
+        tscale_const=600,
+        t_max=100 * si.s,
+        z_min=0 * si.m,
+        z_max=3200 * si.m,
+        p_surf=1000 * si.hPa,
+        is_exner_novapour=is_exner_novapour,
+        is_exner_novapour_uniformrho=False,
+        is_approx_drhod_dz=False,
+        cache_dir=cache_dir,
+    )
+
+
+def test_settings_dqv0_dz():
+    """checks the analytic derivative of the initial qvap profile matches finite differences
+    of the profile (away from the breakpoints of the piecewise linear profile)"""
+    z = np.array([-100.0, 10.0, 500.0, 739.0, 741.0, 2000.0, 3259.0, 4000.0])
+    dz = 0.5
+    qv0 = settings().qv0
+    finite_differences = (qv0(z + dz) - qv0(z - dz)) / (2 * dz)
+    assert np.allclose(settings().dqv0_dz(z), finite_differences, rtol=1e-12, atol=0)
+
+
+def test_settings_cache_dir(tmp_path):
+    """checks the solved density profile is saved in the cache directory once and that
+    settings which read it from the cache have the same profiles as settings which do not."""
+    z = np.arange(12.5, 3200, 25.0)
+    expected = settings()
+
+    for _ in range(2):
+        cached = settings(cache_dir=str(tmp_path))
+        assert len(list(tmp_path.iterdir())) == 1
+        assert np.all(cached.rhod(z) == expected.rhod(z))
+        assert np.all(cached.temp(z) == expected.temp(z))
+        assert np.all(cached.press0(z) == expected.press0(z))
+    (filename,) = tmp_path.iterdir()
+    assert filename.name.startswith(f"rhod_v{settings_module.RHOD_PROFILE_VERSION}_")
+
+
+def test_settings_cache_dir_version(tmp_path, monkeypatch):
+    """checks a profile cached by a different version of the solution is not read"""
+    settings(cache_dir=str(tmp_path))
+    (filename,) = tmp_path.iterdir()
+    np.save(filename, np.zeros_like(np.load(filename)))
+
+    monkeypatch.setattr(
+        settings_module,
+        "RHOD_PROFILE_VERSION",
+        settings_module.RHOD_PROFILE_VERSION + 1,
+    )
+    z = np.arange(12.5, 3200, 25.0)
+    assert np.all(settings(cache_dir=str(tmp_path)).rhod(z) == settings().rhod(z))
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_settings_exner_novapour():
+    """checks the vectorised Exner function matches the loops over k of the original KiD
+    implementation and that the profiles of settings with is_exner_novapour are consistent"""
+    z = np.arange(12.5, 3200, 25.0)
+    p_surf = 1000 * si.hPa
+    p_ref = 100000.0
+    r_on_cp = const.Rd / const.c_pd
+    theta = settings()._th(z)
+
+    nz = len(z)
+    dexner = np.zeros(nz)
+    dexner[0] = const.g * z[0] / (const.c_pd * theta[0])
+    for k in range(1, nz):
+        dexner[k] = (
+            const.g * (z[k] - z[k - 1]) / (const.c_pd * 0.5 * (theta[k] + theta[k - 1]))
+        )
+    expected = np.zeros(nz)
+    expected[-1] = (p_surf / p_ref) ** r_on_cp - np.sum(dexner)
+    for k in range(nz - 2, -1, -1):
+        expected[k] = expected[k + 1] + dexner[k]
+
+    exner = exner_novapour(z, theta, p_surf, p_ref)
+    assert np.allclose(exner, expected, rtol=1e-14, atol=0)
+
+    exner_settings = settings(is_exner_novapour=True)
+    press = exner_settings.press(z, None)
+    assert np.allclose(press, p_ref * exner ** (1.0 / r_on_cp), rtol=1e-14, atol=0)
+    assert np.all(exner_settings.temp(z) == theta * exner)
+    assert np.all(exner_settings.press(z, None) == press)  # (from cache)
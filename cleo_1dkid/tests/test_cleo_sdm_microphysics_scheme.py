@@ -8,7 +8,7 @@ Created Date: Monday 23rd June 2025
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Tuesday 1st July 2025
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -259,6 +259,158 @@ def _test_microphys_with_wrapper(path2cleopythonbindings, config_filename):
     return 0
 
 
+def _test_microphys_with_shadow_buffers(path2cleopythonbindings, config_filename):
+    os.environ["CLEO_PYTHON_BINDINGS"] = str(path2cleopythonbindings)
+
+    from libs.cleo_sdm.microphysics_scheme_wrapper import MicrophysicsSchemeWrapper
+    from libs.thermo.thermodynamics import Thermodynamics
+
+    yaml = YAML()
+    with open(config_filename, "r") as file:
+        python_config = yaml.load(file)
+
+    t_start = 0
+    timestep = python_config["timesteps"]["COUPLTSTEP"]  # [s]
+    is_motion = python_config["python_bindings_setup"]["is_motion"]
+    ngbxs = python_config["domain"]["ngbxs"]
+    temp = np.tile(np.array([288.15], dtype=np.float64), ngbxs)
+    press = np.tile(np.array([101325], dtype=np.float64), ngbxs)
+    qvap = np.tile(np.array([0.015], dtype=np.float64), ngbxs)
+    qcond = np.tile(np.array([0.0001], dtype=np.float64), ngbxs)
+    other = np.tile(np.array([0.0], dtype=np.float64), ngbxs)
+    wvel = np.tile(np.array([-1.2, 1.0], dtype=np.float64), ngbxs)
+    uvel = np.tile(np.array([-0.1, 0.2], dtype=np.float64), ngbxs)
+    vvel = np.tile(np.array([0.0, 0.0], dtype=np.float64), ngbxs)
+
+    thermos, wrappers = [], []
+    for shadow_buffers in [False, True]:
+        thermo = Thermodynamics(
+            temp,
+            other,
+            press,
+            qvap,
+            qcond,
+            other,
+            other,
+            other,
+            other,
+            wvel,
+            uvel,
+            vvel,
+        )
+        wrappers.append(
+            MicrophysicsSchemeWrapper(
+                config_filename,
+                is_motion,
+                t_start,
+                timestep,
+                thermo.press,
+                thermo.temp,
+                thermo.massmix_ratios["qvap"],
+                thermo.massmix_ratios["qcond"],
+                thermo.wvel,
+                thermo.uvel,
+                thermo.vvel,
+                do_init=False,
+                shadow_buffers=shadow_buffers,
+            )
+        )
+        thermos.append(thermo)
+
+    for thermo, wrapper in zip(thermos, wrappers):
+        assert wrapper.run(timestep, thermo) is thermo
+
+    assert np.all(thermos[1].press == press)  # (never rescaled in place)
+    assert np.all(thermos[1].wvel == wvel)
+    assert np.allclose(thermos[1].press, thermos[0].press, rtol=1e-15, atol=0.0)
+    assert np.allclose(thermos[1].temp, thermos[0].temp, rtol=1e-15, atol=0.0)
+    for q0, q1 in zip(
+        thermos[0].unpack_massmix_ratios(), thermos[1].unpack_massmix_ratios()
+    ):
+        assert np.all(abs(q0 - q1) < 1e-24)
+
+    return 0
+
+
+def _test_microphys_run_many(path2cleopythonbindings, config_filename):
+    os.environ["CLEO_PYTHON_BINDINGS"] = str(path2cleopythonbindings)
+
+    from libs.cleo_sdm.microphysics_scheme_wrapper import MicrophysicsSchemeWrapper
+    from libs.thermo.thermodynamics import Thermodynamics
+
+    yaml = YAML()
+    with open(config_filename, "r") as file:
+        python_config = yaml.load(file)
+
+    t_start = 0
+    nsteps = 3
+    timestep = python_config["timesteps"]["COUPLTSTEP"]  # [s]
+    is_motion = python_config["python_bindings_setup"]["is_motion"]
+    ngbxs = python_config["domain"]["ngbxs"]
+    temp = np.tile(np.array([288.15], dtype=np.float64), ngbxs)
+    press = np.tile(np.array([101325], dtype=np.float64), ngbxs)
+    qvap = np.tile(np.array([0.015], dtype=np.float64), ngbxs)
+    qcond = np.tile(np.array([0.0001], dtype=np.float64), ngbxs)
+    other = np.tile(np.array([0.0], dtype=np.float64), ngbxs)
+    wvel = np.tile(np.array([-1.2, 1.0], dtype=np.float64), ngbxs)
+    uvel = np.tile(np.array([-0.1, 0.2], dtype=np.float64), ngbxs)
+    vvel = np.tile(np.array([0.0, 0.0], dtype=np.float64), ngbxs)
+    rng = np.random.default_rng(seed=0)
+    press_table = press * (1.0 + 0.01 * rng.random((nsteps, ngbxs)))  # [Pa]
+
+    thermos, wrappers = [], []
+    for _ in range(2):
+        thermo = Thermodynamics(
+            temp,
+            other,
+            press,
+            qvap,
+            qcond,
+            other,
+            other,
+            other,
+            other,
+            wvel,
+            uvel,
+            vvel,
+        )
+        wrappers.append(
+            MicrophysicsSchemeWrapper(
+                config_filename,
+                is_motion,
+                t_start,
+                timestep,
+                thermo.press,
+                thermo.temp,
+                thermo.massmix_ratios["qvap"],
+                thermo.massmix_ratios["qcond"],
+                thermo.wvel,
+                thermo.uvel,
+                thermo.vvel,
+                do_init=False,
+                shadow_buffers=True,
+            )
+        )
+        thermos.append(thermo)
+
+    for n in range(nsteps):
+        thermos[0].press[:] = press_table[n]
+        thermos[0] = wrappers[0].run(timestep, thermos[0])
+    result = wrappers[1].run_many(
+        timestep, nsteps, thermos[1], forcing_table={"press": press_table}
+    )
+    assert result is thermos[1]
+
+    assert np.all(thermos[1].press == press_table[-1])
+    assert np.allclose(thermos[1].temp, thermos[0].temp, rtol=1e-15, atol=0.0)
+    for q0, q1 in zip(
+        thermos[0].unpack_massmix_ratios(), thermos[1].unpack_massmix_ratios()
+    ):
+        assert np.all(abs(q0 - q1) < 1e-24)
+
+    return 0
+
+
 def test_cleo_sdm(path2cleopythonbindings, config_filename):
     os.environ["CLEO_PYTHON_BINDINGS"] = str(path2cleopythonbindings)
 
@@ -269,12 +421,16 @@ def test_cleo_sdm(path2cleopythonbindings, config_filename):
     config = cleo.Config(str(config_filename))
     cleo.cleo_initialize(config)
 
-    returns = [1] * 5
+    returns = [1] * 7
     returns[0] = _test_mpi_is_initialised()
     returns[1] = _test_initialize(path2cleopythonbindings, config_filename)
     returns[2] = _test_initialize_wrapper(path2cleopythonbindings, config_filename)
     returns[3] = _test_finalize_wrapper(path2cleopythonbindings, config_filename)
     returns[4] = _test_microphys_with_wrapper(path2cleopythonbindings, config_filename)
+    returns[5] = _test_microphys_with_shadow_buffers(
+        path2cleopythonbindings, config_filename
+    )
+    returns[6] = _test_microphys_run_many(path2cleopythonbindings, config_filename)
 
     for r in range(len(returns)):
         assert returns[r] == 0, f"test {r} failed"
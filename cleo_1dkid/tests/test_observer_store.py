@@ -0,0 +1,92 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: test_observer_store.py
+Project: tests
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+tests of the staging of the zarr store of CLEO SDM's observers (which do not need CLEO's
+python bindings)
+"""
+
+import numpy as np
+import pytest
+
+from libs.cleo_sdm.observer_store import (
+    staged_store_path,
+    check_flush_destination,
+    flush_store,
+    _flush_chunks,
+)
+
+
+def test_staged_store_path(tmp_path):
+    staged = staged_store_path(tmp_path, "members/run0/sol.zarr")
+    assert staged.parent == tmp_path
+    assert staged.name.endswith("_sol.zarr")
+    assert staged == staged_store_path(tmp_path, "members/run0/sol.zarr")
+    assert staged != staged_store_path(tmp_path, "members/run1/sol.zarr")
+
+
+def test_check_flush_destination(tmp_path):
+    staged = staged_store_path(tmp_path / "staging", tmp_path / "sol.zarr")
+    check_flush_destination(staged, tmp_path / "sol.zarr")
+    (tmp_path / "sol.zarr").mkdir()
+    check_flush_destination(staged, tmp_path / "sol.zarr")
+
+    (tmp_path / "sol.zarr" / ".zgroup").touch()
+    with pytest.raises(FileExistsError):
+        check_flush_destination(staged, tmp_path / "sol.zarr")
+    for zarrbasedir in [staged, staged / "sol.zarr", tmp_path / "staging", tmp_path]:
+        with pytest.raises(ValueError):
+            check_flush_destination(staged, zarrbasedir)
+
+
+def test_flush_chunks():
+    assert _flush_chunks((), 100) == ()
+    assert _flush_chunks((1000,), 100) == (100,)
+    assert _flush_chunks((10,), 100) == (10,)
+    assert _flush_chunks((1000, 30), 100) == (3, 30)
+    assert _flush_chunks((1000, 300), 100) == (1, 300)
+    assert _flush_chunks((0, 30), 100) == (1, 30)
+
+
+def test_flush_store(tmp_path):
+    zarr = pytest.importorskip("zarr")
+
+    staged = staged_store_path(tmp_path / "staging", tmp_path / "sol.zarr")
+    source = zarr.open_group(str(staged), mode="w")
+    source.attrs["title"] = "test"
+    array = source.create_dataset(
+        "temp", data=np.arange(60.0).reshape(20, 3), chunks=(1, 3)
+    )
+    array.attrs["units"] = "K"
+    source.create_dataset("time", data=np.arange(23.0), chunks=(4,))
+    source.create_dataset("nz", data=np.array(3), shape=())
+
+    flush_store(staged, tmp_path / "sol.zarr", maxchunk=30)
+    assert not staged.exists()
+    dest = zarr.open_consolidated(str(tmp_path / "sol.zarr"), mode="r")
+    assert dest.attrs["title"] == "test"
+    assert dest["temp"].chunks == (10, 3)
+    assert dest["temp"].attrs["units"] == "K"
+    assert np.all(dest["temp"][:] == np.arange(60.0).reshape(20, 3))
+    assert dest["time"].chunks == (23,)
+    assert np.all(dest["time"][:] == np.arange(23.0))
+    assert dest["nz"][...] == 3
+
+    staged = staged_store_path(tmp_path / "staging", tmp_path / "sol.zarr")
+    zarr.open_group(str(staged), mode="w")
+    with pytest.raises(FileExistsError):
+        flush_store(staged, tmp_path / "sol.zarr")
+    assert staged.exists()
+    assert np.all(
+        zarr.open_group(str(tmp_path / "sol.zarr"))["temp"][:] == dest["temp"][:]
+    )
@@ -0,0 +1,231 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: test_output_thermodynamics.py
+Project: tests
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+test of storing thermodynamics output in memory and streaming it to disk
+"""
+
+import numpy as np
+
+from libs.thermo import formulae
+from libs.thermo.thermodynamics import Thermodynamics
+from libs.thermo.output_thermodynamics import OutputThermodynamics
+
+
+def test_output_thermodynamics_on_disk(tmp_path):
+    """writes random thermodynamics to output in memory and to output streamed to disk (with
+    a buffer which does not divide the number of timesteps) and checks the outputs are equal
+    """
+    ntime, nz = 11, 8
+    rng = np.random.default_rng(seed=0)
+    null = np.array([])
+
+    out_mem = OutputThermodynamics((ntime, nz))
+    out_disk = OutputThermodynamics((ntime, nz), outdir=tmp_path, buffer_size=3)
+    for t in range(ntime):
+        thermo = Thermodynamics(*rng.random((9, nz)), null, null, null)
+        out_mem.output_thermodynamics(t, thermo)
+        out_disk.output_thermodynamics(t, thermo)
+    out_mem.finalize()
+    out_disk.finalize()
+
+    for var in ["time"] + out_mem.thermo_keys:
+        assert (tmp_path / f"{var}.npy").exists()
+        assert isinstance(out_disk[var].values, np.memmap)
+        assert np.all(out_disk[var].values == out_mem[var].values)
+        assert np.all(np.load(tmp_path / f"{var}.npy") == out_mem[var].values)
+
+
+def test_output_thermodynamics_restart(tmp_path):
+    """checkpoints output streamed to disk part way through, continues writing it and then
+    (as if the run was interrupted) resumes it from the checkpoint and checks the output equals
+    the output of an uninterrupted run and that the checkpoint only holds the buffer"""
+    ntime, nz = 11, 8
+    rng = np.random.default_rng(seed=0)
+    null = np.array([])
+    sparse_keys = ("qcond", "qice")
+
+    thermos = []
+    for t in range(ntime):
+        thermo = Thermodynamics(*rng.random((9, nz)), null, null, null)
+        thermo.massmix_ratios["qcond"][:] *= t > 6
+        thermo.massmix_ratios["qice"][:] = 0.0
+        thermos.append(thermo)
+
+    out_mem = OutputThermodynamics((ntime, nz))
+    for t, thermo in enumerate(thermos):
+        out_mem.output_thermodynamics(t, thermo)
+    out_mem.finalize()
+
+    out_disk = OutputThermodynamics(
+        (ntime, nz), outdir=tmp_path, buffer_size=3, sparse_keys=sparse_keys
+    )
+    for t, thermo in enumerate(thermos[:9]):
+        out_disk.output_thermodynamics(t, thermo)
+        if t == 4:
+            state = out_disk.get_state()
+    del out_disk  # (interrupted after writing output after the checkpoint)
+
+    assert state["temp/i"] == 5 and len(state["temp/written"]) == 2
+    assert not state["qcond/allocated"] and len(state["qcond/written"]) == 0
+
+    out_restart = OutputThermodynamics(
+        (ntime, nz),
+        outdir=tmp_path,
+        buffer_size=3,
+        sparse_keys=sparse_keys,
+        restart=True,
+    )
+    out_restart.set_state(state)
+    for t, thermo in enumerate(thermos[5:], start=5):
+        out_restart.output_thermodynamics(t, thermo)
+    out_restart.finalize()
+
+    for var in ["time"] + out_mem.thermo_keys:
+        assert np.all(out_restart[var].values == out_mem[var].values)
+        assert np.all(np.load(tmp_path / f"{var}.npy") == out_mem[var].values)
+
+
+def test_output_thermodynamics_close(tmp_path):
+    """writes part of the output (as if a run is stopped by an error) with a background writer
+    and checks closing the output stops the writer and writes every slice output so far"""
+    ntime, nz, nwritten = 11, 8, 7
+    rng = np.random.default_rng(seed=0)
+    null = np.array([])
+
+    out_mem = OutputThermodynamics((ntime, nz))
+    out_disk = OutputThermodynamics(
+        (ntime, nz), outdir=tmp_path, buffer_size=3, queue_size=4
+    )
+    for t in range(nwritten):
+        thermo = Thermodynamics(*rng.random((9, nz)), null, null, null)
+        out_mem.output_thermodynamics(t, thermo)
+        out_disk.output_thermodynamics(t, thermo)
+
+    writer = out_disk._writer
+    out_disk.close()
+    out_disk.close()
+    assert not writer.thread.is_alive()
+    for var in ["time"] + out_mem.thermo_keys:
+        values = np.load(tmp_path / f"{var}.npy")
+        assert np.all(values[:nwritten] == out_mem[var].values[:nwritten])
+
+
+def test_output_thermodynamics_background_writer(tmp_path):
+    """writes thermodynamics which change in place to output in memory and to output streamed to
+    disk by a background thread and checks the outputs are equal
+    """
+    ntime, nz = 11, 8
+    rng = np.random.default_rng(seed=0)
+    null = np.array([])
+
+    out_mem = OutputThermodynamics((ntime, nz))
+    out_disk = OutputThermodynamics(
+        (ntime, nz), outdir=tmp_path, buffer_size=3, queue_size=2
+    )
+    thermo = Thermodynamics(*np.zeros((9, nz)), null, null, null)
+    for t in range(ntime):
+        values = rng.random((9, nz))
+        thermo.temp[:], thermo.rhod[:], thermo.press[:] = values[:3]
+        thermo.copy_massmix_ratios(*values[3:])
+        out_mem.output_thermodynamics(t, thermo)
+        out_disk.output_thermodynamics(t, thermo)
+        if t == ntime // 2:
+            state = out_disk.get_state()
+            written = state["qvap/written"]  # (buffer not yet written to disk)
+            assert state["qvap/i"] == t + 1
+            assert np.all(written == out_mem.qvap.values[t + 1 - len(written) : t + 1])
+    out_mem.finalize()
+    out_disk.finalize()
+
+    for var in ["time"] + out_mem.thermo_keys:
+        assert np.all(out_disk[var].values == out_mem[var].values)
+
+
+def test_output_thermodynamics_sparse(tmp_path):
+    """writes thermodynamics where qcond becomes non-zero part way through and qice stays zero
+    to output in memory and to output with sparse qcond and qice (in memory and on disk) and
+    checks the outputs are equal and that qice is never allocated in memory
+    """
+    ntime, nz = 11, 8
+    rng = np.random.default_rng(seed=0)
+    null = np.array([])
+    sparse_keys = ("qcond", "qice")
+
+    out_mem = OutputThermodynamics((ntime, nz))
+    out_sparse = OutputThermodynamics((ntime, nz), sparse_keys=sparse_keys)
+    out_disk = OutputThermodynamics(
+        (ntime, nz), outdir=tmp_path, buffer_size=3, sparse_keys=sparse_keys
+    )
+    for t in range(ntime):
+        thermo = Thermodynamics(*rng.random((9, nz)), null, null, null)
+        thermo.massmix_ratios["qcond"][:] *= t > ntime // 2
+        thermo.massmix_ratios["qice"][:] = 0.0
+        out_mem.output_thermodynamics(t, thermo)
+        out_sparse.output_thermodynamics(t, thermo)
+        out_disk.output_thermodynamics(t, thermo)
+    assert out_sparse.qice.values.strides == (0, 0)
+    assert out_sparse.qcond.values.strides != (0, 0)
+    out_mem.finalize()
+    out_sparse.finalize()
+    out_disk.finalize()
+
+    for var in ["time"] + out_mem.thermo_keys:
+        assert np.all(out_sparse[var].values == out_mem[var].values)
+        assert np.all(out_disk[var].values == out_mem[var].values)
+        assert np.all(np.load(tmp_path / f"{var}.npy") == out_mem[var].values)
+
+
+def test_output_thermodynamics_float32(tmp_path):
+    """writes double precision thermodynamics to output stored in single precision (in memory,
+    sparse and on disk) and checks the outputs are the rounded values using half the memory,
+    and that supersaturation can be calculated from either output"""
+    ntime, nz = 11, 8
+    rng = np.random.default_rng(seed=0)
+    null = np.array([])
+
+    out_mem = OutputThermodynamics((ntime, nz))
+    out_float32 = OutputThermodynamics(
+        (ntime, nz), sparse_keys=("qice",), dtype=np.float32
+    )
+    out_disk = OutputThermodynamics(
+        (ntime, nz), outdir=tmp_path, buffer_size=3, queue_size=2, dtype=np.float32
+    )
+    for t in range(ntime):
+        thermo = Thermodynamics(*rng.random((9, nz)), null, null, null)
+        thermo.massmix_ratios["qice"][:] = 0.0
+        out_mem.output_thermodynamics(t + 0.1, thermo)
+        out_float32.output_thermodynamics(t + 0.1, thermo)
+        out_disk.output_thermodynamics(t + 0.1, thermo)
+    out_mem.finalize()
+    out_float32.finalize()
+    out_disk.finalize()
+
+    assert out_float32.time.values.dtype == np.float64
+    assert np.all(out_float32.time.values == out_mem.time.values)
+    for var in out_mem.thermo_keys:
+        expected = out_mem[var].values.astype(np.float32)
+        assert out_float32[var].values.dtype == np.float32
+        assert np.all(out_float32[var].values == expected)
+        assert np.load(tmp_path / f"{var}.npy").dtype == np.float32
+        assert np.all(out_disk[var].values == expected)
+    assert out_float32.temp.values.nbytes == out_mem.temp.values.nbytes // 2
+
+    supersat = formulae.supersaturation(
+        out_mem.temp.values, out_mem.press.values, out_mem.qvap.values
+    )
+    supersat_float32 = formulae.supersaturation(
+        out_float32.temp.values, out_float32.press.values, out_float32.qvap.values
+    )
+    assert supersat_float32.dtype == np.float64
+    assert np.allclose(supersat_float32, supersat, rtol=1e-6, atol=0.0)
@@ -8,7 +8,7 @@ Created Date: Wednesday 4th September 2024
 Author: Clara Bayley (CB)
 Additional Contributors:
 -----
-Last Modified: Wednesday 4th September 2024
+Last Modified: Saturday 17th October 2026
 Modified By: CB
 -----
 License: BSD 3-Clause "New" or "Revised" License
@@ -19,6 +19,7 @@ unit tests for bulk microphysics scheme from pyMPDATA
 """
 
 import numpy as np
+import tracemalloc
 
 from libs.pympdata_bulk.bulk_scheme_condensation import (
     bulk_scheme_condensation,
@@ -89,3 +90,90 @@ def test_microphys_with_wrapper():
     result = microphys_wrapped.run(timestep, thermo)
 
     assert result.unpack_massmix_ratios() == [qv, qc, qice, qrain, qsnow, qgrau]
+
+
+def test_microphys_with_wrapper_in_place_no_thermo_deepcopy():
+    """checks the in-place wrapper updates thermo itself the same as the wrapper which copies
+    it and that running it does not deepcopy thermo. Note it is not allocation-free: the
+    scheme's formulae still allocate temporary arrays (at most 4 of nz values at once)."""
+    nz = 10000
+    rng = np.random.default_rng(seed=0)
+    temp = 280 + 10 * rng.random(nz)
+    rho = np.ones(nz)
+    press = 90000 + 10000 * rng.random(nz)
+    qvap = 0.02 * rng.random(nz)  # supersaturated in places
+    qcond, qice, qrain, qsnow, qgrau = np.zeros((5, nz))
+    null = np.array([])  # this microphysics test doesn't need winds
+    variables = [
+        temp,
+        rho,
+        press,
+        qvap,
+        qcond,
+        qice,
+        qrain,
+        qsnow,
+        qgrau,
+        null,
+        null,
+        null,
+    ]
+
+    thermo = Thermodynamics(*variables)
+    thermo_no_copy = Thermodynamics(*variables, copy=False)
+    assert thermo_no_copy.massmix_ratios["qvap"] is qvap
+
+    result = MicrophysicsSchemeWrapper().run(1.0, thermo)
+    microphys_in_place = MicrophysicsSchemeWrapper(in_place=True)
+    assert microphys_in_place.run(1.0, thermo_no_copy) is thermo_no_copy
+    assert np.any(qcond > 0.0)
+    assert np.all(qvap == result.massmix_ratios["qvap"])
+    assert np.all(qcond == result.massmix_ratios["qcond"])
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(100):
+            thermo_no_copy = microphys_in_place.run(1.0, thermo_no_copy)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert (
+        peak - before < 5 * temp.nbytes
+    )  # i.e. temporaries, not a copy of thermo's 9 arrays
+
+
+def test_microphys_with_wrapper_single_precision():
+    """checks the adjustment of thermo stored in single precision is computed in double
+    precision, i.e. equals the adjustment of the same values in double precision rounded to
+    single precision (with or without copying thermo)"""
+    nz = 1000
+    rng = np.random.default_rng(seed=0)
+    temp = 280 + 10 * rng.random(nz)
+    press = 90000 + 10000 * rng.random(nz)
+    qvap = 0.02 * rng.random(nz)  # supersaturated in places
+    qcond = 0.0001 * rng.random(nz)
+    zeros = np.zeros(nz)
+    null = np.array([])  # this microphysics test doesn't need winds
+    variables = [temp, zeros, press, qvap, qcond, zeros, zeros, zeros, zeros]
+
+    for in_place in [False, True]:
+        thermo32 = Thermodynamics(*variables, null, null, null, dtype=np.float32)
+        thermo64 = Thermodynamics(
+            thermo32.temp,
+            thermo32.rhod,
+            thermo32.press,
+            *thermo32.unpack_massmix_ratios(),
+            null,
+            null,
+            null,
+            dtype=np.float64,
+        )
+        qcond = thermo64.massmix_ratios["qcond"].copy()
+        result32 = MicrophysicsSchemeWrapper(in_place=in_place).run(1.0, thermo32)
+        result64 = MicrophysicsSchemeWrapper(in_place=in_place).run(1.0, thermo64)
+        assert np.any(result64.massmix_ratios["qcond"] > qcond)
+        for key in ["qvap", "qcond"]:
+            assert result32.massmix_ratios[key].dtype == np.float32
+            expected = result64.massmix_ratios[key].astype(np.float32)
+            assert np.all(result32.massmix_ratios[key] == expected)
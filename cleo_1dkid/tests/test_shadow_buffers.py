@@ -0,0 +1,93 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: test_shadow_buffers.py
+Project: tests
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+tests of the dimensionless copies of thermodynamics given to CLEO SDM and of their forcing
+(which do not need CLEO's python bindings)
+"""
+
+import numpy as np
+import pytest
+
+from libs.cleo_sdm.shadow_buffers import DimensionlessBuffers
+from libs.thermo.thermodynamics import Thermodynamics
+
+
+def thermodynamics(nz, rng):
+    temp = 280 + 10 * rng.random(nz)
+    press = 90000 + 10000 * rng.random(nz)
+    zeros = np.zeros(nz)
+    wvel = rng.random(nz + 1)
+    return Thermodynamics(
+        temp, zeros, press, zeros, zeros, zeros, zeros, zeros, zeros, wvel, wvel, wvel
+    )
+
+
+def test_dimensionless_buffers_forcing():
+    """checks the forcing of each timestep is copied dimensionless into the shadows and that
+    thermo is given CLEO's temperature and the last timestep of the other forced variables"""
+    nz, nsteps = 10, 3
+    rng = np.random.default_rng(seed=0)
+    thermo = thermodynamics(nz, rng)
+    press, wvel = thermo.press.copy(), thermo.wvel.copy()
+    shadows = DimensionlessBuffers(
+        thermo.press,
+        thermo.temp,
+        thermo.wvel,
+        thermo.uvel,
+        thermo.vvel,
+        1e5,
+        273.15,
+        2.0,
+    )
+    forcing_table = {
+        "press": 90000 + 10000 * rng.random((nsteps, nz)),
+        "uvel": rng.random((nsteps, nz + 1)),
+    }
+    forcing = shadows.check_forcing(forcing_table, nsteps)
+
+    shadows.scale_from(thermo)
+    for n in range(nsteps):
+        shadows.force(forcing, n)
+        assert np.all(shadows.press == forcing_table["press"][n] / 1e5)
+        assert np.all(shadows.uvel == forcing_table["uvel"][n] / 2.0)
+        assert np.all(shadows.wvel == wvel / 2.0)  # (not forced)
+        shadows.temp += 0.001  # e.g. CLEO's latent heating
+    assert np.all(thermo.press == press)  # (thermo not changed until unscaled)
+
+    shadows.unscale_to(thermo, forcing)
+    assert np.all(thermo.press == forcing_table["press"][-1])
+    assert np.all(thermo.uvel == forcing_table["uvel"][-1])
+    assert np.all(thermo.wvel == wvel)
+    assert np.all(thermo.temp == shadows.temp * 273.15)
+
+
+def test_dimensionless_buffers_check_forcing():
+    nz, nsteps = 10, 3
+    thermo = thermodynamics(nz, np.random.default_rng(seed=0))
+    shadows = DimensionlessBuffers(
+        thermo.press,
+        thermo.temp,
+        thermo.wvel,
+        thermo.uvel,
+        thermo.vvel,
+        1e5,
+        273.15,
+        1.0,
+    )
+    with pytest.raises(ValueError):
+        shadows.check_forcing({"qvap": np.zeros((nsteps, nz))}, nsteps)
+    with pytest.raises(ValueError):
+        shadows.check_forcing({"press": np.zeros((nsteps + 1, nz))}, nsteps)
+    with pytest.raises(ValueError):
+        shadows.check_forcing({"wvel": np.zeros((nsteps, nz))}, nsteps)
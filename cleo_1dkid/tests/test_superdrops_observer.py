@@ -0,0 +1,122 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: test_superdrops_observer.py
+Project: tests
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+tests of the settings for, and decimation of, the superdroplets observed by CLEO SDM
+(which do not need CLEO's python bindings)
+"""
+
+import numpy as np
+import pytest
+
+from libs.cleo_sdm.superdrops_observer import (
+    superdrops_observer_settings,
+    decimate_superdrops,
+    decimate_superdrops_store,
+)
+
+
+def test_superdrops_observer_settings():
+    python_config = {"python_bindings": {"enable_condensation": True}}
+    assert superdrops_observer_settings(python_config) is None
+    python_config["python_bindings"]["superdrops_observer"] = {"interval": 1}
+    assert superdrops_observer_settings(python_config) is None
+    python_config["python_bindings"]["superdrops_observer"] = {"fraction": 0.5}
+    assert superdrops_observer_settings(python_config) == {
+        "interval": 1,
+        "fraction": 0.5,
+        "seed": 0,
+        "gbxindices": None,
+    }
+
+
+def test_decimate_superdrops():
+    """decimates random ragged superdroplets and checks only superdroplets at every interval'th
+    time in the given gridboxes are kept and that the same random subset of sdIds is kept at
+    every time"""
+    ntimes, nsupers, ngbxs = 9, 1000, 8
+    rng = np.random.default_rng(seed=0)
+    raggedcount = np.full(ntimes, nsupers, dtype=np.uint32)
+    superdrops = {
+        "sdId": np.tile(np.arange(nsupers), ntimes),
+        "sdgbxindex": rng.integers(0, ngbxs, ntimes * nsupers),
+        "xi": rng.random(ntimes * nsupers),
+    }
+    times = np.repeat(np.arange(ntimes), raggedcount)
+
+    settings = {"interval": 4, "fraction": 0.2, "seed": 1, "gbxindices": [0, 3]}
+    new_raggedcount, new_superdrops = decimate_superdrops(
+        raggedcount, superdrops, settings
+    )
+    assert new_raggedcount.dtype == raggedcount.dtype
+    assert np.all(new_raggedcount[[1, 2, 3, 5, 6, 7]] == 0)
+    assert np.sum(new_raggedcount) == len(new_superdrops["xi"])
+    assert np.all(np.isin(new_superdrops["sdgbxindex"], [0, 3]))
+
+    new_times = np.repeat(np.arange(ntimes), new_raggedcount)
+    sdIds = [set(new_superdrops["sdId"][new_times == t]) for t in [0, 4, 8]]
+    for t, ids in zip([0, 4, 8], sdIds):
+        in_gbxs = (times == t) & np.isin(superdrops["sdgbxindex"], [0, 3])
+        assert ids <= set(superdrops["sdId"][in_gbxs])
+        assert 0.1 < len(ids) / np.sum(in_gbxs) < 0.3
+
+    settings = {"interval": 4, "fraction": 0.2, "seed": 1, "gbxindices": None}
+    _, new_superdrops = decimate_superdrops(raggedcount, superdrops, settings)
+    kept = new_superdrops["sdId"].reshape(3, -1)  # same sdIds at every kept time
+    assert np.all(kept == kept[0])
+    expected = np.isin(times, [0, 4, 8]) & np.isin(superdrops["sdId"], kept[0])
+    for key in superdrops:
+        assert np.all(new_superdrops[key] == superdrops[key][expected])
+
+
+def test_decimate_superdrops_store(tmp_path):
+    """decimates the superdroplets of a zarr store in chunks of a few observation times and
+    checks they are the same as those decimated all at once and that nsupers is rewritten to
+    count the superdroplets kept in each gridbox"""
+    zarr = pytest.importorskip("zarr")
+
+    ntimes, ngbxs = 9, 8
+    rng = np.random.default_rng(seed=0)
+    raggedcount = rng.integers(900, 1100, ntimes).astype(np.uint32)
+    superdrops = {
+        "sdId": np.concatenate([np.arange(n) for n in raggedcount]),
+        "sdgbxindex": rng.integers(0, ngbxs, np.sum(raggedcount)).astype(np.uint32),
+        "xi": rng.random(np.sum(raggedcount)),
+    }
+    group = zarr.open_group(str(tmp_path / "sol.zarr"), mode="w")
+    group.create_dataset("raggedcount", data=raggedcount, chunks=(4,))
+    group.create_dataset("nsupers", data=np.zeros((ntimes, ngbxs), dtype=np.uint32))
+    for name, values in superdrops.items():
+        array = group.create_dataset(name, data=values, chunks=(500,))
+        array.attrs["_ARRAY_DIMENSIONS"] = ["superdroplets"]
+
+    settings = {"interval": 2, "fraction": 0.2, "seed": 1, "gbxindices": [0, 3]}
+    decimate_superdrops_store(tmp_path / "sol.zarr", settings, maxsupers=2000)
+    expected_raggedcount, expected = decimate_superdrops(
+        raggedcount, superdrops, settings
+    )
+
+    group = zarr.open_consolidated(str(tmp_path / "sol.zarr"), mode="r")
+    assert np.all(group["raggedcount"][:] == expected_raggedcount)
+    for name, values in expected.items():
+        assert group[name].chunks == (500,)
+        assert group[name].attrs["_ARRAY_DIMENSIONS"] == ["superdroplets"]
+        assert np.all(group[name][:] == values)
+    assert f"{name}_decimated" not in group
+
+    nsupers = group["nsupers"][:]
+    assert np.all(np.sum(nsupers, axis=1) == expected_raggedcount)
+    times = np.repeat(np.arange(ntimes), expected_raggedcount)
+    for t in range(ntimes):
+        gbxindex = expected["sdgbxindex"][times == t]
+        assert np.all(nsupers[t] == np.bincount(gbxindex, minlength=ngbxs))
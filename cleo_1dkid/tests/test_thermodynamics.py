@@ -0,0 +1,90 @@
+"""
+Copyright (c) 2025 MPI-M, Clara Bayley
+
+----- superdrops-in-action -----
+File: test_thermodynamics.py
+Project: tests
+Created Date: Saturday 17th October 2026
+Author: Clara Bayley (CB)
+Additional Contributors:
+-----
+License: BSD 3-Clause "New" or "Revised" License
+https://opensource.org/licenses/BSD-3-Clause
+-----
+File Description:
+tests of thermodynamics with variables packed into one contiguous buffer
+"""
+
+import numpy as np
+from copy import deepcopy
+
+from libs.thermo.thermodynamics import Thermodynamics, PackedThermodynamics
+
+
+def test_packed_thermodynamics():
+    """checks the variables of packed thermodynamics are views onto its buffer and that
+    packing, unpacking, getting and setting state and deep copies behave the same as for
+    ordinary thermodynamics"""
+    nmembers, nz = 3, 8
+    rng = np.random.default_rng(seed=0)
+    variables = rng.random((9, nmembers, nz))
+    winds = rng.random((3, nmembers, 2 * nz))
+
+    thermo = Thermodynamics(*variables, *winds)
+    packed = PackedThermodynamics(*variables, *winds)
+    assert packed.nmembers == nmembers
+    assert packed.buffer.shape == (9, nmembers, nz)
+    assert packed.buffer.flags["C_CONTIGUOUS"]
+    for var in [
+        packed.temp,
+        packed.rhod,
+        packed.press,
+        *packed.unpack_massmix_ratios(),
+    ]:
+        assert np.shares_memory(var, packed.buffer)
+    assert np.all(packed.pack() == thermo.pack())
+    assert np.all(packed.pack() == variables)
+
+    state, packed_state = thermo.get_state(), packed.get_state()
+    assert state.keys() == packed_state.keys()
+    for key in state:
+        assert np.all(state[key] == packed_state[key])
+
+    buffer = packed.buffer
+    packed.unpack(rng.random((9, nmembers, nz)))
+    packed.set_state(state)
+    assert packed.buffer is buffer
+    assert np.all(packed.buffer == variables)
+
+    copy = deepcopy(packed)
+    assert not np.shares_memory(copy.buffer, packed.buffer)
+    copy.massmix_ratios["qvap"][...] = 0.0
+    assert np.all(copy.buffer[3] == 0.0)
+    assert np.all(packed.massmix_ratios["qvap"] == variables[3])
+
+
+def test_thermodynamics_dtype():
+    """checks thermodynamics (packed or not) store variables with the given dtype and that
+    copy=False refers to the given arrays unless they must be converted"""
+    nz = 8
+    rng = np.random.default_rng(seed=0)
+    variables = rng.random((9, nz))
+    winds = rng.random((3, 2 * nz))
+
+    for ThermodynamicsType in [Thermodynamics, PackedThermodynamics]:
+        thermo = ThermodynamicsType(*variables, *winds)
+        assert thermo.dtype == np.float64
+        thermo32 = ThermodynamicsType(*variables, *winds, dtype=np.float32)
+        assert thermo32.dtype == np.float32
+        assert thermo32.wvel.dtype == np.float32
+        assert thermo32.pack().dtype == np.float32
+        assert np.all(thermo32.pack() == variables.astype(np.float32))
+
+        thermo32.temp[:] = variables[0]  # (e.g. from the dynamics)
+        assert np.all(thermo32.temp == variables[0].astype(np.float32))
+
+    variables, winds = list(variables), list(winds)
+    thermo = Thermodynamics(*variables, *winds, copy=False)
+    assert thermo.temp is variables[0] and thermo.wvel is winds[0]
+    thermo32 = Thermodynamics(*variables, *winds, copy=False, dtype=np.float32)
+    assert not np.shares_memory(thermo32.temp, variables[0])
@@ -256,7 +256,7 @@ def get_cleo_ensemble_dataset(config, gbxs, datasets, precip_rolling_window):
         combine="nested",
         concat_dim="ensemble",
         preprocess=drop_superdroplets,
-        consolidated=False,
+        consolidated=None,  # (use consolidated metadata if the stores have it)
     )
     ensemble_coord = dict(ensemble=("ensemble", [str(Path(d).stem) for d in datasets]))
     ds = ds.assign_coords(ensemble_coord)